@@ -0,0 +1,143 @@
+# apps/api/app/admission.py
+from __future__ import annotations
+
+import logging
+import math
+import os
+import statistics
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from rq import Worker
+
+from .metrics import ENQUEUE_REJECTED
+from .queues import redis
+
+log = logging.getLogger(__name__)
+
+# Never accept more waiting analysis jobs than this
+ENQUEUE_MAX_QUEUE_DEPTH = int(os.getenv("ENQUEUE_MAX_QUEUE_DEPTH", "200"))
+# Turn new jobs away once the queue would take longer than this to drain (well under
+# the 15-minute job timeout, so accepted jobs finish in bounded time)
+ENQUEUE_MAX_DRAIN_S = float(os.getenv("ENQUEUE_MAX_DRAIN_S", "300"))
+# Per-session limit: ENQUEUE_SESSION_LIMIT jobs per ENQUEUE_SESSION_WINDOW_S (0 disables)
+ENQUEUE_SESSION_LIMIT = int(os.getenv("ENQUEUE_SESSION_LIMIT", "5"))
+ENQUEUE_SESSION_WINDOW_S = int(os.getenv("ENQUEUE_SESSION_WINDOW_S", "60"))
+# Job duration assumed until workers have reported some
+DEFAULT_JOB_S = float(os.getenv("ENQUEUE_DEFAULT_JOB_S", "20"))
+
+# Recent transcribe-stage durations (seconds), newest first, written by the worker
+JOB_DURATIONS_KEY = "ic:jobs:durations"
+JOB_DURATIONS_KEEP = 50
+
+
+def _rate_key(session_id: int) -> str:
+    return f"ic:rate:session:{session_id}"
+
+
+def record_job_duration(seconds: float) -> None:
+    """Remember how long a transcription job took (best effort; never fails the job)."""
+    try:
+        with redis.pipeline() as pipe:
+            pipe.lpush(JOB_DURATIONS_KEY, f"{seconds:.3f}")
+            pipe.ltrim(JOB_DURATIONS_KEY, 0, JOB_DURATIONS_KEEP - 1)
+            pipe.execute()
+    except RedisError:
+        log.warning("Could not record job duration", exc_info=True)
+
+
+def recent_job_s() -> float:
+    """Median duration of recent jobs (robust to the odd very long recording)."""
+    raw = redis.lrange(JOB_DURATIONS_KEY, 0, -1)
+    durations = [float(v) for v in raw]
+    return statistics.median(durations) if durations else DEFAULT_JOB_S
+
+
+@dataclass(frozen=True)
+class QueueLoad:
+    depth: int
+    workers: int
+    job_s: float
+
+    @property
+    def drain_s(self) -> float:
+        """Time until everything waiting now has been picked up."""
+        return self.depth * self.job_s / self.workers
+
+
+def queue_load(queue: Any, *ahead: Any) -> QueueLoad:
+    """Load on ``queue``, counting jobs on ``ahead`` (drained first by the same workers)."""
+    depth = queue.count + sum(q.count for q in ahead)
+    if depth == 0:
+        return QueueLoad(0, 1, 0.0)
+    workers = max(1, Worker.count(connection=redis, queue=queue))
+    return QueueLoad(depth, workers, recent_job_s())
+
+
+def _retry_after(seconds: float) -> dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+def check_queue(queue: Any, *ahead: Any) -> QueueLoad | None:
+    """
+    Admit a new job, or raise 503 + Retry-After when the queue (plus any
+    higher-priority ``ahead`` queues) is already too deep or would take too
+    long to drain. Redis trouble admits (and is logged).
+    """
+    try:
+        load = queue_load(queue, *ahead)
+    except RedisError:
+        log.warning("Queue load unavailable; admitting job", exc_info=True)
+        return None
+    if load.depth >= ENQUEUE_MAX_QUEUE_DEPTH:
+        ENQUEUE_REJECTED.labels("depth").inc()
+        excess = load.depth - ENQUEUE_MAX_QUEUE_DEPTH + 1
+        raise HTTPException(
+            status_code=503,
+            detail="Analysis queue is full",
+            headers=_retry_after(excess * load.job_s / load.workers),
+        )
+    if load.drain_s > ENQUEUE_MAX_DRAIN_S:
+        ENQUEUE_REJECTED.labels("drain").inc()
+        raise HTTPException(
+            status_code=503,
+            detail=f"Analysis queue is backed up (about {round(load.drain_s)} s of work)",
+            headers=_retry_after(load.drain_s - ENQUEUE_MAX_DRAIN_S),
+        )
+    return load
+
+
+def check_session_rate(session_id: int) -> None:
+    """Fixed-window limit on jobs per session; raises 429 + Retry-After past it."""
+    if ENQUEUE_SESSION_LIMIT <= 0:
+        return
+    key = _rate_key(session_id)
+    try:
+        redis.set(key, 0, nx=True, ex=ENQUEUE_SESSION_WINDOW_S)
+        count = redis.incr(key)
+        if count <= ENQUEUE_SESSION_LIMIT:
+            return
+        ttl = redis.ttl(key)
+    except RedisError:
+        log.warning("Session rate limit unavailable; admitting job", exc_info=True)
+        return
+    ENQUEUE_REJECTED.labels("session_rate").inc()
+    raise HTTPException(
+        status_code=429,
+        detail=f"At most {ENQUEUE_SESSION_LIMIT} analyses per {ENQUEUE_SESSION_WINDOW_S} s",
+        headers=_retry_after(ttl if ttl and ttl > 0 else ENQUEUE_SESSION_WINDOW_S),
+    )
+
+
+def refund_session_rate(session_id: int) -> None:
+    """Give back a ``check_session_rate`` slot for a submit that created no job."""
+    if ENQUEUE_SESSION_LIMIT <= 0:
+        return
+    try:
+        key = _rate_key(session_id)
+        if redis.decr(key) < 0:
+            redis.delete(key)  # the window had already expired; don't leave a TTL-less key
+    except RedisError:
+        log.warning("Could not refund session rate slot", exc_info=True)
@@ -0,0 +1,166 @@
+# apps/api/app/batch_worker.py
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from redis.exceptions import RedisError
+from rq import SimpleWorker
+from rq.executions import Execution
+from rq.intermediate_queue import IntermediateQueue
+from rq.job import Job
+from rq.queue import Queue
+from rq.worker import WorkerStatus
+
+from . import tasks
+
+# Max analysis jobs run through the models together (1 = one job at a time)
+WORKER_BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", "8"))
+# How long to wait for more ready jobs once a batch has been started
+WORKER_BATCH_LINGER_S = float(os.getenv("WORKER_BATCH_LINGER_MS", "50")) / 1000
+
+
+def _func_name(func: Callable[..., Any]) -> str:
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+# Job functions whose ready jobs go through the models together, and how to prepare them
+BATCHED: dict[str, Callable[[list[Job]], tasks.Prepared]] = {
+    _func_name(tasks.transcribe_stage): tasks.prepare_transcribe_batch,
+    _func_name(tasks.score_stage): tasks.prepare_score_batch,
+    _func_name(tasks.run_full_pipeline): tasks.prepare_pipeline_batch,
+}
+
+
+class BatchWorker(SimpleWorker):
+    """
+    SimpleWorker that micro-batches the analysis pipeline.
+
+    When it picks up a transcribe or score stage job (or a legacy
+    ``run_full_pipeline`` job) it claims up to ``batch_size - 1`` more ready
+    jobs of the same kind from the same queue through RQ's own dequeue
+    (lingering at most ``linger_s`` for stragglers), runs them through the
+    model together, then runs every job through the normal RQ lifecycle, so
+    each keeps its own status, callbacks, result and next stage. Each job's
+    precomputed results are handed to it as ``job.prepared``.
+
+    Every job of the batch, the leading one included, is registered as
+    started before the batch is prepared and heartbeated until it runs, so a
+    crash mid-batch leaves them to RQ's abandoned-job handling instead of
+    losing them.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        batch_size: int = WORKER_BATCH_SIZE,
+        linger_s: float = WORKER_BATCH_LINGER_S,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.batch_size = batch_size
+        self.linger_s = linger_s
+        # Registered batch jobs that have not started running yet, by job id
+        self._claimed: dict[str, tuple[Job, Execution]] = {}
+
+    def execute_job(self, job: Job, queue: Queue) -> None:
+        prepare = BATCHED.get(job.func_name)
+        if self.batch_size <= 1 or prepare is None:
+            return super().execute_job(job, queue)
+        with self.connection.pipeline() as pipeline:
+            self._register(job, pipeline)
+            self.set_state(WorkerStatus.BUSY, pipeline=pipeline)
+            pipeline.execute()
+        try:
+            with self._heartbeats():
+                batch = [job, *self._claim_more(queue, job.func_name)]
+                if len(batch) > 1:
+                    try:
+                        prepared = prepare(batch)
+                    except Exception:
+                        self.log.exception(
+                            "Batch of %d failed to prepare; running jobs singly", len(batch)
+                        )
+                        prepared = {}
+                    for j in batch:
+                        j.prepared = prepared.get(j.id)
+                    self.log.info("Running a batch of %d %s jobs", len(batch), job.func_name)
+                for j in batch:
+                    super().execute_job(j, queue)
+        finally:
+            self._claimed.clear()
+
+    def _register(self, job: Job, pipeline: Any) -> None:
+        """Put ``job`` in the started registry now; ``prepare_execution`` reuses the entry."""
+        execution = Execution.create(job, self.get_heartbeat_ttl(job), pipeline=pipeline)
+        self._claimed[job.id] = (job, execution)
+
+    def _claim_more(self, queue: Queue, func_name: str) -> list[Job]:
+        jobs: list[Job] = []
+        intermediate = IntermediateQueue(queue.key, self.connection)
+        deadline = time.monotonic() + self.linger_s
+        while len(jobs) < self.batch_size - 1:
+            # The same dequeue the worker loop uses (LMOVE into the intermediate queue)
+            result = self.queue_class.dequeue_any(
+                [queue],
+                None,
+                connection=self.connection,
+                job_class=self.job_class,
+                serializer=self.serializer,
+                death_penalty_class=self.death_penalty_class,
+            )
+            if result is None:
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(0.005)
+                continue
+            job, _ = result
+            with self.connection.pipeline() as pipeline:
+                pipeline.lrem(intermediate.key, 1, job.id)
+                if job.func_name != func_name:
+                    pipeline.lpush(queue.key, job.id)  # back to the front, untouched
+                    pipeline.execute()
+                    break
+                # Registered in the same transaction that takes it off the intermediate queue
+                job.redis_server_version = self.get_redis_server_version()
+                self._register(job, pipeline)
+                pipeline.execute()
+            jobs.append(job)
+        return jobs
+
+    @contextmanager
+    def _heartbeats(self) -> Iterator[None]:
+        """Keep this worker and its registered, not yet running jobs alive meanwhile."""
+        stop = threading.Event()
+
+        def beat() -> None:
+            while not stop.wait(self.job_monitoring_interval):
+                try:
+                    with self.connection.pipeline() as pipeline:
+                        self.heartbeat(pipeline=pipeline)
+                        for job, execution in list(self._claimed.values()):
+                            ttl = self.get_heartbeat_ttl(job)
+                            execution.heartbeat(job.started_job_registry, ttl, pipeline=pipeline)
+                        pipeline.execute()
+                except RedisError:
+                    self.log.warning("Batch heartbeat failed", exc_info=True)
+
+        thread = threading.Thread(target=beat, name="batch-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def prepare_execution(self, job: Job) -> Execution:
+        claimed = self._claimed.pop(job.id, None)
+        if claimed is None:
+            return super().prepare_execution(job)
+        self.execution = claimed[1]
+        self.set_state(WorkerStatus.BUSY)
+        return self.execution
@@ -0,0 +1,189 @@
+# apps/api/app/browser_pool.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+# Max pages rendering at once (each page is one tab in the shared browser)
+PDF_POOL_SIZE = int(os.getenv("PDF_POOL_SIZE", "4"))
+# Recycle the browser after this many renders to bound Chromium memory growth
+PDF_BROWSER_MAX_RENDERS = int(os.getenv("PDF_BROWSER_MAX_RENDERS", "200"))
+# Launch Chromium during app startup instead of on the first PDF request
+PDF_POOL_PREWARM = os.getenv("PDF_POOL_PREWARM", "0") == "1"
+
+LAUNCH_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+]
+
+
+class _Generation:
+    """One launched browser process and its bookkeeping."""
+
+    def __init__(self, browser: Any) -> None:
+        self.browser = browser
+        self.active = 0
+        self.renders = 0
+        self.retired = False
+        self.started_at = time.time()
+
+
+class BrowserPool:
+    """
+    Long-lived headless Chromium shared by all PDF renders.
+
+    Hands out fresh pages with bounded concurrency, health-checks the browser
+    before use, and swaps in a new browser after ``max_renders`` renders or a
+    crash. The old browser is closed once its in-flight pages finish.
+    """
+
+    def __init__(
+        self,
+        size: int = PDF_POOL_SIZE,
+        max_renders: int = PDF_BROWSER_MAX_RENDERS,
+        executable_path: str | None = None,
+    ) -> None:
+        self.size = size
+        self.max_renders = max_renders
+        self.executable_path = executable_path or os.getenv("CHROMIUM_PATH")
+        self._sem: asyncio.Semaphore | None = None
+        self._lock: asyncio.Lock | None = None
+        self._gen: _Generation | None = None
+        self._waiting = 0
+        # Closes of retired browsers still running (the loop only keeps weak references)
+        self._closing: set[asyncio.Task[None]] = set()
+        self._stats = {"launches": 0, "renders": 0, "failures": 0, "recycles": 0}
+
+    def _primitives(self) -> tuple[asyncio.Semaphore, asyncio.Lock]:
+        # Created lazily so they bind to the running event loop
+        if self._sem is None or self._lock is None:
+            self._sem = asyncio.Semaphore(self.size)
+            self._lock = asyncio.Lock()
+        return self._sem, self._lock
+
+    async def start(self) -> None:
+        _, lock = self._primitives()
+        async with lock:
+            await self._ensure_browser()
+
+    async def close(self) -> None:
+        gen, self._gen = self._gen, None
+        if gen is not None:
+            await self._close_browser(gen)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        self._sem = self._lock = None
+
+    async def _launch(self) -> _Generation:
+        from pyppeteer import launch  # imported lazily: only PDF requests need Chromium
+
+        browser = await launch(
+            executablePath=self.executable_path,
+            headless=True,
+            args=LAUNCH_ARGS,
+            # We own the lifecycle; don't let pyppeteer install signal handlers
+            handleSIGINT=False,
+            handleSIGTERM=False,
+            handleSIGHUP=False,
+        )
+        gen = _Generation(browser)
+        browser.on("disconnected", lambda: setattr(gen, "retired", True))
+        self._stats["launches"] += 1
+        return gen
+
+    async def _healthy(self, gen: _Generation) -> bool:
+        if gen.retired:
+            return False
+        try:
+            await asyncio.wait_for(gen.browser.version(), timeout=5)
+            return True
+        except Exception:
+            return False
+
+    async def _ensure_browser(self) -> _Generation:
+        gen = self._gen
+        if gen is not None and gen.renders < self.max_renders and await self._healthy(gen):
+            return gen
+        if gen is not None:
+            self._retire(gen)
+        self._gen = await self._launch()
+        return self._gen
+
+    def _retire(self, gen: _Generation) -> None:
+        log.info("Recycling PDF browser after %d renders", gen.renders)
+        gen.retired = True
+        self._stats["recycles"] += 1
+        if gen.active == 0:
+            task = asyncio.ensure_future(self._close_browser(gen))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_browser(gen: _Generation) -> None:
+        try:
+            await gen.browser.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Any]:
+        """Borrow a fresh page; waits while ``size`` renders are already in flight."""
+        sem, lock = self._primitives()
+        self._waiting += 1
+        try:
+            await sem.acquire()
+        finally:
+            self._waiting -= 1
+        gen: _Generation | None = None
+        page = None
+        try:
+            async with lock:
+                gen = await self._ensure_browser()
+                gen.active += 1
+            page = await gen.browser.newPage()
+            yield page
+            gen.renders += 1
+            self._stats["renders"] += 1
+        except Exception:
+            self._stats["failures"] += 1
+            # A failed render may mean a wedged/crashed browser: replace it
+            if gen is not None and gen is self._gen and not await self._healthy(gen):
+                self._gen = None
+                gen.retired = True
+            raise
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            if gen is not None:
+                gen.active -= 1
+                if gen.retired and gen.active == 0 and gen is not self._gen:
+                    await self._close_browser(gen)
+            sem.release()
+
+    def stats(self) -> dict[str, Any]:
+        gen = self._gen
+        return {
+            "size": self.size,
+            "max_renders": self.max_renders,
+            "browser_up": gen is not None and not gen.retired,
+            "browser_renders": gen.renders if gen else 0,
+            "browser_age_s": round(time.time() - gen.started_at, 1) if gen else None,
+            "active": gen.active if gen else 0,
+            "waiting": self._waiting,
+            **self._stats,
+        }
+
+
+# Process-wide pool (created per API process; started in the app lifespan)
+pool = BrowserPool()
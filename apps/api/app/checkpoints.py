@@ -0,0 +1,73 @@
+# apps/api/app/checkpoints.py
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections.abc import Callable
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from .metrics import CHECKPOINT_RESUMES
+from .queues import redis
+
+log = logging.getLogger(__name__)
+
+# Outlives every retry of a pipeline; only checkpoints of abandoned pipelines expire
+CHECKPOINT_TTL_S = int(os.getenv("CHECKPOINT_TTL_S", str(24 * 3600)))
+
+
+def checkpoint_key(pipeline_id: str) -> str:
+    return f"ic:checkpoint:{pipeline_id}"
+
+
+def load(pipeline_id: str) -> dict[str, Any]:
+    """Outputs of the stages a pipeline has completed, by stage ({} when Redis is down)."""
+    try:
+        raw = redis.hgetall(checkpoint_key(pipeline_id))
+    except RedisError:
+        log.warning("Checkpoints unavailable for %s", pipeline_id, exc_info=True)
+        return {}
+    return {(k.decode() if isinstance(k, bytes) else k): json.loads(v) for k, v in raw.items()}
+
+
+def save(pipeline_id: str, stage: str, value: Any) -> None:
+    """Record a completed stage's output (best effort; never fails the job)."""
+    key = checkpoint_key(pipeline_id)
+    try:
+        with redis.pipeline() as pipe:
+            pipe.hset(key, stage, json.dumps(value))
+            pipe.expire(key, CHECKPOINT_TTL_S)
+            pipe.execute()
+    except RedisError:
+        log.warning("Could not checkpoint %s of %s", stage, pipeline_id, exc_info=True)
+
+
+def clear(pipeline_id: str) -> None:
+    """Drop a pipeline's checkpoints once it has finished or failed for good."""
+    try:
+        redis.delete(checkpoint_key(pipeline_id))
+    except RedisError:
+        log.warning("Could not clear checkpoints of %s", pipeline_id, exc_info=True)
+
+
+class Resumable:
+    """
+    A pipeline attempt's view of its checkpoints: ``run`` returns a stage's
+    output from an earlier attempt if there is one, otherwise computes and
+    checkpoints it. Outside a worker (no pipeline id) it just computes.
+    """
+
+    def __init__(self, pipeline_id: str | None) -> None:
+        self.pipeline_id = pipeline_id
+        self.done = load(pipeline_id) if pipeline_id is not None else {}
+
+    def run(self, stage: str, compute: Callable[[], Any]) -> Any:
+        if stage in self.done:
+            CHECKPOINT_RESUMES.labels(stage).inc()
+            return self.done[stage]
+        value = compute()
+        if self.pipeline_id is not None:
+            save(self.pipeline_id, stage, value)
+        return value
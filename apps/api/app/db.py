@@ -2,24 +2,74 @@
 from __future__ import annotations
 
 import os
-from collections.abc import Iterator
+from collections.abc import AsyncIterator, Iterator
 from contextlib import contextmanager
+from typing import Any
 
+from sqlalchemy import inspect, or_, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from .models import Question
+from .models import Analysis, Question
+from .models import Session as SessionModel
 
 # Pick DB URL:
 # - In prod/docker set DATABASE_URL=postgresql://...
 # - Locally without docker this falls back to a file-based SQLite DB (no server needed)
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
 
-# SQLite needs a special arg; Postgres does not.
-connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
+# Connection pool per engine and process; connections are pinged before each checkout
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "10"))
+DB_POOL_RECYCLE_S = int(os.getenv("DB_POOL_RECYCLE_S", "1800"))
+# Longest any one statement may run (Postgres statement_timeout; SQLite lock wait)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
 
-engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+
+def async_url(url: str) -> str:
+    """The same database through an asyncio driver (asyncpg / aiosqlite)."""
+    scheme, _, rest = url.partition("://")
+    backend = scheme.split("+", 1)[0]
+    if backend == "postgresql":
+        return f"postgresql+asyncpg://{rest}"
+    if backend == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+def _engine_options(url: str, is_async: bool) -> dict[str, Any]:
+    if url.startswith("sqlite"):
+        # SQLite needs check_same_thread off; it has no server-side pool to size
+        return {
+            "connect_args": {"check_same_thread": False, "timeout": DB_STATEMENT_TIMEOUT_MS / 1000},
+            "pool_pre_ping": True,
+        }
+    if is_async:
+        connect_args: dict[str, Any] = {
+            "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        }
+    else:
+        connect_args = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return {
+        "connect_args": connect_args,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_S,
+        "pool_recycle": DB_POOL_RECYCLE_S,
+        "pool_pre_ping": True,
+    }
+
+
+def make_async_engine(url: str) -> AsyncEngine:
+    return create_async_engine(async_url(url), **_engine_options(url, is_async=True))
+
+
+# Sync engine: schema setup, seeding and the RQ worker
+engine = create_engine(DATABASE_URL, echo=False, **_engine_options(DATABASE_URL, is_async=False))
+# Async engine: every API route, so DB I/O never blocks the event loop or the threadpool
+async_engine = make_async_engine(DATABASE_URL)
 
 
 def init_db(seed: bool = True) -> None:
@@ -29,6 +79,8 @@ def init_db(seed: bool = True) -> None:
     injection, they won't call this implicitly.
     """
     SQLModel.metadata.create_all(engine)
+    _add_missing_columns()
+    _add_missing_indexes()
 
     if not seed:
         return
@@ -39,41 +91,115 @@ def init_db(seed: bool = True) -> None:
         if already:
             return
 
-        s.add_all(
-            [
-                Question(
-                    role="SWE",
-                    text="Tell me about a challenging bug you fixed.",
-                    key_points=[
-                        "root cause analysis",
-                        "debugging steps",
-                        "tools used",
-                        "impact",
-                        "lesson learned",
-                    ],
-                ),
-                Question(
-                    role="SWE",
-                    text="Describe a system you designed.",
-                    key_points=[
-                        "requirements",
-                        "trade-offs",
-                        "scalability",
-                        "bottlenecks",
-                        "monitoring",
-                    ],
-                ),
-            ]
-        )
+        seeded = [
+            Question(
+                role="SWE",
+                text="Tell me about a challenging bug you fixed.",
+                key_points=[
+                    "root cause analysis",
+                    "debugging steps",
+                    "tools used",
+                    "impact",
+                    "lesson learned",
+                ],
+            ),
+            Question(
+                role="SWE",
+                text="Describe a system you designed.",
+                key_points=[
+                    "requirements",
+                    "trade-offs",
+                    "scalability",
+                    "bottlenecks",
+                    "monitoring",
+                ],
+            ),
+        ]
+        # Key-point embeddings are backfilled on first use so startup never loads the encoder
+        s.add_all(seeded)
         s.commit()
 
+    from .questions import catalog
+
+    catalog.invalidate()
+
+
+def _add_missing_columns() -> None:
+    """
+    create_all() never alters existing tables, so add any nullable columns that
+    were introduced after a table was first created (e.g. Question.kp_embeddings).
+    """
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing or not col.nullable:
+                    continue
+                ddl_type = col.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{col.name}" {ddl_type}'))
+
+
+def _add_missing_indexes() -> None:
+    """Like _add_missing_columns, for indexes declared after a table was first created."""
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def add_analysis(s: Session, row: Analysis) -> Analysis:
+    """
+    Insert an Analysis and point its session's ``latest_analysis_id`` at it, in
+    the caller's transaction (the caller commits). The pointer only moves forward,
+    so concurrent saves for one session cannot leave it on an older row.
+    """
+    s.add(row)
+    s.flush()
+    s.execute(
+        update(SessionModel)
+        .where(SessionModel.id == row.session_id)
+        .where(
+            or_(
+                SessionModel.latest_analysis_id.is_(None),
+                SessionModel.latest_analysis_id < row.id,
+            )
+        )
+        .values(latest_analysis_id=row.id)
+    )
+    return row
+
+
+def latest_analysis(s: Session, session_id: int) -> Analysis | None:
+    """Newest Analysis of a session: a primary-key join through the session's pointer."""
+    row = s.exec(
+        select(Analysis)
+        .join(SessionModel, SessionModel.latest_analysis_id == Analysis.id)
+        .where(SessionModel.id == session_id)
+    ).first()
+    if row is not None:
+        return row
+    # Rows saved before the pointer existed (or inserted directly): (session_id, created_at) index
+    return s.exec(
+        select(Analysis)
+        .where(Analysis.session_id == session_id)
+        .order_by(Analysis.created_at.desc(), Analysis.id.desc())
+    ).first()
+
+
+def async_session() -> AsyncSession:
+    """New AsyncSession on ``async_engine`` (looked up at call time so tests can patch it)."""
+    return AsyncSession(async_engine, expire_on_commit=False)
+
 
-def get_session() -> Iterator[Session]:
+async def get_session() -> AsyncIterator[AsyncSession]:
     """
-    FastAPI dependency for DB access.
-    Tests can override this with an in-memory engine/session.
+    FastAPI dependency for DB access. Sync helpers that take a Session
+    (``add_analysis``, ``latest_analysis``) run on it via ``run_sync``.
     """
-    with Session(engine) as session:
+    async with async_session() as session:
         yield session
 
 
@@ -0,0 +1,169 @@
+# apps/api/app/inference_pool.py
+from __future__ import annotations
+
+import asyncio
+import functools
+import math
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from fastapi import HTTPException
+
+from .metrics import INFERENCE_QUEUE_WAIT, INFERENCE_REJECTED
+
+T = TypeVar("T")
+
+# Transcriptions decoding/running at once in the API process (each uses WHISPER_CPU_THREADS)
+TRANSCRIBE_CONCURRENCY = int(os.getenv("TRANSCRIBE_CONCURRENCY", "1"))
+# Requests allowed to wait for a slot; beyond that new ones get 429 right away
+TRANSCRIBE_QUEUE_SIZE = int(os.getenv("TRANSCRIBE_QUEUE_SIZE", "4"))
+# A request still waiting after this long gives up with 503
+TRANSCRIBE_QUEUE_TIMEOUT_S = float(os.getenv("TRANSCRIBE_QUEUE_TIMEOUT_S", "30"))
+# Live-stream passes run on their own slots, never competing with uploads for theirs
+STREAM_CONCURRENCY = int(os.getenv("STREAM_CONCURRENCY", "1"))
+# Live streams open at once; further ones are refused until one ends
+STREAM_MAX_SESSIONS = int(os.getenv("STREAM_MAX_SESSIONS", "4"))
+
+
+class InferencePool:
+    """
+    Runs blocking model calls on a dedicated thread pool, off the event loop
+    and out of the default threadpool that sync routes share.
+
+    At most ``concurrency`` calls run at once and at most ``queue_size`` wait
+    for a slot. ``run`` answers 429 when the wait queue is full and 503 when a
+    slot does not free up within ``queue_timeout_s``, both with a Retry-After
+    estimated from recent call durations. A slot is only released when its
+    call finishes, even if the request that started it went away.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        queue_size: int,
+        queue_timeout_s: float,
+    ) -> None:
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout_s = queue_timeout_s
+        self._executor: ThreadPoolExecutor | None = None
+        self._sem: asyncio.Semaphore | None = None
+        self._running = 0
+        self._waiting = 0
+        self._avg_call_s = 0.0
+        self._stats = {"calls": 0, "failures": 0, "rejected_full": 0, "rejected_timeout": 0}
+
+    def _primitives(self) -> tuple[ThreadPoolExecutor, asyncio.Semaphore]:
+        # Created lazily so the semaphore binds to the running event loop
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix=self.name)
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        return self._executor, self._sem
+
+    def retry_after_s(self) -> int:
+        """Rough time until a new request would get a slot."""
+        backlog = self._running + self._waiting
+        return max(1, math.ceil(self._avg_call_s * backlog / self.concurrency))
+
+    def _reject(self, status_code: int, reason: str, detail: str) -> HTTPException:
+        self._stats[f"rejected_{reason}"] += 1
+        INFERENCE_REJECTED.labels(self.name, reason).inc()
+        return HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after_s())},
+        )
+
+    async def run(self, fn: Callable[..., T], *args: Any, queue: bool = True) -> tuple[T, float]:
+        """
+        Run ``fn(*args)`` on the pool; returns (result, seconds spent waiting for a slot).
+        ``queue=False`` skips admission control (callers that must not be turned away).
+        """
+        executor, sem = self._primitives()
+        if queue and sem.locked() and self._waiting >= self.queue_size:
+            raise self._reject(429, "full", f"Too many {self.name} requests in flight")
+
+        t0 = time.monotonic()
+        self._waiting += 1
+        try:
+            timeout = self.queue_timeout_s if queue else None
+            await asyncio.wait_for(sem.acquire(), timeout)
+        except TimeoutError:
+            detail = f"Timed out waiting for a {self.name} slot"
+            raise self._reject(503, "timeout", detail) from None
+        finally:
+            self._waiting -= 1
+        waited = time.monotonic() - t0
+        INFERENCE_QUEUE_WAIT.labels(self.name).observe(waited)
+
+        self._running += 1
+        started = time.monotonic()
+
+        def done(fut: asyncio.Future[T]) -> None:
+            self._running -= 1
+            elapsed = time.monotonic() - started
+            self._avg_call_s = (
+                elapsed if not self._stats["calls"] else (0.8 * self._avg_call_s + 0.2 * elapsed)
+            )
+            self._stats["calls"] += 1
+            if fut.cancelled() or fut.exception() is not None:
+                self._stats["failures"] += 1
+            sem.release()
+
+        fut = asyncio.get_running_loop().run_in_executor(executor, functools.partial(fn, *args))
+        fut.add_done_callback(done)
+        return await asyncio.shield(fut), waited
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "running": self._running,
+            "waiting": self._waiting,
+            "avg_call_s": round(self._avg_call_s, 3),
+            **self._stats,
+        }
+
+    def close(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._sem = None
+
+
+class SessionLimit:
+    """
+    Admission for long-lived callers (live streams) that each make many pool
+    calls: at most ``limit`` are admitted at once. Admitted callers' calls
+    skip the pool's wait queue, so the limit is what bounds their waiting.
+    """
+
+    def __init__(self, pool: InferencePool, limit: int) -> None:
+        self.pool = pool
+        self.limit = max(1, limit)
+        self.active = 0
+
+    def try_enter(self) -> bool:
+        if self.active >= self.limit:
+            INFERENCE_REJECTED.labels(self.pool.name, "full").inc()
+            return False
+        self.active += 1
+        return True
+
+    def leave(self) -> None:
+        self.active -= 1
+
+
+# Whisper calls made by API routes (the worker runs its own jobs and doesn't use this)
+transcribe_pool = InferencePool(
+    "transcribe", TRANSCRIBE_CONCURRENCY, TRANSCRIBE_QUEUE_SIZE, TRANSCRIBE_QUEUE_TIMEOUT_S
+)
+# Rolling-window passes of WS /transcribe/stream, with their own session admission
+stream_pool = InferencePool("stream", STREAM_CONCURRENCY, STREAM_MAX_SESSIONS, 0)
+stream_sessions = SessionLimit(stream_pool, STREAM_MAX_SESSIONS)
@@ -1,21 +1,55 @@
 # apps/api/app/main.py
 from __future__ import annotations
 
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from . import db as app_db  # import module so tests can patch engine if needed
+from . import metrics
+from .browser_pool import PDF_POOL_PREWARM
+from .browser_pool import pool as pdf_pool
+from .inference_pool import stream_pool, transcribe_pool
+from .model_registry import MODEL_WARMUP, registry
+from .progress import hub as progress_hub
 from .routers import analyze_text, jobs, questions, report, report_pdf, sessions, transcribe
 
+log = logging.getLogger(__name__)
+
+
+async def _warmup_models() -> None:
+    try:
+        await asyncio.to_thread(registry.warmup, MODEL_WARMUP)
+    except Exception:
+        log.exception("Model warmup failed")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # startup
+    # startup: models warm in the background so /health answers immediately
     app_db.init_db()
+    warmup = None
+    if MODEL_WARMUP:
+        # Not ready from the first request on, not only once the thread has started
+        registry.begin_warmup()
+        warmup = asyncio.create_task(_warmup_models())
+    registry.start_reaper()
+    if PDF_POOL_PREWARM:
+        await pdf_pool.start()
     yield
-    # shutdown (nothing to do yet)
+    # shutdown
+    await pdf_pool.close()
+    transcribe_pool.close()
+    stream_pool.close()
+    await progress_hub.close()
+    await app_db.async_engine.dispose()
+    registry.stop_reaper()
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
 
 
 app = FastAPI(title="Interview Coach API", lifespan=lifespan)
@@ -34,6 +68,22 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready():
+    """Readiness: 200 once warmup models are loaded, with per-model memory/idle stats."""
+    payload = registry.status()
+    if not registry.ready:
+        return JSONResponse(status_code=503, content={"status": "not ready", **payload})
+    return {"status": "ready", **payload}
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape target: stage timings, upload sizes, cache hits, queue depth/age."""
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
+
+
 @app.get("/")
 def root():
     routes = [route.path for route in app.routes]
@@ -46,4 +96,5 @@ app.include_router(questions.router)
 app.include_router(sessions.router)
 app.include_router(report.router)
 app.include_router(report_pdf.router)
+app.include_router(report_pdf.pool_router)
 app.include_router(jobs.router)
@@ -0,0 +1,138 @@
+# apps/api/app/metrics.py
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from redis.exceptions import RedisError
+from rq import Queue
+from rq.job import Job
+
+# Set PROMETHEUS_MULTIPROC_DIR when several processes (pre-forked workers,
+# multiple uvicorn workers) must be scraped as one; see worker.py.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+STAGE_SECONDS = Histogram(
+    "ic_stage_seconds",
+    "Wall time per pipeline stage",
+    ["stage"],  # decode|transcribe|embed|score|db_write|pdf_render
+    buckets=(0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+UPLOAD_BYTES = Histogram(
+    "ic_upload_bytes",
+    "Size of uploaded answer audio",
+    buckets=tuple(64 * 1024 * 4**i for i in range(7)),  # 64 KB .. 256 MB
+)
+CACHE_REQUESTS = Counter(
+    "ic_cache_requests",
+    "Cache lookups by outcome",
+    ["cache", "result"],  # cache: transcript|pdf, result: hit|miss
+)
+INFERENCE_QUEUE_WAIT = Histogram(
+    "ic_inference_queue_wait_seconds",
+    "Time API requests waited for an inference slot",
+    ["pool"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+INFERENCE_REJECTED = Counter(
+    "ic_inference_rejected",
+    "Requests turned away by an inference pool",
+    ["pool", "reason"],  # reason: full (429) | timeout (503)
+)
+CHECKPOINT_RESUMES = Counter(
+    "ic_checkpoint_resumes",
+    "Pipeline stage outputs reused from an earlier attempt instead of recomputed",
+    ["stage"],  # transcription|metrics|analysis_id
+)
+ENQUEUE_REJECTED = Counter(
+    "ic_enqueue_rejected",
+    "Analysis jobs turned away at enqueue",
+    ["reason"],  # reason: depth | drain (503) | session_rate (429)
+)
+
+
+@contextmanager
+def timed(stage: str, timings: dict[str, float] | None = None) -> Iterator[None]:
+    """Observe a stage's duration; also add it to ``timings`` (per-job breakdown) if given."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        STAGE_SECONDS.labels(stage).observe(dt)
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0.0) + dt, 4)
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+# Waiting jobs looked at per queue for the oldest-job age. Interactive-lane stage jobs
+# are enqueued at the front, so the oldest job is not necessarily the head.
+QUEUE_AGE_SCAN = int(os.getenv("METRICS_QUEUE_AGE_SCAN", "100"))
+
+
+class QueueCollector:
+    """Depth and oldest-job age per RQ queue, read from Redis at scrape time."""
+
+    def collect(self):
+        from .queues import ALL_QUEUES, redis
+
+        depth = GaugeMetricFamily("ic_queue_depth", "Jobs waiting per RQ queue", labels=["queue"])
+        age = GaugeMetricFamily(
+            "ic_queue_oldest_job_age_seconds",
+            "Age of the oldest waiting job per RQ queue",
+            labels=["queue"],
+        )
+        for q in (Queue(name, connection=redis) for name in ALL_QUEUES):
+            try:
+                count = q.count
+                jobs = Job.fetch_many(q.get_job_ids(0, QUEUE_AGE_SCAN), connection=redis)
+            except RedisError:
+                continue
+            enqueued = [
+                t if t.tzinfo else t.replace(tzinfo=timezone.utc)
+                for t in (j.enqueued_at for j in jobs if j is not None)
+                if t is not None
+            ]
+            oldest = 0.0
+            if enqueued:
+                oldest = max(0.0, (datetime.now(timezone.utc) - min(enqueued)).total_seconds())
+            depth.add_metric([q.name], count)
+            age.add_metric([q.name], oldest)
+        yield depth
+        yield age
+
+
+def scrape_registry() -> CollectorRegistry:
+    """This process's metrics, or every process's in multiprocess mode."""
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render(include_queues: bool = True) -> tuple[bytes, str]:
+    """Prometheus text exposition for ``/metrics``."""
+    body = generate_latest(scrape_registry())
+    if include_queues:
+        queues = CollectorRegistry(auto_describe=False)
+        queues.register(QueueCollector())
+        body += generate_latest(queues)
+    return body, CONTENT_TYPE_LATEST
@@ -0,0 +1,198 @@
+# apps/api/app/model_registry.py
+from __future__ import annotations
+
+import gc
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+# Comma-separated model names to load during app startup (e.g. "sbert,whisper").
+# Empty by default so API pods that never transcribe stay light.
+MODEL_WARMUP = [n.strip() for n in os.getenv("MODEL_WARMUP", "").split(",") if n.strip()]
+# Unload a model after this many idle seconds (0 disables idle unload).
+MODEL_IDLE_UNLOAD_S = float(os.getenv("MODEL_IDLE_UNLOAD_S", "0"))
+
+
+def _rss_bytes() -> int | None:
+    """Current resident set size of this process (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _param_bytes(model: Any) -> int | None:
+    """Exact parameter/buffer size for torch modules (e.g. SentenceTransformer)."""
+    params = getattr(model, "parameters", None)
+    if not callable(params):
+        return None
+    try:
+        total = sum(p.numel() * p.element_size() for p in model.parameters())
+        total += sum(b.numel() * b.element_size() for b in model.buffers())
+        return int(total)
+    except Exception:
+        return None
+
+
+@dataclass
+class _Entry:
+    loader: Callable[[], Any]
+    model: Any = None
+    last_used: float = 0.0
+    load_seconds: float | None = None
+    memory_bytes: int | None = None
+    loads: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ModelRegistry:
+    """
+    Owns the heavy ML models of a process (Sentence-BERT, Whisper).
+
+    Models are registered with a zero-arg loader and only loaded on first use,
+    so importing the app does not pull in torch / ctranslate2. Startup can warm
+    selected models explicitly, and idle models can be unloaded to free memory.
+    """
+
+    def __init__(self, idle_unload_s: float = MODEL_IDLE_UNLOAD_S) -> None:
+        self.idle_unload_s = idle_unload_s
+        self._entries: dict[str, _Entry] = {}
+        self._warmup_state = "idle"  # idle|warming|ready|failed
+        self._warmup_error: str | None = None
+        self._reaper: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    # ---- registration / access ----
+    def register(self, name: str, loader: Callable[[], Any], replace: bool = False) -> None:
+        """
+        Add a model's loader. Registering a known name is a no-op unless
+        ``replace``, which also drops the model loaded so far (e.g. to swap in
+        a stand-in); the next ``get`` uses the new loader.
+        """
+        if replace:
+            self.unload(name)
+            self._entries[name] = _Entry(loader=loader)
+        else:
+            self._entries.setdefault(name, _Entry(loader=loader))
+
+    def get(self, name: str) -> Any:
+        """Return the model, loading it on first use (thread-safe)."""
+        try:
+            entry = self._entries[name]
+        except KeyError:
+            raise KeyError(f"Unknown model: {name}") from None
+        entry.last_used = time.monotonic()
+        # Read once: unload() may clear entry.model between two unlocked reads
+        model = entry.model
+        if model is not None:
+            return model
+        with entry.lock:
+            model = entry.model
+            if model is None:
+                rss_before = _rss_bytes()
+                t0 = time.perf_counter()
+                model = entry.loader()
+                entry.load_seconds = round(time.perf_counter() - t0, 3)
+                mem = _param_bytes(model)
+                if mem is None and rss_before is not None:
+                    rss_after = _rss_bytes()
+                    mem = max(0, rss_after - rss_before) if rss_after is not None else None
+                entry.memory_bytes = mem
+                entry.loads += 1
+                entry.model = model
+            entry.last_used = time.monotonic()
+            return model
+
+    def is_loaded(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.model is not None
+
+    def unload(self, name: str) -> bool:
+        """Drop our reference to a model; in-flight callers keep theirs until done."""
+        entry = self._entries.get(name)
+        if entry is None or entry.model is None:
+            return False
+        with entry.lock:
+            entry.model = None
+            entry.memory_bytes = None
+        gc.collect()
+        return True
+
+    def unload_idle(self, now: float | None = None) -> list[str]:
+        if self.idle_unload_s <= 0:
+            return []
+        now = time.monotonic() if now is None else now
+        idle = [
+            name
+            for name, e in self._entries.items()
+            if e.model is not None and now - e.last_used >= self.idle_unload_s
+        ]
+        return [name for name in idle if self.unload(name)]
+
+    # ---- lifecycle ----
+    def begin_warmup(self) -> None:
+        """Report not-ready from now on, for warmups that start later (e.g. in a thread)."""
+        self._warmup_state = "warming"
+        self._warmup_error = None
+
+    def warmup(self, names: Iterable[str]) -> None:
+        """Load the given models now; readiness reflects the outcome."""
+        self.begin_warmup()
+        try:
+            for name in names:
+                self.get(name)
+        except Exception as e:
+            self._warmup_state = "failed"
+            self._warmup_error = f"{type(e).__name__}: {e}"
+            raise
+        self._warmup_state = "ready"
+
+    @property
+    def ready(self) -> bool:
+        return self._warmup_state in ("idle", "ready")
+
+    def start_reaper(self) -> None:
+        """Start the background idle-unload loop (no-op when disabled)."""
+        if self.idle_unload_s <= 0 or self._reaper is not None:
+            return
+        self._stop.clear()
+
+        def _loop() -> None:
+            interval = max(1.0, self.idle_unload_s / 4)
+            while not self._stop.wait(interval):
+                self.unload_idle()
+
+        self._reaper = threading.Thread(target=_loop, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+    def stop_reaper(self) -> None:
+        self._stop.set()
+        if self._reaper is not None:
+            self._reaper.join(timeout=2)
+            self._reaper = None
+
+    def status(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "warmup": self._warmup_state,
+            "error": self._warmup_error,
+            "models": {
+                name: {
+                    "loaded": e.model is not None,
+                    "memory_bytes": e.memory_bytes,
+                    "load_seconds": e.load_seconds,
+                    "loads": e.loads,
+                    "idle_s": round(now - e.last_used, 1) if e.last_used else None,
+                }
+                for name, e in self._entries.items()
+            },
+        }
+
+
+# Process-wide registry (API and worker each keep their own)
+registry = ModelRegistry()
@@ -4,7 +4,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import JSON, Column
+from sqlalchemy import JSON, Column, Index, event
 from sqlmodel import Field, SQLModel
 
 
@@ -14,6 +14,18 @@ class Question(SQLModel, table=True):
     text: str
     # Cross-dialect JSON (works in SQLite tests and Postgres in Docker)
     key_points: list[str] = Field(default_factory=list, sa_column=Column(JSON))
+    # Precomputed key-point embeddings (one row per key point) plus the encoder
+    # that produced them, so scoring only has to encode the transcript.
+    kp_embeddings: list[list[float]] | None = Field(default=None, sa_column=Column(JSON))
+    kp_model: str | None = None
+
+
+@event.listens_for(Question.key_points, "set")
+def _invalidate_kp_embeddings(target: Question, value, oldvalue, initiator) -> None:
+    # Editing key points makes the stored matrix stale; it is recomputed on next use.
+    if value != oldvalue:
+        target.kp_embeddings = None
+        target.kp_model = None
 
 
 class Session(SQLModel, table=True):
@@ -22,9 +34,14 @@ class Session(SQLModel, table=True):
     question_id: int
     started_at: datetime = Field(default_factory=datetime.utcnow)
     duration_s: float = 0.0
+    # Newest Analysis of this session, kept current by db.add_analysis (reports fetch it by id)
+    latest_analysis_id: int | None = None
 
 
 class Analysis(SQLModel, table=True):
+    # Newest-per-session lookups for sessions without a latest_analysis_id pointer
+    __table_args__ = (Index("ix_analysis_session_created", "session_id", "created_at"),)
+
     id: int | None = Field(default=None, primary_key=True)
     session_id: int
     transcript: str
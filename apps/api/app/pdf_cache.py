@@ -0,0 +1,116 @@
+# apps/api/app/pdf_cache.py
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+
+from .metrics import cache_lookup
+
+# Rendered reports live on local disk, keyed by content (analysis id + template hash)
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "./.cache/pdf")
+PDF_CACHE_MAX_BYTES = int(float(os.getenv("PDF_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+
+class PdfCache:
+    """
+    Size-bounded, content-addressed PDF store with LRU eviction (by mtime,
+    refreshed on every hit) and in-process single-flight rendering.
+    """
+
+    def __init__(self, directory: str = PDF_CACHE_DIR, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.dir = Path(directory)
+        self.max_bytes = max_bytes
+        self._inflight: dict[str, asyncio.Task[bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(analysis_id: int, template_hash: str) -> str:
+        return hashlib.sha256(f"{analysis_id}:{template_hash}".encode()).hexdigest()[:32]
+
+    def path(self, key: str) -> Path:
+        return self.dir / f"{key}.pdf"
+
+    def get(self, key: str) -> bytes | None:
+        p = self.path(key)
+        try:
+            data = p.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(p)  # mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for p in self.dir.glob("*.pdf"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+
+    async def get_or_render(self, key: str, render: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Serve from disk, or render once no matter how many requests are waiting."""
+        data = await run_in_threadpool(self.get, key)
+        if data is not None:
+            self.hits += 1
+            cache_lookup("pdf", True)
+            return data
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.hits += 1
+            cache_lookup("pdf", True)
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        cache_lookup("pdf", False)
+        # The render runs as its own task so a disconnecting leader can't cancel it for the rest
+        task = asyncio.create_task(self._render(key, render))
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _render(self, key: str, render: Callable[[], Awaitable[bytes]]) -> bytes:
+        try:
+            data = await render()
+            await run_in_threadpool(self.put, key, data)
+            return data
+        finally:
+            self._inflight.pop(key, None)
+
+
+cache = PdfCache()
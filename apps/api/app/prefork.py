@@ -0,0 +1,121 @@
+# apps/api/app/prefork.py
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import signal
+import threading
+import time
+from collections.abc import Callable
+
+log = logging.getLogger(__name__)
+
+# A child that dies sooner than this after starting counts as a crash loop
+MIN_CHILD_UPTIME_S = 5.0
+MAX_RESTART_BACKOFF_S = 30.0
+
+
+def parse_pools(spec: str) -> list[tuple[list[str], int]]:
+    """
+    ``"a,b=2; c=1"`` -> ``[(["a", "b"], 2), (["c"], 1)]``: groups of children
+    and what each group's children work on. A missing count means one child.
+    """
+    pools: list[tuple[list[str], int]] = []
+    for part in spec.split(";"):
+        names, _, count = part.partition("=")
+        items = [n.strip() for n in names.split(",") if n.strip()]
+        if items:
+            pools.append((items, max(1, int(count)) if count.strip() else 1))
+    return pools
+
+
+def pool_for_slot(pools: list[tuple[list[str], int]], slot: int) -> list[str]:
+    """What the child in ``slot`` works on (slots are numbered pool by pool)."""
+    for items, count in pools:
+        if slot < count:
+            return items
+        slot -= count
+    raise IndexError(f"slot {slot} is beyond the configured pools")
+
+
+class Supervisor:
+    """
+    Pre-forking process supervisor.
+
+    Whatever the parent has loaded before ``run`` (e.g. model weights) is
+    shared with the children copy-on-write. Each child runs ``target`` and
+    exits; crashed children are replaced (with backoff if they keep dying
+    young) until ``stop`` is called, which forwards SIGTERM and waits for
+    every child to finish its current work.
+    """
+
+    def __init__(self, processes: int, target: Callable[[int], None]) -> None:
+        self.processes = max(1, processes)
+        self.target = target
+        self.children: dict[int, tuple[int, float]] = {}  # pid -> (slot, started_at)
+        self.restarts = 0
+        self._stopping = threading.Event()
+        self._backoff = 0.0
+
+    def _spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:  # child
+            code = 1
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                self.target(slot)
+                code = 0
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                log.exception("Worker child %d failed", slot)
+            finally:
+                os._exit(code)
+        self.children[pid] = (slot, time.monotonic())
+        log.info("Started worker child %d (pid %d)", slot, pid)
+
+    def run(self) -> None:
+        """Fork the children and babysit them until ``stop``; returns once all have exited."""
+        # Keep the shared heap out of the GC's reach so collections don't dirty CoW pages
+        gc.collect()
+        gc.freeze()
+        for slot in range(self.processes):
+            self._spawn(slot)
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            if pid not in self.children:
+                continue
+            slot, started = self.children.pop(pid)
+            if self._stopping.is_set():
+                continue
+            log.warning("Worker child %d (pid %d) exited with status %d", slot, pid, status)
+            if time.monotonic() - started < MIN_CHILD_UPTIME_S:
+                self._backoff = min(max(1.0, self._backoff * 2), MAX_RESTART_BACKOFF_S)
+            else:
+                self._backoff = 0.0
+            if self._backoff and self._stopping.wait(self._backoff):
+                continue
+            self.restarts += 1
+            self._spawn(slot)
+        gc.unfreeze()
+
+    def stop(self, sig: int = signal.SIGTERM) -> None:
+        """Stop replacing children and ask the running ones to drain and exit."""
+        self._stopping.set()
+        for pid in list(self.children):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def install_signal_handlers(self) -> None:
+        """SIGTERM/SIGINT in the parent drain the children (main thread only)."""
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda signum, _frame: self.stop(signal.SIGTERM))
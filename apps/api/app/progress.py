@@ -0,0 +1,152 @@
+# apps/api/app/progress.py
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from .queues import REDIS_URL, redis
+
+log = logging.getLogger(__name__)
+
+# Every job's stage transitions go through one channel; the API fans them out by job id
+PROGRESS_CHANNEL = "ic:progress"
+# Latest event per job, so late listeners start from the current stage
+PROGRESS_TTL_S = int(os.getenv("PROGRESS_TTL_S", "3600"))
+# queued -> transcribing -> scoring -> saved (or failed; "retrying" in between attempts)
+TERMINAL_STAGES = ("saved", "failed")
+# How long a new listener waits for the hub's SUBSCRIBE to be confirmed before going on
+# without it (SSE streams also re-read the recorded state on every keep-alive)
+PROGRESS_SUBSCRIBE_TIMEOUT_S = float(os.getenv("PROGRESS_SUBSCRIBE_TIMEOUT_S", "5"))
+
+
+def state_key(job_id: str) -> str:
+    return f"ic:progress:{job_id}"
+
+
+def publish(job_id: str, stage: str, **data: Any) -> None:
+    """Record and broadcast a stage transition (best effort; never fails the job)."""
+    payload = json.dumps({"job_id": job_id, "stage": stage, "at": time.time(), **data})
+    try:
+        with redis.pipeline() as pipe:
+            pipe.set(state_key(job_id), payload, ex=PROGRESS_TTL_S)
+            pipe.publish(PROGRESS_CHANNEL, payload)
+            pipe.execute()
+    except RedisError:
+        log.warning("Could not publish progress for job %s", job_id, exc_info=True)
+
+
+class ProgressHub:
+    """
+    One Redis pub/sub subscription per API process, fanned out to any number
+    of in-process listeners (one asyncio queue per SSE connection).
+    """
+
+    def __init__(self, url: str = REDIS_URL, channel: str = PROGRESS_CHANNEL) -> None:
+        self.url = url
+        self.channel = channel
+        self._listeners: dict[str, set[asyncio.Queue[dict[str, Any]]]] = {}
+        self._redis: Any = None
+        self._task: asyncio.Task[None] | None = None
+        # Set while the channel subscription is confirmed (created on the running loop)
+        self._subscribed: asyncio.Event | None = None
+
+    def _client(self) -> Any:
+        if self._redis is None:
+            from redis import asyncio as aioredis
+
+            self._redis = aioredis.from_url(self.url)
+        return self._redis
+
+    async def _start(self) -> None:
+        """Start the reader if needed and wait until its subscription is confirmed."""
+        if self._subscribed is None:
+            self._subscribed = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._reader())
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), PROGRESS_SUBSCRIBE_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            log.warning("Progress subscription not confirmed; listening anyway")
+
+    async def _reader(self) -> None:
+        assert self._subscribed is not None
+        while True:
+            pubsub = self._client().pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for msg in pubsub.listen():
+                    if msg.get("type") == "subscribe":
+                        # From here on the server delivers everything published to the channel
+                        self._subscribed.set()
+                    elif msg.get("type") == "message":
+                        self._dispatch(msg["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._subscribed.clear()
+                log.warning("Progress subscription lost; reconnecting", exc_info=True)
+                await asyncio.sleep(1.0)
+            finally:
+                self._subscribed.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def _dispatch(self, raw: bytes | str) -> None:
+        try:
+            event = json.loads(raw)
+        except ValueError:
+            return
+        for q in self._listeners.get(event.get("job_id"), ()):
+            q.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self, job_id: str) -> AsyncIterator[asyncio.Queue[dict[str, Any]]]:
+        """Queue receiving this job's events for as long as the context is open."""
+        await self._start()
+        q: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self._listeners.setdefault(job_id, set()).add(q)
+        try:
+            yield q
+        finally:
+            listeners = self._listeners.get(job_id)
+            if listeners is not None:
+                listeners.discard(q)
+                if not listeners:
+                    del self._listeners[job_id]
+
+    async def snapshot(self, job_id: str) -> dict[str, Any] | None:
+        """Latest recorded event for a job, if any."""
+        try:
+            raw = await self._client().get(state_key(job_id))
+        except RedisError:
+            return None
+        return json.loads(raw) if raw else None
+
+    def listeners(self) -> int:
+        return sum(len(v) for v in self._listeners.values())
+
+    async def close(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+# Process-wide hub (API only; workers just publish)
+hub = ProgressHub()
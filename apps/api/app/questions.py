@@ -1,27 +1,164 @@
-# role -> list of questions
-QUESTIONS: dict[str, list[dict]] = {
-    "SWE": [
-        {
-            "id": 1,
-            "text": "Tell me about a challenging bug you fixed.",
-            "key_points": [
-                "root cause analysis",
-                "debugging steps",
-                "tools used",
-                "impact",
-                "lesson learned",
-            ],
-        },
-        {
-            "id": 2,
-            "text": "Describe a system you designed.",
-            "key_points": [
-                "requirements",
-                "trade-offs",
-                "scalability",
-                "bottlenecks",
-                "monitoring",
-            ],
-        },
-    ]
-}
+# apps/api/app/questions.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
+
+import numpy as np
+from redis.exceptions import RedisError
+from sqlmodel import Session as DBSession, select
+
+from . import db as app_db  # engine looked up at call time so tests can patch it
+from .models import Question
+from .scoring import EMB_MODEL, ensure_kp_embeddings
+
+log = logging.getLogger(__name__)
+
+# Bumped on every change to the Question table; each process reloads when it moves
+VERSION_KEY = "ic:questions:version"
+# How often a process checks that version (one Redis GET); 0 checks on every access
+QUESTION_CATALOG_CHECK_S = float(os.getenv("QUESTION_CATALOG_CHECK_S", "5"))
+
+
+@dataclass(frozen=True)
+class CatalogQuestion:
+    id: int
+    role: str
+    text: str
+    key_points: tuple[str, ...]
+    # Read-only matrix from the current encoder, or None until it has been backfilled
+    kp_embeddings: np.ndarray | None
+
+    def public(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "role": self.role,
+            "text": self.text,
+            "key_points": list(self.key_points),
+        }
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int | None
+    by_id: MappingProxyType[int, CatalogQuestion]
+    by_role: MappingProxyType[str, tuple[CatalogQuestion, ...]]
+
+
+def _frozen(q: Question) -> CatalogQuestion:
+    key_points = tuple(q.key_points or [])
+    emb = None
+    if q.kp_model == EMB_MODEL and q.kp_embeddings is not None:
+        if len(q.kp_embeddings) == len(key_points):
+            emb = np.asarray(q.kp_embeddings, dtype=np.float32)
+            emb.flags.writeable = False
+    return CatalogQuestion(q.id, q.role.upper(), q.text, key_points, emb)
+
+
+class QuestionCatalog:
+    """
+    Every question, loaded from the database into one immutable snapshot
+    indexed by id and role. Writers call ``invalidate`` (a Redis version bump);
+    readers re-check that version at most every ``check_s`` and reload the
+    whole table when it has moved. Redis trouble means reloading on each check.
+    """
+
+    def __init__(self, connection: Any = None, check_s: float = QUESTION_CATALOG_CHECK_S):
+        self.connection = connection
+        self.check_s = check_s
+        self.loads = 0
+        self._snap: CatalogSnapshot | None = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _conn(self) -> Any:
+        if self.connection is None:
+            from .queues import redis
+
+            return redis
+        return self.connection
+
+    def _version(self) -> int | None:
+        try:
+            return int(self._conn().get(VERSION_KEY) or 0)
+        except RedisError:
+            log.warning("Question catalog version unavailable", exc_info=True)
+            return None
+
+    def _current(self) -> CatalogSnapshot | None:
+        """The snapshot if it is not due for a version check (read once: ``invalidate`` races)."""
+        snap = self._snap
+        return snap if snap is not None and time.monotonic() < self._next_check else None
+
+    def _refresh(self) -> CatalogSnapshot:
+        with self._lock:
+            if (snap := self._current()) is not None:
+                return snap
+            snap = self._snap
+            version = self._version()
+            if snap is None or version is None or version != snap.version:
+                snap = self._snap = self._load(version)
+            self._next_check = time.monotonic() + self.check_s
+            return snap
+
+    def _load(self, version: int | None) -> CatalogSnapshot:
+        with DBSession(app_db.engine) as s:
+            rows = [_frozen(q) for q in s.exec(select(Question).order_by(Question.id)).all()]
+        by_role: dict[str, list[CatalogQuestion]] = {}
+        for q in rows:
+            by_role.setdefault(q.role, []).append(q)
+        self.loads += 1
+        return CatalogSnapshot(
+            version,
+            MappingProxyType({q.id: q for q in rows}),
+            MappingProxyType({role: tuple(qs) for role, qs in by_role.items()}),
+        )
+
+    def snapshot(self) -> CatalogSnapshot:
+        return self._current() or self._refresh()
+
+    async def asnapshot(self) -> CatalogSnapshot:
+        """``snapshot`` for async code: checks and reloads happen off the event loop."""
+        return self._current() or await asyncio.to_thread(self._refresh)
+
+    def get(self, question_id: int | None, embedded: bool = False) -> CatalogQuestion | None:
+        """
+        A question by id. With ``embedded`` its key-point embeddings are
+        backfilled first if missing (encodes; call from a worker thread).
+        """
+        if question_id is None:
+            return None
+        q = self.snapshot().by_id.get(question_id)
+        if q is not None and embedded and q.kp_embeddings is None and q.key_points:
+            self.ensure_embeddings()
+            q = self.snapshot().by_id.get(question_id)
+        return q
+
+    def ensure_embeddings(self) -> int:
+        """Store embeddings for every question lacking current ones; returns how many."""
+        with DBSession(app_db.engine) as s:
+            changed = [q for q in s.exec(select(Question)).all() if ensure_kp_embeddings(q)]
+            s.add_all(changed)
+            s.commit()
+        if changed:
+            self.invalidate()
+        return len(changed)
+
+    def invalidate(self) -> None:
+        """Call after changing questions: every process reloads on its next check."""
+        try:
+            self._conn().incr(VERSION_KEY)
+        except RedisError:
+            log.warning("Could not bump the question catalog version", exc_info=True)
+        with self._lock:
+            self._snap = None
+
+
+# Process-wide catalog (API and worker each keep their own snapshot)
+catalog = QuestionCatalog()
@@ -0,0 +1,40 @@
+# apps/api/app/queues.py
+from __future__ import annotations
+
+import os
+
+from redis import Redis
+from rq import Queue
+
+# One Redis connection + the RQ queues shared by the API and the worker
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+redis = Redis.from_url(REDIS_URL)
+
+# The analysis pipeline runs as chained stage jobs, one queue per stage, so
+# Whisper-heavy and light workers can be sized separately (WORKER_POOLS).
+# Short recordings are transcribed on their own high-priority lane.
+TRANSCRIBE_HI_QUEUE = "ic-transcribe-hi"
+TRANSCRIBE_QUEUE = "ic-transcribe"
+SCORE_QUEUE = "ic-score"
+PERSIST_QUEUE = "ic-persist"
+PDF_QUEUE = "ic-pdf"
+# Monolithic pipeline jobs enqueued before the stage split (drained, no longer fed)
+JOBS_QUEUE = "ic-jobs"
+
+# Priority order for a worker listening to several: pipelines already under way
+# finish before new recordings are picked up, interactive ones ahead of the rest
+ALL_QUEUES = [
+    PERSIST_QUEUE,
+    SCORE_QUEUE,
+    TRANSCRIBE_HI_QUEUE,
+    TRANSCRIBE_QUEUE,
+    JOBS_QUEUE,
+    PDF_QUEUE,
+]
+
+transcribe_hi_q = Queue(TRANSCRIBE_HI_QUEUE, connection=redis, default_timeout=900)  # 15 min
+transcribe_q = Queue(TRANSCRIBE_QUEUE, connection=redis, default_timeout=900)
+score_q = Queue(SCORE_QUEUE, connection=redis, default_timeout=300)
+persist_q = Queue(PERSIST_QUEUE, connection=redis, default_timeout=120)
+pdf_q = Queue(PDF_QUEUE, connection=redis, default_timeout=120)
+jobs_q = Queue(JOBS_QUEUE, connection=redis, default_timeout=900)
@@ -1,17 +1,24 @@
+from typing import Any
+
 from fastapi import APIRouter
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
-from ..questions import QUESTIONS
+from ..questions import catalog
 from ..scoring import (
+    coverage_batch,
     coverage_score,
-    filler_stats,
     overall_score,
+    text_stats,
     tips_from_metrics,
-    words_per_minute,
+    wpm_from_words,
 )
+from ..text_stats import TextStats
 
 router = APIRouter(prefix="/analyze_text", tags=["analyze"])
 
+MAX_BATCH_ITEMS = 1000
+
 
 class AnalyzeReq(BaseModel):
     transcript: str
@@ -20,14 +27,25 @@ class AnalyzeReq(BaseModel):
     duration_s: float = 60.0
 
 
-@router.post("")
-def analyze(req: AnalyzeReq):
-    # find key points
-    role_qs = QUESTIONS.get(req.role.upper(), [])
-    kp = next((q["key_points"] for q in role_qs if q["id"] == req.question_id), [])
-    cov = coverage_score(req.transcript, kp)
-    fil = filler_stats(req.transcript)
-    pace = words_per_minute(req.transcript, req.duration_s)
+class BatchReq(BaseModel):
+    items: list[AnalyzeReq] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+async def _key_points(role: str, question_id: int | None) -> tuple[list[str], Any]:
+    """Key points (and their stored embeddings) for this role/question, from the catalog."""
+    snap = await catalog.asnapshot()
+    q = snap.by_id.get(question_id) if question_id is not None else None
+    if q is None or q.role != role.upper():
+        return [], None
+    if q.kp_embeddings is None:
+        # First use since the key points changed: encoding is CPU-bound, keep it off the loop
+        q = await run_in_threadpool(catalog.get, q.id, True)
+    return list(q.key_points), q.kp_embeddings
+
+
+def _result(req: AnalyzeReq, kp: list[str], stats: TextStats, cov: dict) -> dict:
+    fil = stats.fillers()
+    pace = wpm_from_words(stats.word_count, req.duration_s)
     tips = tips_from_metrics(cov, fil, pace, kp)
     overall = overall_score(cov, fil, pace)
     return {
@@ -39,3 +57,41 @@ def analyze(req: AnalyzeReq):
         "question_id": req.question_id,
         "role": req.role,
     }
+
+
+def _analyze_one(req: AnalyzeReq, kp: list[str], kp_emb: Any) -> dict:
+    stats = text_stats(req.transcript, req.role, kp)
+    return _result(req, kp, stats, coverage_score(req.transcript, kp, kp_emb, stats.kp_hits))
+
+
+def _analyze_many(items: list[AnalyzeReq], kps: list[tuple[list[str], Any]]) -> list[dict]:
+    stats = [text_stats(it.transcript, it.role, kp) for it, (kp, _) in zip(items, kps)]
+    covs = coverage_batch(
+        [it.transcript for it in items],
+        [kp for kp, _ in kps],
+        [emb for _, emb in kps],
+        [st.kp_hits for st in stats],
+    )
+    return [_result(it, kp, st, cov) for it, (kp, _), st, cov in zip(items, kps, stats, covs)]
+
+
+@router.post("")
+async def analyze(req: AnalyzeReq):
+    kp, kp_emb = await _key_points(req.role, req.question_id)
+    return await run_in_threadpool(_analyze_one, req, kp, kp_emb)
+
+
+@router.post("/batch")
+async def analyze_batch(req: BatchReq):
+    """
+    Score many transcripts together: one encode call for all transcripts and a
+    block similarity matrix against the union of the questions' key points.
+    """
+    lookups = {
+        key: await _key_points(*key) for key in {(it.role, it.question_id) for it in req.items}
+    }
+    kps = [lookups[(it.role, it.question_id)] for it in req.items]
+    return {
+        "count": len(req.items),
+        "results": await run_in_threadpool(_analyze_many, req.items, kps),
+    }
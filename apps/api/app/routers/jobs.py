@@ -1,68 +1,245 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
 import os
+import time
+import uuid
 from typing import Annotated
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
-from fastapi.responses import JSONResponse
-from redis import Redis
-from rq import Queue
+from fastapi import APIRouter, File, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from redis.exceptions import RedisError, WatchError
+from rq import Callback, Queue
+from rq.exceptions import NoSuchJobError
 from rq.job import Job
 
-# Optional retry support (available on some RQ versions, not on 2.4.1)
-try:
-    from rq.retry import Retry  # may not exist on your version
-except Exception:
-    Retry = None  # type: ignore[assignment]
+from .. import admission, progress, spool
+from ..metrics import UPLOAD_BYTES
+from ..queues import redis, transcribe_hi_q, transcribe_q
+from ..tasks import discard_job_blob, pipeline_failed, stage_retry, transcribe_stage
 
-from ..tasks import run_full_pipeline
+log = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-redis = Redis.from_url(REDIS_URL)
-q = Queue("ic-jobs", connection=redis, default_timeout=900)  # 15 min
-
 MAX_UPLOAD_BYTES = 50 * 1024 * 1024  # 50 MB
+# Re-submitting the same audio for a session within this window returns the original job
+ENQUEUE_DEDUPE_TTL_S = int(os.getenv("ENQUEUE_DEDUPE_TTL_S", "3600"))
+# A reservation whose job never reached RQ (the request died mid-enqueue) frees up after this
+DEDUPE_RESERVE_TTL_S = int(os.getenv("DEDUPE_RESERVE_TTL_S", "60"))
+# How long an identical submit waits for an in-flight first submit to finish enqueueing
+DEDUPE_INFLIGHT_WAIT_S = float(os.getenv("DEDUPE_INFLIGHT_WAIT_S", "2"))
+# Uploads up to this size (about a minute of browser-recorded speech) are
+# interactive: transcribed on the high-priority lane
+PRIORITY_MAX_UPLOAD_BYTES = int(os.getenv("PRIORITY_MAX_UPLOAD_BYTES", str(1024 * 1024)))
+
+
+def _lane(size: int) -> tuple[str, Queue, tuple[Queue, ...]]:
+    """Transcribe lane for an upload: (name, queue, queues its workers drain first)."""
+    if size <= PRIORITY_MAX_UPLOAD_BYTES:
+        return "hi", transcribe_hi_q, ()
+    return "normal", transcribe_q, (transcribe_hi_q,)
+
+
+def _pipeline_tail(job: Job) -> Job:
+    """The latest stage job of a pipeline (the job itself for single-stage jobs)."""
+    while next_id := (job.meta or {}).get("next"):
+        try:
+            job = Job.fetch(next_id, connection=redis)
+        except NoSuchJobError:
+            break
+    return job
+
+
+def _dedupe_key(session_id: int, sha256: str) -> str:
+    return f"ic:dedupe:{session_id}:{sha256}"
+
+
+# Dedupe key value while the owning submit has reserved its job id but not enqueued it yet
+_RESERVED = "reserved:"
+# Pipelines in these states no longer own their (session, audio) pair
+_REPLACEABLE = ("failed", "stopped", "canceled")
+
+
+def _replace(key: str, expected: str, value: str | None, ex: int = ENQUEUE_DEDUPE_TTL_S) -> bool:
+    """Set (or with ``value=None`` delete) ``key`` only if it still holds ``expected``."""
+    with redis.pipeline() as pipe:
+        try:
+            pipe.watch(key)
+            if pipe.get(key) != expected.encode():
+                return False
+            pipe.multi()
+            if value is None:
+                pipe.delete(key)
+            else:
+                pipe.set(key, value, ex=ex)
+            pipe.execute()
+            return True
+        except WatchError:
+            return False
+
+
+def _claim(session_id: int, sha256: str, job_id: str) -> str | None:
+    """
+    Reserve ``job_id`` for this (session, audio) pair. Returns the id of the
+    job that already owns it instead, if any.
+
+    A reservation that has not been confirmed yet belongs to an identical
+    submit that is still enqueueing; it is waited on briefly and its id is
+    returned either way. The pair is only taken over once the reservation
+    expires or the owning pipeline has failed, been stopped/canceled, or
+    dropped out of RQ.
+    """
+    key = _dedupe_key(session_id, sha256)
+    deadline = time.monotonic() + DEDUPE_INFLIGHT_WAIT_S
+    try:
+        while True:
+            if redis.set(key, _RESERVED + job_id, nx=True, ex=DEDUPE_RESERVE_TTL_S):
+                return None
+            raw = redis.get(key)
+            if raw is None:
+                continue  # released or expired since the SET
+            owner = raw.decode()
+            if owner.startswith(_RESERVED):
+                if time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    continue
+                return owner.removeprefix(_RESERVED)
+            try:
+                status = _pipeline_tail(Job.fetch(owner, connection=redis)).get_status()
+            except NoSuchJobError:
+                status = None  # its results have expired out of RQ
+            if status is not None and status not in _REPLACEABLE:
+                return owner
+            if _replace(key, owner, _RESERVED + job_id, ex=DEDUPE_RESERVE_TTL_S):
+                return None
+    except RedisError:
+        log.warning("Enqueue dedupe unavailable; enqueueing anyway", exc_info=True)
+    return None
+
+
+def _settle(session_id: int, sha256: str, job_id: str, enqueued: bool) -> None:
+    """Confirm a reservation once its job is enqueued, or release it if enqueueing failed."""
+    key = _dedupe_key(session_id, sha256)
+    try:
+        _replace(key, _RESERVED + job_id, job_id if enqueued else None)
+    except RedisError:
+        log.warning("Could not settle enqueue dedupe key %s", key, exc_info=True)
+
+
+def _accepted(
+    job_id: str, deduplicated: bool = False, load: admission.QueueLoad | None = None
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job_id,
+            "enqueued": True,
+            "deduplicated": deduplicated,
+            "poll_url": f"/jobs/{job_id}",
+            "events_url": f"/jobs/{job_id}/events",
+            # Rough wait before a worker starts on it (null if the queue state is unknown)
+            "estimated_wait_s": round(load.drain_s, 1) if load is not None else None,
+        },
+    )
+
+
+def _declared_size(request: Request) -> int:
+    """The upload size the client announced, or ``MAX_UPLOAD_BYTES`` when it can't be trusted."""
+    try:
+        declared = int(request.headers.get("content-length", ""))
+    except ValueError:
+        return MAX_UPLOAD_BYTES
+    return declared if declared >= 0 else MAX_UPLOAD_BYTES
+
+
+def _admit(session_id: int, declared_size: int) -> tuple[str, Queue, admission.QueueLoad | None]:
+    """
+    Pick the transcribe lane from the declared upload size and run admission
+    control on it (503/429 + Retry-After), before any of the upload is spooled.
+    """
+    lane, queue, ahead = _lane(declared_size)
+    # Backpressure: turn the job away rather than let its lane grow past what the
+    # transcribe workers can drain in bounded time
+    load = admission.check_queue(queue, *ahead)
+    admission.check_session_rate(session_id)
+    return lane, queue, load
+
+
+def _enqueue_first_stage(
+    queue: Queue, session_id: int, blob: spool.SpooledBlob, filename: str, job_id: str, lane: str
+) -> Job:
+    """Enqueue ``transcribe_stage`` under the reserved ``job_id`` and settle its dedupe key."""
+    try:
+        # First stage only; each stage enqueues the next (score, persist, optional PDF)
+        job = queue.enqueue(
+            transcribe_stage,
+            session_id,
+            blob.key,
+            filename,
+            blob.sha256,
+            job_id=job_id,
+            description=f"session:{session_id} file:{filename}",
+            meta={
+                "blob": blob.key,
+                "sha256": blob.sha256,
+                "size": blob.size,
+                "stage": "transcribe",
+                "lane": lane,
+            },
+            # Remove the blob once the job is finished or has failed for good
+            on_success=Callback(discard_job_blob),
+            on_failure=Callback(pipeline_failed),
+            # Retries resume from the last checkpointed stage (checkpoints.py)
+            retry=stage_retry(),
+        )
+    except Exception:
+        spool.discard(blob.key)
+        _settle(session_id, blob.sha256, job_id, enqueued=False)
+        raise
+    _settle(session_id, blob.sha256, job_id, enqueued=True)
+    progress.publish(job.get_id(), "queued", session_id=session_id)
+    return job
 
 
 @router.post("/enqueue")
 async def enqueue_job(
+    request: Request,
     session_id: int,
     file: Annotated[UploadFile, File(...)],
 ):
-    blob = await file.read()
-    if not blob:
-        raise HTTPException(status_code=400, detail="Empty file")
-    if len(blob) > MAX_UPLOAD_BYTES:
+    # Admission runs first so a full queue or a rate-limited session costs no spool
+    # I/O; the request's Content-Length bounds the upload (missing or malformed: assume the max)
+    declared = _declared_size(request)
+    if declared > MAX_UPLOAD_BYTES:
         raise HTTPException(
             status_code=413,
             detail=f"File too large (> {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)",
         )
+    lane, queue, load = await run_in_threadpool(_admit, session_id, declared)
 
-    enqueue_kwargs = {
-        "description": f"session:{session_id} file:{file.filename}",
-    }
-    # Add retry only if supported by this RQ version
-    if Retry is not None:
-        enqueue_kwargs["retry"] = Retry(max=3, interval=[5, 15, 60])
-
-    job = q.enqueue(
-        run_full_pipeline,
-        session_id,
-        blob,
-        file.filename or "audio.webm",
-        **enqueue_kwargs,
-    )
+    # Stream the upload into the spool; the job only carries the blob key + hash
+    blob = await spool.spool_upload(file, MAX_UPLOAD_BYTES)
+    UPLOAD_BYTES.observe(blob.size)
+    await spool.asweep()
 
-    return JSONResponse(
-        status_code=202,
-        content={
-            "job_id": job.get_id(),
-            "enqueued": True,
-            "poll_url": f"/jobs/{job.get_id()}",
-        },
+    # Idempotent per (session, audio hash): double submits reuse the first job
+    job_id = uuid.uuid4().hex
+    existing = await run_in_threadpool(_claim, session_id, blob.sha256, job_id)
+    if existing is not None:
+        spool.discard(blob.key)
+        # Only new jobs count toward the session limit
+        await run_in_threadpool(admission.refund_session_rate, session_id)
+        return _accepted(existing, deduplicated=True)
+
+    filename = file.filename or "audio.webm"
+    job = await run_in_threadpool(
+        _enqueue_first_stage, queue, session_id, blob, filename, job_id, lane
     )
+    return _accepted(job.get_id(), load=load)
 
 
 @router.get("/{job_id}")
@@ -72,17 +249,88 @@ def job_status(job_id: str):
     except Exception as e:
         raise HTTPException(status_code=404, detail="Job not found") from e
 
+    # Pipelines are reported as a whole: status and result come from the latest stage
+    tail = _pipeline_tail(job)
     payload: dict[str, object] = {
         "id": job.get_id(),
-        "status": job.get_status(),  # queued|started|deferred|finished|failed
+        "status": tail.get_status(),  # queued|started|deferred|finished|failed
+        "stage": (tail.meta or {}).get("stage"),
         "enqueued_at": getattr(job, "enqueued_at", None),
         "started_at": getattr(job, "started_at", None),
-        "ended_at": getattr(job, "ended_at", None),
+        "ended_at": getattr(tail, "ended_at", None),
         "description": getattr(job, "description", None),
-        "ttl": job.ttl,
+        "ttl": tail.ttl,
     }
-    if job.is_finished:
-        payload["result"] = job.result
-    elif job.is_failed:
-        payload["error"] = (job.exc_info or "")[-800:]
+    if tail.is_finished:
+        payload["result"] = tail.result
+    elif tail.is_failed:
+        payload["error"] = (tail.exc_info or "")[-800:]
     return payload
+
+
+# Comment line sent on idle SSE connections so proxies keep them open
+SSE_KEEPALIVE_S = 15.0
+# RQ status -> pipeline stage, for jobs that have no recorded progress yet
+_RQ_STAGES = {
+    "queued": "queued",
+    "deferred": "queued",
+    "scheduled": "queued",
+    "started": "transcribing",
+    "finished": "saved",
+    "failed": "failed",
+}
+_LATER_STAGES = ("score", "persist")
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+
+
+def _rq_snapshot(job_id: str) -> dict | None:
+    try:
+        job = Job.fetch(job_id, connection=redis)
+    except NoSuchJobError:
+        return None
+    tail = _pipeline_tail(job)
+    stage = _RQ_STAGES.get(tail.get_status(), "queued")
+    if stage in ("queued", "transcribing") and (tail.meta or {}).get("stage") in _LATER_STAGES:
+        stage = "scoring"  # transcribed; waiting for or running score/persist
+    return {"job_id": job_id, "stage": stage}
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-Sent Events stream of a job's stage transitions
+    (queued, transcribing, scoring, saved with ``analysis_id``, or failed).
+    Closes after the terminal event.
+    """
+    first = await progress.hub.snapshot(job_id)
+    if first is None:
+        first = await run_in_threadpool(_rq_snapshot, job_id)
+        if first is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        async with progress.hub.subscribe(job_id) as events:
+            # Re-read after subscribing so a transition in between is not lost
+            event = await progress.hub.snapshot(job_id) or first
+            yield _sse(event)
+            while event["stage"] not in progress.TERMINAL_STAGES:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=SSE_KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    # Events published while the hub was (re)subscribing never arrive;
+                    # the recorded state still has them
+                    latest = await progress.hub.snapshot(job_id)
+                    if latest is None or latest.get("at") == event.get("at"):
+                        yield ": keep-alive\n\n"
+                        continue
+                    event = latest
+                yield _sse(event)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
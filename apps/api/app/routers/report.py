@@ -3,27 +3,21 @@ from __future__ import annotations
 
 from fastapi import APIRouter, HTTPException
 from sqlalchemy.exc import OperationalError
-from sqlmodel import Session as DBSession, select
 
 from .. import db as app_db
-from ..models import Analysis
 
 router = APIRouter(prefix="/report", tags=["report"])
 
 
 @router.get("/{session_id}")
-def get_report(session_id: int):
+async def get_report(session_id: int):
     """
     Return the latest analysis JSON for a session.
-    Uses app_db.engine at call time so tests can patch it.
+    Uses app_db.async_engine at call time so tests can patch it.
     """
     try:
-        with DBSession(app_db.engine) as db:
-            row = db.exec(
-                select(Analysis)
-                .where(Analysis.session_id == session_id)
-                .order_by(Analysis.created_at.desc())
-            ).first()
+        async with app_db.async_session() as db:
+            row = await db.run_sync(app_db.latest_analysis, session_id)
     except OperationalError as e:
         # In a fresh SQLite test DB, the table may not exist yet
         raise HTTPException(status_code=404, detail="No analysis for session") from e
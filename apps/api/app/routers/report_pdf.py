@@ -1,22 +1,27 @@
 # apps/api/app/routers/report_pdf.py
 from __future__ import annotations
 
+import hashlib
 import io
 import os
 from datetime import UTC
 from pathlib import Path
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from jinja2 import Environment, FileSystemLoader, select_autoescape
-from pyppeteer import launch
-from sqlmodel import Session as DBSession, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from ..db import get_session
+from .. import browser_pool, pdf_cache
+from ..db import get_session, latest_analysis
+from ..metrics import timed
 from ..models import Analysis
+from ..tasks import enqueue_report_pdf
 
 router = APIRouter(prefix="/report", tags=["report"])
+pool_router = APIRouter(prefix="/pdf", tags=["report"])
 
 # Resolve templates dir relative to this file: app/templates
 TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
@@ -24,91 +29,59 @@ env = Environment(
     loader=FileSystemLoader(str(TEMPLATES_DIR)),
     autoescape=select_autoescape(),
 )
+# "inline": render in the API process on a cache miss
+# "worker": never render in the API; enqueue on the PDF queue and answer 202 + poll URL
+PDF_RENDER_MODE = os.getenv("PDF_RENDER_MODE", "inline")
+# Part of the PDF cache key: editing the template invalidates every cached report
+TEMPLATE_HASH = hashlib.sha256((TEMPLATES_DIR / "report.html").read_bytes()).hexdigest()[:16]
 
 
 async def html_to_pdf(html: str) -> bytes:
     """
-    Render HTML to PDF using headless Chromium via pyppeteer.
+    Render HTML to PDF on a page borrowed from the shared headless Chromium pool.
     - No 'waitUntil' (pyppeteer Page.setContent doesn't support it)
     - Best-effort emulate screen media
-    - Extra args for containers (no sandbox / dev-shm usage)
+    - The browser stays up between requests; see browser_pool.BrowserPool
     """
-    executable_path = os.getenv("CHROMIUM_PATH")  # let pyppeteer download if None
-
-    browser = None
     try:
-        browser = await launch(
-            executablePath=executable_path,
-            headless=True,
-            args=[
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-dev-shm-usage",
-            ],
-        )
-        page = await browser.newPage()
-        await page.setContent(html)
-
-        try:
-            await page.emulateMedia("screen")  # type: ignore[attr-defined]
-        except Exception:
-            pass
-
-        try:
-            await page.waitForTimeout(120)
-        except Exception:
-            pass
-
-        pdf_bytes = await page.pdf(
-            {
-                "format": "A4",
-                "printBackground": True,
-                "margin": {
-                    "top": "20px",
-                    "bottom": "20px",
-                    "left": "12mm",
-                    "right": "12mm",
-                },
-            }
-        )
-        return pdf_bytes
+        with timed("pdf_render"):
+            async with browser_pool.pool.page() as page:
+                await page.setContent(html)
+
+                try:
+                    await page.emulateMedia("screen")  # type: ignore[attr-defined]
+                except Exception:
+                    pass
+
+                try:
+                    await page.waitForTimeout(120)
+                except Exception:
+                    pass
+
+                pdf_bytes = await page.pdf(
+                    {
+                        "format": "A4",
+                        "printBackground": True,
+                        "margin": {
+                            "top": "20px",
+                            "bottom": "20px",
+                            "left": "12mm",
+                            "right": "12mm",
+                        },
+                    }
+                )
+                return pdf_bytes
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF render failed: {e}") from e
-    finally:
-        if browser:
-            try:
-                await browser.close()
-            except Exception:
-                pass
-
-
-@router.get(
-    "/{session_id}/pdf",
-    response_class=StreamingResponse,
-    responses={200: {"content": {"application/pdf": {}}, "description": "PDF file"}},
-)
-async def report_pdf(
-    session_id: int,
-    db: Annotated[DBSession, Depends(get_session)],
-):
-    """
-    Generate a PDF report for the latest Analysis of a session.
-    """
-    row = db.exec(
-        select(Analysis)
-        .where(Analysis.session_id == session_id)
-        .order_by(Analysis.created_at.desc())
-    ).first()
 
-    if not row:
-        raise HTTPException(status_code=404, detail="No analysis for session")
 
+def render_report_html(row: Analysis, session_id: int) -> str:
     m = row.metrics or {}
     coverage = m.get("coverage") or {}
     filler = m.get("filler") or {}
     tips = m.get("tips") or []
 
-    html = env.get_template("report.html").render(
+    return env.get_template("report.html").render(
         session_id=session_id,
         created_at=row.created_at.isoformat(),
         overall=m.get("overall", 0),
@@ -120,7 +93,78 @@ async def report_pdf(
         tips=tips,
     )
 
-    pdf = await html_to_pdf(html)
+
+async def _latest_analysis(db: AsyncSession, session_id: int) -> Analysis:
+    row = await db.run_sync(latest_analysis, session_id)
+    # Hand the connection back to the pool before any (slow) render
+    await db.close()
+    if not row:
+        raise HTTPException(status_code=404, detail="No analysis for session")
+    return row
+
+
+async def _enqueued(row: Analysis, session_id: int) -> JSONResponse:
+    job = await run_in_threadpool(enqueue_report_pdf, row.id, session_id)
+    poll_url = f"/jobs/{job.get_id()}"
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job.get_id(),
+            "enqueued": True,
+            "poll_url": poll_url,
+            "pdf_url": f"/report/{session_id}/pdf",
+        },
+        headers={"Location": poll_url, "Retry-After": "2"},
+    )
+
+
+@router.post("/{session_id}/pdf/render")
+async def render_pdf(
+    session_id: int,
+    db: Annotated[AsyncSession, Depends(get_session)],
+):
+    """
+    Ask the worker to render the PDF for the latest Analysis of a session.
+    Returns 200 with the download URL if it is already stored, else 202 + poll URL.
+    """
+    row = await _latest_analysis(db, session_id)
+    key = pdf_cache.cache.key(row.id, TEMPLATE_HASH)
+    if await run_in_threadpool(pdf_cache.cache.get, key) is not None:
+        return {"ready": True, "pdf_url": f"/report/{session_id}/pdf"}
+    return await _enqueued(row, session_id)
+
+
+@router.get(
+    "/{session_id}/pdf",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/pdf": {}}, "description": "PDF file"}},
+)
+async def report_pdf(
+    session_id: int,
+    db: Annotated[AsyncSession, Depends(get_session)],
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    """
+    Generate a PDF report for the latest Analysis of a session.
+    Rendered PDFs are cached on disk per (analysis, template) and carry an ETag.
+    In worker mode a cache miss is rendered by the RQ worker (202 + poll URL).
+    """
+    row = await _latest_analysis(db, session_id)
+
+    key = pdf_cache.cache.key(row.id, TEMPLATE_HASH)
+    etag = f'"{key}"'
+    if if_none_match and {etag, "*"} & {t.strip() for t in if_none_match.split(",")}:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if PDF_RENDER_MODE == "worker":
+        pdf = await run_in_threadpool(pdf_cache.cache.get, key)
+        if pdf is None:
+            return await _enqueued(row, session_id)
+    else:
+        # Concurrent downloads of the same report share one render
+        pdf = await pdf_cache.cache.get_or_render(
+            key, lambda: html_to_pdf(render_report_html(row, session_id))
+        )
 
     # Ensure timestamp is timezone-aware (treat naive as UTC)
     ts_dt = row.created_at
@@ -132,5 +176,20 @@ async def report_pdf(
     return StreamingResponse(
         io.BytesIO(pdf),
         media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "ETag": etag,
+            # Same URL serves a newer analysis later, so revalidate via ETag
+            "Cache-Control": "private, no-cache",
+        },
     )
+
+
+@pool_router.get("/pool")
+def pdf_pool_stats():
+    """PDF metrics: browser pool (in-flight/waiting, launches, recycles, failures) and cache."""
+    return {
+        **browser_pool.pool.stats(),
+        "cache_hits": pdf_cache.cache.hits,
+        "cache_misses": pdf_cache.cache.misses,
+    }
@@ -5,12 +5,12 @@ from typing import Any, Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from sqlmodel import Session as DBSession
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..db import get_session
+from ..db import add_analysis, get_session
 from ..models import Analysis as AnalysisModel
-from ..models import Question
 from ..models import Session as SessionModel
+from ..questions import catalog
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
@@ -21,21 +21,20 @@ class StartReq(BaseModel):
 
 
 @router.post("", response_model=dict)
-def start_session(
+async def start_session(
     req: StartReq,
-    s: Annotated[DBSession, Depends(get_session)],
+    s: Annotated[AsyncSession, Depends(get_session)],
 ):
     """
     Create a new interview session for a given role & question.
     """
     # Ensure the question exists
-    if not s.get(Question, req.question_id):
+    if (await catalog.asnapshot()).by_id.get(req.question_id) is None:
         raise HTTPException(status_code=400, detail="invalid question_id")
 
     sess = SessionModel(role=req.role, question_id=req.question_id)
     s.add(sess)
-    s.commit()
-    s.refresh(sess)
+    await s.commit()
     return {"session_id": sess.id}
 
 
@@ -47,14 +46,14 @@ class SaveReq(BaseModel):
 
 
 @router.post("/save", response_model=dict)
-def save_analysis(
+async def save_analysis(
     req: SaveReq,
-    s: Annotated[DBSession, Depends(get_session)],
+    s: Annotated[AsyncSession, Depends(get_session)],
 ):
     """
     Persist an analysis row and update session duration.
     """
-    sess = s.get(SessionModel, req.session_id)
+    sess = await s.get(SessionModel, req.session_id)
     if not sess:
         raise HTTPException(status_code=404, detail="session not found")
 
@@ -62,14 +61,13 @@ def save_analysis(
     sess.duration_s = req.duration_s
     s.add(sess)
 
-    # Save analysis
+    # Save analysis (and move the session's latest-analysis pointer with it)
     ana = AnalysisModel(
         session_id=req.session_id,
         transcript=req.transcript,
         metrics=req.metrics,
     )
-    s.add(ana)
-    s.commit()
-    s.refresh(ana)
+    await s.run_sync(add_analysis, ana)
+    await s.commit()
 
     return {"analysis_id": ana.id}
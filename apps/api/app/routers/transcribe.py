@@ -1,86 +1,330 @@
 # apps/api/app/routers/transcribe.py
 from __future__ import annotations
 
+import io
+import mmap
 import os
-import tempfile
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated, Any, BinaryIO
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
-from faster_whisper import WhisperModel
+import numpy as np
+from fastapi import (
+    APIRouter,
+    File,
+    HTTPException,
+    Response,
+    UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
+)
+
+from ..inference_pool import stream_pool, stream_sessions, transcribe_pool
+from ..model_registry import registry
+from ..scoring import IncrementalAnalyzer
+from ..streaming import RollingTranscriber
+from .analyze_text import _key_points
+
+if TYPE_CHECKING:
+    from faster_whisper import WhisperModel
 
 router = APIRouter(prefix="/transcribe", tags=["transcribe"])
 
-# Load once per process (API & worker each keep their own)
+
+# CTranslate2 intra-op threads; batched decoding of long recordings spreads across all of them
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", str(os.cpu_count() or 4)))
+# Recordings longer than this are split on silence (VAD) and decoded as a batch of chunks
+TRANSCRIBE_LONG_AUDIO_S = float(os.getenv("TRANSCRIBE_LONG_AUDIO_S", "180"))
+# Chunks (<= 30 s each) decoded together per model call
+TRANSCRIBE_BATCH_SIZE = int(os.getenv("TRANSCRIBE_BATCH_SIZE", "8"))
+
+
 # Keep your choices: "small" + int8
-_model: WhisperModel | None = None
+WHISPER_MODEL = "small"
+WHISPER_COMPUTE_TYPE = "int8"
+# Everything that changes a transcript for the same audio (part of the transcript cache key)
+TRANSCRIBE_SIGNATURE = f"{WHISPER_MODEL}-{WHISPER_COMPUTE_TYPE}-vad"
+
+
+# Loaded lazily once per process via the model registry (API & worker each keep their own)
+def _load_whisper() -> WhisperModel:
+    from faster_whisper import WhisperModel
+
+    return WhisperModel(
+        WHISPER_MODEL, compute_type=WHISPER_COMPUTE_TYPE, cpu_threads=WHISPER_CPU_THREADS
+    )
+
+
+registry.register("whisper", _load_whisper)
 
 
 def _get_model() -> WhisperModel:
-    global _model
-    if _model is None:
-        _model = WhisperModel("small", compute_type="int8")
-    return _model
+    return registry.get("whisper")
+
+
+# Whisper works on 16 kHz mono float32
+SAMPLE_RATE = 16000
+
+
+def decode_audio(source: str | BinaryIO) -> np.ndarray:
+    """
+    Decode any container/codec PyAV understands into a 16 kHz float32 array.
+    ``source`` may be a path or any seekable file-like object (BytesIO, mmap).
+    """
+    from faster_whisper.audio import decode_audio as _fw_decode
+
+    return _fw_decode(source, sampling_rate=SAMPLE_RATE)
+
+
+def _batched_pipeline(model: WhisperModel) -> Any:
+    # Thin wrapper around the shared model (no extra weights), so it is built per call
+    from faster_whisper import BatchedInferencePipeline
+
+    return BatchedInferencePipeline(model=model)
+
+
+def transcribe_segments(
+    audio: np.ndarray, chunked: bool | None = None
+) -> tuple[str, list[dict[str, Any]]]:
+    """
+    Transcribe decoded samples into (language, segments) with absolute timestamps.
+
+    Long recordings (``chunked`` unset and longer than ``TRANSCRIBE_LONG_AUDIO_S``)
+    are cut at silences by VAD and the chunks decoded in batches, so latency
+    follows core count rather than audio length. Segments come back in time order.
+    """
+    model = _get_model()
+    if chunked is None:
+        chunked = len(audio) / SAMPLE_RATE > TRANSCRIBE_LONG_AUDIO_S
+    if chunked:
+        segments, info = _batched_pipeline(model).transcribe(
+            audio, batch_size=TRANSCRIBE_BATCH_SIZE, vad_filter=True
+        )
+    else:
+        segments, info = model.transcribe(audio, vad_filter=True)
+    out = [
+        {"start": round(seg.start, 2), "end": round(seg.end, 2), "text": seg.text.strip()}
+        for seg in segments
+    ]
+    out.sort(key=lambda seg: seg["start"])
+    return info.language, out
+
+
+# Whisper decodes audio in 30 s windows
+WINDOW_S = 30
+
+
+def _speech_chunks(audio: np.ndarray) -> list[np.ndarray]:
+    """Silence-aligned (VAD) pieces of one recording, each at most one window long."""
+    from faster_whisper.vad import VadOptions, collect_chunks, get_speech_timestamps
+
+    spans = get_speech_timestamps(
+        audio, VadOptions(max_speech_duration_s=WINDOW_S, min_silence_duration_ms=160)
+    )
+    if not spans:
+        return []
+    chunks, _ = collect_chunks(audio, spans, max_duration=WINDOW_S)
+    return [c for c in chunks if len(c)]
+
+
+def _detect_language(model: WhisperModel, chunk: np.ndarray) -> str:
+    # Same evidence Whisper uses on its own: the first window of speech
+    language, _, _ = model.detect_language(chunk)
+    return language
+
+
+def transcribe_many(audios: list[np.ndarray]) -> list[tuple[str | None, float, str]]:
+    """
+    Transcribe several recordings with shared batched Whisper calls; returns
+    (language, duration, text) per recording, in input order.
+
+    Every VAD chunk is zero-padded into its own 30 s slot of one buffer and
+    handed to the batched pipeline as an explicit clip, so chunks from all
+    recordings fill the same batches while no window ever mixes two of them.
+    Language is detected per recording (on its first chunk) and each language
+    gets its own batched call, so every recording is decoded as it would be alone.
+    """
+    model = _get_model()
+    chunks = [_speech_chunks(audio) for audio in audios]
+    languages = [_detect_language(model, c[0]) if c else None for c in chunks]
+
+    texts: list[list[str]] = [[] for _ in audios]
+    for language in dict.fromkeys(lang for lang in languages if lang is not None):
+        owners: list[int] = []
+        pieces: list[np.ndarray] = []
+        for i in (i for i, lang in enumerate(languages) if lang == language):
+            for chunk in chunks[i]:
+                piece = np.zeros(WINDOW_S * SAMPLE_RATE, dtype=np.float32)
+                piece[: len(chunk)] = chunk[: len(piece)]
+                pieces.append(piece)
+                owners.append(i)
+        clips = [{"start": k * WINDOW_S, "end": (k + 1) * WINDOW_S} for k in range(len(pieces))]
+        segments, _ = _batched_pipeline(model).transcribe(
+            np.concatenate(pieces),
+            batch_size=TRANSCRIBE_BATCH_SIZE,
+            clip_timestamps=clips,
+            language=language,
+        )
+        for seg in sorted(segments, key=lambda seg: seg.start):
+            slot = min(int((seg.start + 1e-3) // WINDOW_S), len(pieces) - 1)
+            if seg.text.strip():
+                texts[owners[slot]].append(seg.text.strip())
+    return [
+        (language, len(audio) / SAMPLE_RATE, " ".join(parts))
+        for audio, language, parts in zip(audios, languages, texts)
+    ]
+
+
+def join_segments(segments: list[dict[str, Any]]) -> str:
+    return " ".join(seg["text"] for seg in segments if seg["text"]).strip()
+
+
+def transcribe_audio(audio: np.ndarray) -> tuple[str, float, str]:
+    """
+    Given decoded samples, return (language, duration, text).
+    """
+    language, segments = transcribe_segments(audio)
+    return language, len(audio) / SAMPLE_RATE, join_segments(segments)
 
 
 def _transcribe_path(path: str) -> tuple[str, float, str]:
     """
     Internal helper: given a filesystem path, return (language, duration, text).
+    The file is memory-mapped and decoded in place (no copy into Python bytes).
     """
-    model = _get_model()
-    segments, info = model.transcribe(path, vad_filter=True)
-    text = " ".join(seg.text.strip() for seg in segments).strip()
-    return info.language, float(info.duration or 0.0), text
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return transcribe_buffer(mm)
 
 
-def transcribe_bytes(data: bytes, filename: str | None = None) -> str:
+def transcribe_buffer(buf: BinaryIO | mmap.mmap) -> tuple[str, float, str]:
+    """Transcribe from an in-memory buffer; returns (language, duration, text)."""
+    return transcribe_audio(decode_audio(buf))
+
+
+def transcribe_bytes(data: bytes, filename: str | None = None) -> tuple[str, float, str]:
     """
-    Public helper for background jobs: transcribe raw audio bytes to text.
-    Writes to a temp file (keeps parity with your current path-based call).
+    Public helper for background jobs: transcribe raw audio bytes.
+    Decodes straight from memory (no temp file); returns (language, duration, text).
+    ``filename`` is accepted for API compatibility; the container is sniffed.
     """
-    suffix = os.path.splitext(filename or "")[-1] or ".webm"
-    tmp = None
-    try:
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        tmp.write(data)
-        tmp.flush()
-        tmp.close()
-        _lang, _dur, text = _transcribe_path(tmp.name)
-        return text
-    finally:
-        if tmp is not None:
-            try:
-                os.remove(tmp.name)
-            except OSError:
-                pass
+    return transcribe_buffer(io.BytesIO(data))
+
+
+def _transcribe_upload(payload: bytes) -> dict[str, Any]:
+    # Decode straight from the uploaded bytes (no temp file round trip)
+    audio = decode_audio(io.BytesIO(payload))
+    language, segments = transcribe_segments(audio)
+    return {
+        "language": language,
+        "duration": len(audio) / SAMPLE_RATE,
+        "transcript": join_segments(segments),
+        "segments": segments,
+    }
 
 
 @router.post("/")
 async def transcribe(
     file: Annotated[UploadFile, File(...)],
+    response: Response,
 ):
     try:
         payload = await file.read()
         if not payload:
             raise HTTPException(status_code=400, detail="Empty file")
 
-        # Reuse the same temp-file path flow to keep behavior identical
-        suffix = os.path.splitext(file.filename or "")[-1] or ".webm"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(payload)
-            path = tmp.name
-
-        try:
-            language, duration, text = _transcribe_path(path)
-        finally:
-            try:
-                os.remove(path)
-            except OSError:
-                pass
-
-        return {"language": language, "duration": duration, "transcript": text}
+        # Decoding and Whisper block for seconds: run them on the bounded transcription
+        # pool (429/503 + Retry-After when it is saturated) so the event loop stays free
+        result, waited = await transcribe_pool.run(_transcribe_upload, payload)
+        wait_ms = round(waited * 1000, 1)
+        response.headers["X-Queue-Wait-Ms"] = str(wait_ms)
+        return {**result, "queue_wait_ms": wait_ms}
     except HTTPException as e:
         # Preserve original HTTPExceptions
         raise e
     except Exception as e:
         # Chain to make debugging clearer (ruff B904)
         raise HTTPException(status_code=500, detail=f"Transcription failed: {e}") from e
+
+
+async def _stream_analyzer(role: str, question_id: int | None) -> IncrementalAnalyzer | None:
+    if question_id is None:
+        return None
+    kp, kp_emb = await _key_points(role, question_id)
+    return IncrementalAnalyzer(role, kp, kp_emb)
+
+
+def _advance(
+    rt: RollingTranscriber, analyzer: IncrementalAnalyzer | None, final: bool
+) -> tuple[list[dict[str, Any]], dict | None]:
+    """One transcription pass; new segments are scored incrementally (no re-analysis)."""
+    segs = rt.finish() if final else rt.step_window()
+    metrics = None
+    if analyzer is not None and (segs or final):
+        end = rt.duration if final else segs[-1]["end"]
+        metrics = analyzer.update([seg["text"] for seg in segs], end)
+    return segs, metrics
+
+
+@router.websocket("/stream")
+async def transcribe_stream(ws: WebSocket, role: str = "SWE", question_id: int | None = None):
+    """
+    Live transcription while the user is still talking.
+
+    The client sends binary frames of 16 kHz mono PCM16 (little-endian) and a
+    text frame ``stop`` when recording ends. The server pushes
+    ``{"type": "segment", start, end, text}`` for every finalized segment and,
+    after ``stop``, one ``{"type": "final", ...}`` message before closing.
+    With ``question_id`` set, a ``{"type": "metrics", ...}`` provisional score
+    follows each batch of segments and the final message carries the analysis.
+    """
+    await ws.accept()
+    if not stream_sessions.try_enter():
+        # 1013 = try again later
+        await ws.send_json({"type": "error", "detail": "Too many live transcriptions"})
+        await ws.close(code=1013)
+        return
+    rt = RollingTranscriber(lambda audio: transcribe_segments(audio, chunked=False))
+    try:
+        analyzer = await _stream_analyzer(role, question_id)
+        while True:
+            msg = await ws.receive()
+            if msg["type"] == "websocket.disconnect":
+                return
+            if msg.get("bytes"):
+                rt.feed_pcm16(msg["bytes"])
+                if rt.ready():
+                    (segs, metrics), _ = await stream_pool.run(
+                        _advance, rt, analyzer, False, queue=False
+                    )
+                    for seg in segs:
+                        await ws.send_json({"type": "segment", **seg})
+                    if metrics is not None:
+                        await ws.send_json({"type": "metrics", **metrics})
+            elif (msg.get("text") or "").strip().lower() == "stop":
+                break
+
+        (segs, metrics), _ = await stream_pool.run(_advance, rt, analyzer, True, queue=False)
+        for seg in segs:
+            await ws.send_json({"type": "segment", **seg})
+        await ws.send_json(
+            {
+                "type": "final",
+                "language": rt.language,
+                "duration": rt.duration,
+                "transcript": rt.transcript(),
+                "segments": rt.segments,
+                "analysis": metrics,
+            }
+        )
+        await ws.close()
+    except WebSocketDisconnect:
+        return
+    except Exception as e:
+        await ws.send_json({"type": "error", "detail": f"Transcription failed: {e}"})
+        await ws.close(code=1011)
+    finally:
+        stream_sessions.leave()
+
+
+@router.get("/pool")
+def transcribe_pool_stats():
+    """Transcription slots: running/waiting calls, average call time and rejections."""
+    return transcribe_pool.stats()
@@ -1,14 +1,36 @@
 # apps/api/app/scoring.py
 from __future__ import annotations
 
+import json
 import math
-import re
+import os
+from typing import Any
 
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
 
-# ---- One-time model load per process (API / worker will each keep their own) ----
-EMB = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+from .metrics import timed
+from .model_registry import registry
+from .text_stats import TextScanner, TextStats, scan_text
+
+# ---- Lazy model load per process (API / worker will each keep their own) ----
+EMB_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def _load_emb():
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(EMB_MODEL)
+
+
+registry.register("sbert", _load_emb)
+
+
+def __getattr__(name: str):
+    # Keep `scoring.EMB` working without loading the encoder at import time
+    if name == "EMB":
+        return registry.get("sbert")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # ---- Heuristics ----
 FILLERS = {
@@ -23,6 +45,19 @@ FILLERS = {
     "literally",
 }
 
+
+def _load_role_fillers() -> dict[str, set[str]]:
+    # Optional JSON file mapping role -> filler phrases, e.g. {"PM": ["um", "like", "so yeah"]}
+    path = os.getenv("FILLER_LEXICONS")
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return {role.upper(): set(words) for role, words in json.load(f).items()}
+
+
+# Per-role filler lexicons; roles not listed here use FILLERS
+ROLE_FILLERS: dict[str, set[str]] = _load_role_fillers()
+
 # Optional: prioritize which key points matter most when crafting tips
 IMPORTANCE = {
     "impact": 3,
@@ -33,31 +68,96 @@ IMPORTANCE = {
 }
 
 
+# -------------------- Key-point embeddings --------------------
+def _encode(texts: list[str], timings: dict[str, float] | None = None) -> np.ndarray:
+    """
+    Sentence-BERT embeddings (one row per text); every encode goes through here.
+    ``timings`` gets the encode time added as ``embed`` (a job's stage breakdown).
+    """
+    with timed("embed", timings):
+        return registry.get("sbert").encode(texts, convert_to_numpy=True)
+
+
+def encode_key_points(key_points: list[str]) -> list[list[float]]:
+    """Encode key points into a JSON-friendly matrix (one row per key point)."""
+    if not key_points:
+        return []
+    return _encode(key_points).astype(float).tolist()
+
+
+def ensure_kp_embeddings(question: Any) -> bool:
+    """
+    Make sure a Question row carries embeddings for its current key points,
+    produced by the current encoder. Returns True if the row was (re)computed
+    and needs to be persisted by the caller.
+    """
+    key_points = question.key_points or []
+    if (
+        question.kp_model == EMB_MODEL
+        and question.kp_embeddings is not None
+        and len(question.kp_embeddings) == len(key_points)
+    ):
+        return False
+    question.kp_embeddings = encode_key_points(key_points)
+    question.kp_model = EMB_MODEL
+    return True
+
+
+def _cos_sims(emb_t: np.ndarray, emb_k: np.ndarray) -> np.ndarray:
+    """Cosine similarity of one vector against each row of a matrix."""
+    denom = np.linalg.norm(emb_k, axis=1) * np.linalg.norm(emb_t)
+    return (emb_k @ emb_t) / np.maximum(denom, 1e-12)
+
+
+def _unit_rows(m: Any) -> np.ndarray:
+    """L2-normalize each row so dot products are cosine similarities."""
+    m = np.asarray(m, dtype=np.float32)
+    return m / np.maximum(np.linalg.norm(m, axis=1, keepdims=True), 1e-12)
+
+
 # -------------------- Metrics --------------------
+def fillers_for(role: str | None = None) -> tuple[str, ...]:
+    """Filler lexicon for a role (sorted so it doubles as a stable cache key)."""
+    return tuple(sorted(ROLE_FILLERS.get((role or "").upper(), FILLERS)))
+
+
+def text_stats(transcript: str, role: str | None, key_points: list[str]) -> TextStats:
+    """Word count, filler counts and key-point phrase hits from one tokenizer pass."""
+    return scan_text(transcript, fillers_for(role), tuple(key_points))
+
+
+def wpm_from_words(words: int, duration_s: float) -> float:
+    """Words per minute from an already-computed word count."""
+    return 0.0 if duration_s <= 0 else (words / (duration_s / 60.0))
+
+
 def words_per_minute(text: str, duration_s: float) -> float:
     """Compute words per minute from transcript length and audio duration."""
-    w = len(text.split())
-    return 0.0 if duration_s <= 0 else (w / (duration_s / 60.0))
+    return wpm_from_words(len(text.split()), duration_s)
 
 
-def filler_stats(text: str) -> dict:
+def filler_stats(text: str, role: str | None = None) -> dict:
     """Count common filler words/phrases (case-insensitive, phrase-aware)."""
-    lower = text.lower()
-    counts = {}
-    for f in FILLERS:
-        # word-boundary around the whole phrase (handles multi-word fillers)
-        pattern = rf"\b{re.escape(f)}\b"
-        counts[f] = len(re.findall(pattern, lower))
-    return {"counts": counts, "total": int(sum(counts.values()))}
+    return scan_text(text, fillers_for(role)).fillers()
 
 
-def coverage_score(transcript: str, key_points: list[str]) -> dict:
+def coverage_score(
+    transcript: str,
+    key_points: list[str],
+    kp_embeddings: list[list[float]] | np.ndarray | None = None,
+    hits: list[bool] | None = None,
+    timings: dict[str, float] | None = None,
+) -> dict:
     """
     Score how well the transcript covers the provided key_points by combining:
       - Substring hits (exact-ish phrase presence, case-insensitive)
       - Embedding similarity (Sentence-BERT) with a lenient threshold
       - Robust aggregate: 60% hit-rate + 40% top-K similarity mean
 
+    Pass the Question's stored ``kp_embeddings`` to skip re-encoding the key points,
+    and ``hits`` (from ``text_stats``) to reuse an existing tokenizer pass.
+    Encode time is added to ``timings`` (as ``embed``) if given.
+
     Returns:
       {
         "matched": [list of key_points recognized],
@@ -67,48 +167,106 @@ def coverage_score(transcript: str, key_points: list[str]) -> dict:
     if not key_points or not transcript.strip():
         return {"matched": [], "score": 0.0}
 
-    # Normalize text/phrases
-    t_norm = transcript.lower()
-    kp_norm = [kp.lower() for kp in key_points]
-
-    # 1) Substring (exact-ish) matches first
-    substring_matched = set()
-    for kp in kp_norm:
-        # Simple contiguous substring check (robust to basic punctuation/spacing)
-        if kp in t_norm:
-            substring_matched.add(kp)
+    # 1) Phrase (exact-ish) matches first
+    hit_mask = np.array(_phrase_hits(transcript, key_points) if hits is None else hits, bool)
 
     # 2) Embedding similarity as fallback/confirmation
-    emb_t = EMB.encode([transcript], convert_to_tensor=True)
-    emb_k = EMB.encode(key_points, convert_to_tensor=True)
-    sims = util.cos_sim(emb_t, emb_k).cpu().numpy()[0]  # shape: (len(key_points),)
+    emb_t = _encode([transcript], timings)[0]
+    if kp_embeddings is None or len(kp_embeddings) != len(key_points):
+        kp_embeddings = _encode(key_points, timings)
+    emb_k = np.asarray(kp_embeddings, dtype=np.float32)
+    sims = _cos_sims(emb_t, emb_k)  # shape: (len(key_points),)
+
+    return _coverage_block(sims[None, :], hit_mask[None, :], key_points)[0]
 
+
+def _phrase_hits(transcript: str, key_points: list[str]) -> list[bool]:
+    """Which key points appear as phrases in the transcript (case/punctuation-insensitive)."""
+    return scan_text(transcript, (), tuple(key_points)).kp_hits
+
+
+def _coverage_block(sims: np.ndarray, hits: np.ndarray, key_points: list[str]) -> list[dict]:
+    """
+    Vectorized coverage aggregate for a block of transcripts sharing the same key points.
+    ``sims`` and ``hits`` have shape (n_transcripts, len(key_points)).
+    """
     # Slightly relaxed threshold to avoid being overly stingy
     THRESH = 0.30
 
-    # Build list of (original_kp, sim, matched_bool) with small boost for substring hits
-    scored = []
-    for kp_raw, kp_lower, s in zip(key_points, kp_norm, sims, strict=False):
-        s = float(s)
-        substring_hit = kp_lower in substring_matched
-        matched = substring_hit or (s >= THRESH)
-        if substring_hit:
-            # Floor-boost similarity when the exact phrase appears in transcript
-            s = max(s, 0.80)
-        scored.append((kp_raw, s, matched))
-
-    matched = [kp for kp, s, m in scored if m]
+    matched = hits | (sims >= THRESH)
+    # Floor-boost similarity when the exact phrase appears in transcript
+    boosted = np.where(hits, np.maximum(sims, 0.80), sims)
 
     # Robust aggregate:
     n = len(key_points)
-    hit_rate = len(matched) / n
+    hit_rate = matched.sum(axis=1) / n
 
     # Top-K mean similarity (K ≈ 60% of N; at least 1)
     K = max(1, math.ceil(0.6 * n))
-    topk_mean = float(np.mean(sorted([s for _, s, _ in scored], reverse=True)[:K]))
+    topk_mean = -np.sort(-boosted, axis=1)[:, :K].mean(axis=1)
+
+    scores = np.round(0.6 * hit_rate + 0.4 * np.clip(topk_mean, 0, 1), 3)
+    return [
+        {"matched": [kp for kp, m in zip(key_points, row) if m], "score": float(score)}
+        for row, score in zip(matched, scores)
+    ]
+
+
+def coverage_batch(
+    transcripts: list[str],
+    key_point_lists: list[list[str]],
+    kp_embedding_lists: list[list[list[float]] | np.ndarray | None] | None = None,
+    hits_list: list[list[bool]] | None = None,
+) -> list[dict]:
+    """
+    Batched ``coverage_score`` for many (transcript, key_points) pairs.
+
+    All transcripts are encoded in one call and compared against the union of
+    distinct key-point sets with a single similarity matrix; the per-item
+    aggregates are then computed block by block (one block per key-point set).
+    """
+    n_items = len(transcripts)
+    results: list[dict] = [{"matched": [], "score": 0.0} for _ in range(n_items)]
+    if kp_embedding_lists is None:
+        kp_embedding_lists = [None] * n_items
 
-    score = round(0.6 * hit_rate + 0.4 * np.clip(topk_mean, 0, 1), 3)
-    return {"matched": matched, "score": score}
+    # Group scorable items by their key-point set
+    groups: dict[tuple[str, ...], list[int]] = {}
+    for i, (t, kps) in enumerate(zip(transcripts, key_point_lists)):
+        if kps and t.strip():
+            groups.setdefault(tuple(kps), []).append(i)
+    if not groups:
+        return results
+
+    rows = sorted(i for idx in groups.values() for i in idx)
+    row_of = {i: r for r, i in enumerate(rows)}
+    T = _unit_rows(_encode([transcripts[i] for i in rows]))
+
+    # Union of key-point matrices, remembering each group's column slice
+    blocks, slices, start = [], {}, 0
+    for kps, idx in groups.items():
+        stored = next(
+            (kp_embedding_lists[i] for i in idx if kp_embedding_lists[i] is not None), None
+        )
+        if stored is None or len(stored) != len(kps):
+            stored = _encode(list(kps))
+        blocks.append(_unit_rows(stored))
+        slices[kps] = slice(start, start + len(kps))
+        start += len(kps)
+    S = T @ np.vstack(blocks).T  # (n_scorable, total key points)
+
+    for kps, idx in groups.items():
+        sims = S[[row_of[i] for i in idx], slices[kps]]
+        hits = np.array(
+            [
+                _phrase_hits(transcripts[i], list(kps)) if hits_list is None else hits_list[i]
+                for i in idx
+            ],
+            dtype=bool,
+        )
+        for i, res in zip(idx, _coverage_block(sims, hits, list(kps))):
+            results[i] = res
+    return results
 
 
 def tips_from_metrics(
@@ -149,14 +307,23 @@ def overall_score(coverage: dict, fillers: dict, wpm: float) -> float:
 
 
 # -------------------- Public API --------------------
-def analyze(transcript: str, role: str, key_points: list[str], duration_s: float) -> dict:
+def analyze(
+    transcript: str,
+    role: str,
+    key_points: list[str],
+    duration_s: float,
+    kp_embeddings: list[list[float]] | None = None,
+    timings: dict[str, float] | None = None,
+) -> dict:
     """
     Main entry point used by tasks.py / API:
       - Computes WPM, filler stats, coverage, tips, and overall score.
+    ``timings``, if given, gets the encode time as ``embed``.
     """
-    wpm = words_per_minute(transcript, duration_s)
-    fillers = filler_stats(transcript)
-    coverage = coverage_score(transcript, key_points)
+    stats = text_stats(transcript, role, key_points)
+    wpm = wpm_from_words(stats.word_count, duration_s)
+    fillers = stats.fillers()
+    coverage = coverage_score(transcript, key_points, kp_embeddings, stats.kp_hits, timings)
     tips = tips_from_metrics(coverage, fillers, wpm, key_points)
     overall = overall_score(coverage, fillers, wpm)
     return {
@@ -167,3 +334,99 @@ def analyze(transcript: str, role: str, key_points: list[str], duration_s: float
         "tips": tips,
         "overall": overall,
     }
+
+
+def analyze_batch(items: list[dict]) -> list[dict]:
+    """
+    Score many answers at once. Each item has the ``analyze`` arguments
+    (transcript, role, key_points, duration_s and optionally kp_embeddings);
+    coverage for all of them comes from one batched encode.
+    """
+    stats = [text_stats(it["transcript"], it["role"], it["key_points"]) for it in items]
+    coverages = coverage_batch(
+        [it["transcript"] for it in items],
+        [it["key_points"] for it in items],
+        [it.get("kp_embeddings") for it in items],
+        [st.kp_hits for st in stats],
+    )
+    out = []
+    for it, st, coverage in zip(items, stats, coverages):
+        wpm = wpm_from_words(st.word_count, it["duration_s"])
+        fillers = st.fillers()
+        out.append(
+            {
+                "role": it["role"],
+                "coverage": coverage,
+                "filler": fillers,
+                "wpm": int(round(wpm)),
+                "tips": tips_from_metrics(coverage, fillers, wpm, it["key_points"]),
+                "overall": overall_score(coverage, fillers, wpm),
+            }
+        )
+    return out
+
+
+class IncrementalAnalyzer:
+    """
+    ``analyze`` for a transcript that arrives one segment at a time.
+
+    Word/filler counts and key-point phrase hits come from one streaming
+    ``TextScanner``; coverage keeps each key point's best similarity to any
+    segment so far. ``update`` encodes only the new segments, so every call
+    costs O(new text), and ``result`` gives the ``analyze`` shape at any point.
+    """
+
+    def __init__(
+        self,
+        role: str,
+        key_points: list[str],
+        kp_embeddings: list[list[float]] | np.ndarray | None = None,
+    ) -> None:
+        self.role = role
+        self.key_points = list(key_points)
+        self.duration_s = 0.0
+        self._kp_embeddings = kp_embeddings
+        self._kp_unit: np.ndarray | None = None
+        self._scanner = TextScanner(fillers_for(role), tuple(self.key_points))
+        self._max_sims = np.full(len(self.key_points), -1.0, dtype=np.float32)
+        self._has_text = False
+
+    def _kp_matrix(self) -> np.ndarray:
+        if self._kp_unit is None:
+            stored = self._kp_embeddings
+            if stored is None or len(stored) != len(self.key_points):
+                stored = _encode(self.key_points)
+            self._kp_unit = _unit_rows(stored)
+        return self._kp_unit
+
+    def update(self, segments: str | list[str], end_s: float | None = None) -> dict:
+        """Consume new segment text (ending at ``end_s`` seconds); return provisional metrics."""
+        texts = [t for t in ([segments] if isinstance(segments, str) else segments) if t.strip()]
+        for t in texts:
+            self._scanner.feed(t)
+        if texts and self.key_points:
+            seg = _unit_rows(_encode(texts))
+            np.maximum(self._max_sims, (seg @ self._kp_matrix().T).max(axis=0), out=self._max_sims)
+        self._has_text = self._has_text or bool(texts)
+        if end_s is not None:
+            self.duration_s = max(self.duration_s, end_s)
+        return self.result()
+
+    def result(self, duration_s: float | None = None) -> dict:
+        duration = self.duration_s if duration_s is None else duration_s
+        stats = self._scanner.stats()
+        wpm = wpm_from_words(stats.word_count, duration)
+        fillers = stats.fillers()
+        if self.key_points and self._has_text:
+            hits = np.array(stats.kp_hits, dtype=bool)
+            coverage = _coverage_block(self._max_sims[None, :], hits[None, :], self.key_points)[0]
+        else:
+            coverage = {"matched": [], "score": 0.0}
+        return {
+            "role": self.role,
+            "coverage": coverage,
+            "filler": fillers,
+            "wpm": int(round(wpm)),
+            "tips": tips_from_metrics(coverage, fillers, wpm, self.key_points),
+            "overall": overall_score(coverage, fillers, wpm),
+        }
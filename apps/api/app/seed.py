@@ -3,6 +3,8 @@ from sqlmodel import select
 
 from .db import engine
 from .models import Question
+from .questions import catalog
+from .scoring import ensure_kp_embeddings
 
 SEED = [
     Question(
@@ -35,7 +37,13 @@ def run():
             exists = s.exec(select(Question).where(Question.text == q.text)).first()
             if not exists:
                 s.add(q)
+        # Compute key-point embeddings once here (new rows, edited rows, or a new encoder)
+        for q in s.exec(select(Question)).all():
+            if ensure_kp_embeddings(q):
+                s.add(q)
         s.commit()
+    # API and workers pick up the new/edited questions on their next catalog check
+    catalog.invalidate()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+# apps/api/app/spool.py
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+# Local blob store shared by API and worker (object-store stand-in).
+# Jobs carry only a blob key + content hash, never the audio itself.
+SPOOL_DIR = os.getenv("SPOOL_DIR", "./.spool")
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+# Blobs whose job never reached a terminal state (e.g. killed worker) are swept after this
+SPOOL_MAX_AGE_S = int(os.getenv("SPOOL_MAX_AGE_S", str(24 * 3600)))
+
+_last_sweep = 0.0
+
+
+@dataclass(frozen=True)
+class SpooledBlob:
+    key: str
+    sha256: str
+    size: int
+
+
+def path_for(key: str) -> Path:
+    # Keys are generated by us; refuse anything that could escape the spool dir
+    if not key or "/" in key or "\\" in key or key.startswith("."):
+        raise ValueError(f"Invalid blob key: {key!r}")
+    return Path(SPOOL_DIR) / key
+
+
+async def spool_upload(file: UploadFile, max_bytes: int) -> SpooledBlob:
+    """
+    Copy an upload into the spool in fixed-size chunks, hashing as we go and
+    aborting with 413 as soon as ``max_bytes`` is exceeded.
+    """
+    spool = Path(SPOOL_DIR)
+    spool.mkdir(parents=True, exist_ok=True)
+    suffix = os.path.splitext(file.filename or "")[-1] or ".webm"
+    fd, tmp = tempfile.mkstemp(dir=spool, prefix=".upload-", suffix=suffix)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large (> {max_bytes // (1024 * 1024)} MB)",
+                    )
+                hasher.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+        digest = hasher.hexdigest()
+        key = f"{uuid.uuid4().hex}-{digest[:16]}{suffix}"
+        os.replace(tmp, spool / key)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return SpooledBlob(key=key, sha256=digest, size=size)
+
+
+def read_blob(key: str, sha256: str | None = None) -> bytes:
+    data = path_for(key).read_bytes()
+    if sha256 and hashlib.sha256(data).hexdigest() != sha256:
+        raise RuntimeError(f"Spooled blob {key} does not match its content hash")
+    return data
+
+
+@contextmanager
+def map_blob(key: str, sha256: str | None = None) -> Iterator[mmap.mmap]:
+    """Memory-map a blob read-only (verifying its hash) so it can be decoded in place."""
+    with open(path_for(key), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if sha256 and hashlib.sha256(mm).hexdigest() != sha256:
+            raise RuntimeError(f"Spooled blob {key} does not match its content hash")
+        yield mm
+
+
+def discard(key: str) -> None:
+    try:
+        path_for(key).unlink()
+    except (FileNotFoundError, ValueError):
+        pass
+
+
+def _sweep_due(min_interval_s: float) -> bool:
+    global _last_sweep
+    now = time.time()
+    if now - _last_sweep < min_interval_s:
+        return False
+    _last_sweep = now
+    return True
+
+
+def _remove_stale(max_age_s: int) -> int:
+    now = time.time()
+    removed = 0
+    for p in Path(SPOOL_DIR).glob("*"):
+        try:
+            if p.is_file() and now - p.stat().st_mtime > max_age_s:
+                p.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def sweep(max_age_s: int = SPOOL_MAX_AGE_S, min_interval_s: float = 600.0) -> int:
+    """Delete stale blobs (at most once per ``min_interval_s``). Returns count removed."""
+    return _remove_stale(max_age_s) if _sweep_due(min_interval_s) else 0
+
+
+async def asweep(max_age_s: int = SPOOL_MAX_AGE_S, min_interval_s: float = 600.0) -> int:
+    """``sweep`` for async code: the directory scan, when due, runs off the event loop."""
+    if not _sweep_due(min_interval_s):
+        return 0
+    return await run_in_threadpool(_remove_stale, max_age_s)
@@ -0,0 +1,129 @@
+# apps/api/app/streaming.py
+from __future__ import annotations
+
+import os
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+# Live transcription works on 16 kHz mono PCM sent by the browser while recording
+SAMPLE_RATE = 16000
+# Re-transcribe the open window every time this much new audio has arrived
+STREAM_STEP_S = float(os.getenv("STREAM_STEP_S", "4"))
+# Segments ending this close to the live edge may still change; hold them back
+STREAM_MARGIN_S = float(os.getenv("STREAM_MARGIN_S", "1.5"))
+# Upper bound on the open window (Whisper decodes at most 30 s in one pass)
+STREAM_MAX_WINDOW_S = float(os.getenv("STREAM_MAX_WINDOW_S", "25"))
+
+Segment = dict[str, Any]
+TranscribeFn = Callable[[np.ndarray], tuple[str, list[Segment]]]
+
+
+def pcm16_to_float32(frame: bytes) -> np.ndarray:
+    """
+    Little-endian signed 16-bit PCM -> float32 in [-1, 1]. ``frame`` must hold
+    whole samples; ``RollingTranscriber.feed_pcm16`` carries split ones over.
+    """
+    return np.frombuffer(frame, dtype="<i2").astype(np.float32) / 32768.0
+
+
+class RollingTranscriber:
+    """
+    Transcribes a live audio stream in rolling windows.
+
+    Audio is buffered from the end of the last finalized segment. Every
+    ``step_s`` of new audio the open window is transcribed; segments that end
+    at least ``margin_s`` before the live edge are finalized and their audio is
+    dropped, so each pass only covers the last few seconds. ``finish`` decodes
+    whatever is left and finalizes everything.
+    """
+
+    def __init__(
+        self,
+        transcribe: TranscribeFn,
+        step_s: float = STREAM_STEP_S,
+        margin_s: float = STREAM_MARGIN_S,
+        max_window_s: float = STREAM_MAX_WINDOW_S,
+    ) -> None:
+        self.transcribe = transcribe
+        self.step = int(step_s * SAMPLE_RATE)
+        self.margin_s = margin_s
+        self.max_window = int(max_window_s * SAMPLE_RATE)
+        self.language: str | None = None
+        self.segments: list[Segment] = []
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._offset = 0  # samples before the buffer (already finalized)
+        self._pending = 0  # samples received since the last pass
+        self._carry = b""  # first byte of a sample split across PCM frames
+
+    @property
+    def duration(self) -> float:
+        return (self._offset + len(self._buf)) / SAMPLE_RATE
+
+    def ready(self) -> bool:
+        """True once enough new audio has arrived to justify another pass."""
+        return self._pending >= self.step
+
+    def feed(self, samples: np.ndarray) -> None:
+        self._buf = np.concatenate([self._buf, samples.astype(np.float32, copy=False)])
+        self._pending += len(samples)
+
+    def feed_pcm16(self, frame: bytes) -> None:
+        """``feed`` for raw PCM16 frames, which may split a sample between them."""
+        frame = self._carry + frame
+        whole = len(frame) - len(frame) % 2
+        self._carry = frame[whole:]
+        self.feed(pcm16_to_float32(frame[:whole]))
+
+    def step_window(self) -> list[Segment]:
+        """Transcribe the open window; return newly finalized segments."""
+        return self._decode(final=False)
+
+    def finish(self) -> list[Segment]:
+        """Transcribe the remaining tail and finalize it."""
+        return self._decode(final=True)
+
+    def transcript(self) -> str:
+        return " ".join(s["text"] for s in self.segments if s["text"]).strip()
+
+    def _decode(self, final: bool) -> list[Segment]:
+        self._pending = 0
+        if len(self._buf) == 0:
+            return []
+        language, segs = self.transcribe(self._buf)
+        self.language = self.language or language
+        window_s = len(self._buf) / SAMPLE_RATE
+
+        if final:
+            done = segs
+        else:
+            done = [s for s in segs if s["end"] <= window_s - self.margin_s]
+            if not done and len(self._buf) >= self.max_window and segs:
+                # One long utterance: commit all but the segment still being spoken,
+                # or that segment itself when it fills the whole window
+                done = segs[:-1] if len(segs) > 1 else segs
+
+        if done:
+            end = len(self._buf) if final else int(done[-1]["end"] * SAMPLE_RATE)
+            cut = min(end, len(self._buf))
+        elif not segs and len(self._buf) >= self.max_window:
+            # Only silence so far: keep the last margin so a starting word isn't clipped
+            cut = len(self._buf) - int(self.margin_s * SAMPLE_RATE)
+        else:
+            cut = 0
+
+        base = self._offset / SAMPLE_RATE
+        out = [
+            {
+                "start": round(base + s["start"], 2),
+                "end": round(base + s["end"], 2),
+                "text": s["text"],
+            }
+            for s in done
+        ]
+        self.segments.extend(out)
+        if cut > 0:
+            self._buf = self._buf[cut:].copy()
+            self._offset += cut
+        return out
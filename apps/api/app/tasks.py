@@ -1,45 +1,514 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import time
+from collections.abc import Callable
 from typing import Any
 
+from rq import Callback, Retry, get_current_job
+from rq.job import Job
 from sqlmodel import Session as DBSession
 
-from .db import engine
+from . import db as app_db  # engine looked up at call time so tests can patch it
+from . import admission, checkpoints, progress, spool
+from .metrics import timed
 from .models import Analysis
-from .routers.transcribe import transcribe_bytes
-from .scoring import analyze  # whatever function you use now to score
+from .models import Session as SessionModel
+from .questions import CatalogQuestion, catalog
+from .routers import transcribe as stt
+from .scoring import analyze, analyze_batch
+from .transcript_cache import cache as transcripts
 
+log = logging.getLogger(__name__)
 
-def run_full_pipeline(session_id: int, audio_bytes: bytes, filename: str) -> dict[str, Any]:
+# Render the report PDF in the worker right after an analysis is saved
+PDF_PRERENDER = os.getenv("PDF_PRERENDER", "0") == "1"
+
+# The worker keeps one event loop so the Chromium pool survives between jobs
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+# Results computed ahead of time for the jobs of one micro-batch, by job id (batch_worker.py)
+Prepared = dict[str, dict[str, Any]]
+
+
+def stage_retry() -> Retry:
+    """Retry policy of every pipeline stage job (retries resume from checkpoints)."""
+    return Retry(max=3, interval=[5, 15, 60])
+
+
+def _run_async(coro):
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+def _audio_sha256(audio: bytes | str, audio_sha256: str | None) -> str:
+    # Spooled jobs carry the hash computed at upload; old raw-bytes jobs are hashed here
+    if audio_sha256 is None and isinstance(audio, bytes):
+        return hashlib.sha256(audio).hexdigest()
+    return audio_sha256 or ""
+
+
+def _decode(audio: bytes | str, audio_sha256: str | None) -> Any:
+    # Straight from memory: the spooled blob is memory-mapped and decoded in
+    # place; raw bytes (old jobs) are decoded from a buffer.
+    if isinstance(audio, bytes):
+        return stt.decode_audio(io.BytesIO(audio))
+    with spool.map_blob(audio, audio_sha256) as buf:
+        return stt.decode_audio(buf)
+
+
+def _transcribe(
+    audio: bytes | str, audio_sha256: str | None, timings: dict[str, float]
+) -> tuple[str | None, float, str]:
+    """Transcript for a job's audio, served from the transcript cache when possible."""
+    sha = _audio_sha256(audio, audio_sha256)
+    if sha and (hit := transcripts.get(sha)) is not None:
+        return hit
+    with timed("decode", timings):
+        samples = _decode(audio, audio_sha256)
+    with timed("transcribe", timings):
+        result = stt.transcribe_audio(samples)
+    if sha:
+        transcripts.put(sha, result)
+    return result
+
+
+def _transcription(
+    audio: bytes | str,
+    audio_sha256: str | None,
+    timings: dict[str, float],
+    prepared: dict[str, Any] | None,
+) -> tuple[str | None, float, str]:
+    # Part of a micro-batch: already transcribed together with the other jobs
+    if prepared is not None:
+        return prepared["transcription"]
+    return _transcribe(audio, audio_sha256, timings)
+
+
+def _session_and_question(s: DBSession, session_id: int) -> tuple[SessionModel, CatalogQuestion]:
+    sess = s.get(SessionModel, session_id)
+    if not sess:
+        raise RuntimeError("Session not found")
+    # Key points come from the in-process catalog; embeddings are backfilled once if missing
+    q = catalog.get(sess.question_id, embedded=True)
+    if q is None:
+        raise RuntimeError("Question not found")
+    return sess, q
+
+
+def _pipeline_id(job: Job | None) -> str | None:
+    # Stage jobs report progress under the id the client got: the first stage's
+    if job is None:
+        return None
+    return (job.meta or {}).get("pipeline", job.id)
+
+
+def _publisher(job: Job | None) -> Callable[..., None]:
+    pipeline_id = _pipeline_id(job)
+
+    def stage(name: str, **data: Any) -> None:
+        if pipeline_id is not None:
+            progress.publish(pipeline_id, name, **data)
+
+    return stage
+
+
+def _add_total(timings: dict[str, float], t0: float) -> None:
+    # Work time summed over the stages (queue waits between them are not counted)
+    timings["total"] = round(timings.get("total", 0.0) + time.perf_counter() - t0, 4)
+
+
+def _score(
+    session_id: int,
+    transcription: tuple[str | None, float, str],
+    timings: dict[str, float],
+    prepared: dict[str, Any] | None,
+) -> dict[str, Any]:
+    """Metrics for a transcript (role/question from the session; pace from the audio duration)."""
+    language, duration, transcript = transcription
+    with DBSession(app_db.engine) as s:
+        sess, q = _session_and_question(s, session_id)
+    duration_s = duration or sess.duration_s
+    if prepared is not None and "metrics" in prepared:
+        metrics = prepared["metrics"]
+    else:
+        with timed("score", timings):
+            metrics = analyze(
+                transcript,
+                role=sess.role,
+                key_points=list(q.key_points),
+                duration_s=duration_s,
+                kp_embeddings=q.kp_embeddings,
+                timings=timings,
+            )
+    metrics["language"] = language
+    metrics["duration_s"] = round(duration_s, 2)
+    return metrics
+
+
+def _persist(
+    session_id: int,
+    transcription: tuple[str | None, float, str],
+    metrics: dict[str, Any],
+    timings: dict[str, float],
+    t0: float,
+) -> int:
     """
-    Background job: transcribe -> analyze -> save Analysis row.
-    Returns metrics dict.
+    Save the Analysis row (and the decoded duration on the session if it had
+    none). The row's ``metrics["timings"]`` is the finished breakdown: this
+    stage's ``db_write`` (up to the commit) and ``total`` since ``t0`` included.
     """
-    # 1) Transcribe (reuse your current transcribe logic; keep it pure)
-    # from .whisper_util import transcribe_bytes  # if you have it split
-    # transcript = transcribe_bytes(audio_bytes, filename)
-    # If you only have a file-based transcriber, write temp file then call it.
-    # For now, we'll assume you can call your existing transcriber here:
-    # refactor to expose a helper
-    transcript = transcribe_bytes(audio_bytes, filename)
-
-    # 2) Analyze
-    # You’ll need role/question_id/duration; simplest is to recompute duration from transcript or pass them in.
-    # For now, stub duration=60 and role/question_id from session
-    from .models import Question
-    from .models import Session as SessionModel
-
-    with DBSession(engine) as s:
-        sess = s.get(SessionModel, session_id)
-        if not sess:
-            raise RuntimeError("Session not found")
-        q = s.get(Question, sess.question_id)
-        metrics = analyze(
-            transcript, role=sess.role, key_points=q.key_points, duration_s=sess.duration_s or 60
-        )
-
-        # 3) Save Analysis row
-        row = Analysis(session_id=session_id, transcript=transcript, metrics=metrics)
-        s.add(row)
+    _, duration, transcript = transcription
+    metrics["timings"] = timings
+    with DBSession(app_db.engine) as s:
+        with timed("db_write", timings):
+            sess = s.get(SessionModel, session_id)
+            if not sess:
+                raise RuntimeError("Session not found")
+            if duration and not sess.duration_s:
+                sess.duration_s = duration
+                s.add(sess)
+            row = Analysis(
+                session_id=session_id,
+                transcript=transcript,
+                metrics={**metrics, "timings": dict(timings)},
+            )
+            app_db.add_analysis(s, row)
+        _add_total(timings, t0)
+        # The insert was flushed before db_write and total existed; store the final copy
+        row.metrics = {**metrics, "timings": dict(timings)}
         s.commit()
-        s.refresh(row)
+        return row.id
+
+
+def _next_stage(job: Job | None, name: str, func: Callable[..., Any], *args: Any) -> None:
+    """
+    Enqueue the pipeline's next stage on its own queue (no-op outside a worker).
+    Interactive pipelines go to the front of it, so they keep their priority
+    past the transcribe lane.
+    """
+    from .queues import persist_q, score_q
+
+    if job is None:
+        return
+    meta = job.meta or {}
+    pipeline_id = _pipeline_id(job)
+    next_id = f"{pipeline_id}-{name}"
+    queue = {"score": score_q, "persist": persist_q}[name]
+    queue.enqueue(
+        func,
+        *args,
+        job_id=next_id,
+        description=f"{name} {job.description or pipeline_id}",
+        meta={"pipeline": pipeline_id, "stage": name, "lane": meta.get("lane")},
+        on_failure=Callback(pipeline_failed),
+        retry=stage_retry(),
+        at_front=meta.get("lane") == "hi",
+    )
+    # Lets GET /jobs/{id} follow the chain from the first stage to the current one
+    job.meta["next"] = next_id
+    job.save_meta()
+
+
+def _batch_prepared(job: Job | None) -> dict[str, Any] | None:
+    """What the batch worker precomputed for ``job``, handed over as ``job.prepared``."""
+    return getattr(job, "prepared", None)
+
+
+def transcribe_stage(
+    session_id: int,
+    audio: bytes | str,
+    filename: str,
+    audio_sha256: str | None = None,
+) -> dict[str, Any]:
+    """
+    Pipeline stage 1 (transcribe queues): spooled audio -> transcript, then
+    enqueue ``score_stage``. Its job id is the one the client polls.
+    """
+    job = get_current_job()
+    prepared = _batch_prepared(job)
+    stage = _publisher(job)
+    resume = checkpoints.Resumable(_pipeline_id(job))
+    timings: dict[str, float] = {}
+    t0 = time.perf_counter()
+
+    stage("transcribing")
+    transcription = tuple(
+        resume.run("transcription", lambda: _transcription(audio, audio_sha256, timings, prepared))
+    )
+    _add_total(timings, t0)
+    # Drain-time estimate for enqueue admission, which gates the transcribe lanes
+    # (batched jobs add their share of the batch)
+    batch_share = prepared.get("batch_share_s", 0.0) if prepared is not None else 0.0
+    admission.record_job_duration(timings["total"] + batch_share)
+
+    _next_stage(job, "score", score_stage, session_id, transcription, timings)
+    language, duration, _ = transcription
+    return {"language": language, "duration_s": duration}
+
+
+def score_stage(
+    session_id: int,
+    transcription: tuple[str | None, float, str],
+    timings: dict[str, float],
+) -> dict[str, Any]:
+    """Pipeline stage 2 (``ic-score``): transcript -> metrics, then enqueue ``persist_stage``."""
+    job = get_current_job()
+    prepared = _batch_prepared(job)
+    resume = checkpoints.Resumable(_pipeline_id(job))
+    t0 = time.perf_counter()
+
+    _publisher(job)("scoring")
+    metrics = resume.run("metrics", lambda: _score(session_id, transcription, timings, prepared))
+    _add_total(timings, t0)
+
+    _next_stage(job, "persist", persist_stage, session_id, transcription, metrics, timings)
+    return metrics
 
+
+def persist_stage(
+    session_id: int,
+    transcription: tuple[str | None, float, str],
+    metrics: dict[str, Any],
+    timings: dict[str, float],
+) -> dict[str, Any]:
+    """
+    Pipeline stage 3 (``ic-persist``): save the Analysis row; the optional
+    last stage is the PDF render on ``ic-pdf``. Returns the metrics dict.
+    A retry after the commit went through does not save a second row.
+    """
+    job = get_current_job()
+    pipeline_id = _pipeline_id(job)
+    resume = checkpoints.Resumable(pipeline_id)
+    t0 = time.perf_counter()
+
+    analysis_id = resume.run(
+        "analysis_id", lambda: _persist(session_id, transcription, metrics, timings, t0)
+    )
+    _publisher(job)("saved", analysis_id=analysis_id, session_id=session_id)
+
+    if PDF_PRERENDER:
+        enqueue_report_pdf(analysis_id, session_id)
+    if pipeline_id is not None:
+        checkpoints.clear(pipeline_id)
     return metrics
+
+
+def run_full_pipeline(
+    session_id: int,
+    audio: bytes | str,
+    filename: str,
+    audio_sha256: str | None = None,
+) -> dict[str, Any]:
+    """
+    Background job: transcribe -> analyze -> save Analysis row, in one job.
+    New uploads run as chained stage jobs (``transcribe_stage``); this still
+    runs jobs left on ``ic-jobs`` from before the split.
+    ``audio`` is a spool blob key (raw bytes are still accepted for old jobs).
+    Returns metrics dict.
+    """
+    # Part of a micro-batch: transcript and scores were already computed together
+    job = get_current_job()
+    prepared = _batch_prepared(job)
+    stage = _publisher(job)
+    # A retry picks up after the last stage that completed
+    resume = checkpoints.Resumable(_pipeline_id(job))
+
+    # Per-stage wall time for this job (batched jobs share one pass through the models)
+    timings: dict[str, float] = {}
+    t0 = time.perf_counter()
+
+    stage("transcribing")
+    transcription = tuple(
+        resume.run("transcription", lambda: _transcription(audio, audio_sha256, timings, prepared))
+    )
+
+    stage("scoring")
+    metrics = resume.run("metrics", lambda: _score(session_id, transcription, timings, prepared))
+    analysis_id = resume.run(
+        "analysis_id", lambda: _persist(session_id, transcription, metrics, timings, t0)
+    )
+    if "total" not in timings:  # the row was saved by an earlier attempt
+        _add_total(timings, t0)
+    stage("saved", analysis_id=analysis_id, session_id=session_id)
+    batch_share = prepared.get("batch_share_s", 0.0) if prepared is not None else 0.0
+    admission.record_job_duration(timings["total"] + batch_share)
+
+    if PDF_PRERENDER:
+        enqueue_report_pdf(analysis_id, session_id)
+    if resume.pipeline_id is not None:
+        checkpoints.clear(resume.pipeline_id)
+    return metrics
+
+
+def _decode_job_audio(job: Job) -> Any:
+    _, audio, _, *rest = job.args
+    with timed("decode"):
+        return _decode(audio, rest[0] if rest else None)
+
+
+def _prepare_transcriptions(jobs: list[Job]) -> Prepared:
+    """One batched Whisper pass over jobs with (session_id, audio, filename, sha) args."""
+    prepared: Prepared = {}
+    audios, shas = {}, {}
+    for job in jobs:
+        _, audio, _, *rest = job.args
+        shas[job.id] = _audio_sha256(audio, rest[0] if rest else None)
+        if shas[job.id] and (hit := transcripts.get(shas[job.id])) is not None:
+            prepared[job.id] = {"transcription": hit}
+            continue
+        try:
+            audios[job.id] = _decode_job_audio(job)
+        except Exception:
+            log.exception("Could not decode audio for job %s; it will run on its own", job.id)
+    pending = list(audios)
+    with timed("transcribe"):
+        results = stt.transcribe_many([audios[i] for i in pending])
+    for job_id, result in zip(pending, results):
+        prepared[job_id] = {"transcription": result}
+        if shas[job_id]:
+            transcripts.put(shas[job_id], result)
+    return {job.id: prepared[job.id] for job in jobs if job.id in prepared}
+
+
+def _prepare_scores(prepared: Prepared, jobs: list[tuple[str, int]]) -> list[str]:
+    """One batched encode for (job id, session id) pairs whose transcription is in ``prepared``."""
+    items, scored = [], []
+    with DBSession(app_db.engine) as s:
+        for job_id, session_id in jobs:
+            try:
+                sess, q = _session_and_question(s, session_id)
+            except RuntimeError:
+                continue  # the job reports the missing session itself
+            _, duration, transcript = prepared[job_id]["transcription"]
+            items.append(
+                {
+                    "transcript": transcript,
+                    "role": sess.role,
+                    "key_points": list(q.key_points),
+                    "duration_s": duration or sess.duration_s,
+                    "kp_embeddings": q.kp_embeddings,
+                }
+            )
+            scored.append(job_id)
+    with timed("score"):
+        batch_metrics = analyze_batch(items)
+    for job_id, metrics in zip(scored, batch_metrics):
+        prepared[job_id]["metrics"] = metrics
+    return scored
+
+
+def _share_batch_time(prepared: Prepared, t0: float) -> Prepared:
+    if prepared:
+        share = (time.perf_counter() - t0) / len(prepared)
+        for entry in prepared.values():
+            entry["batch_share_s"] = share
+    return prepared
+
+
+def prepare_transcribe_batch(jobs: list[Job]) -> Prepared:
+    """
+    Precompute ``transcribe_stage`` for several queued jobs with one batched
+    Whisper pass. Returns what was prepared, by job id; the rest run unbatched.
+    """
+    t0 = time.perf_counter()
+    return _share_batch_time(_prepare_transcriptions(jobs), t0)
+
+
+def prepare_score_batch(jobs: list[Job]) -> Prepared:
+    """Precompute ``score_stage`` for several queued jobs with one batched encode."""
+    t0 = time.perf_counter()
+    prepared: Prepared = {job.id: {"transcription": job.args[1]} for job in jobs}
+    scored = _prepare_scores(prepared, [(job.id, job.args[0]) for job in jobs])
+    return _share_batch_time({job_id: prepared[job_id] for job_id in scored}, t0)
+
+
+def prepare_pipeline_batch(jobs: list[Job]) -> Prepared:
+    """
+    Precompute ``run_full_pipeline`` for several queued jobs at once: one
+    batched Whisper pass over all recordings and one batched encode for
+    scoring. Each job still runs (and saves its own Analysis row) through
+    RQ afterwards; jobs that cannot be prepared here simply run unbatched.
+    Returns what was prepared, by job id.
+    """
+    t0 = time.perf_counter()
+    prepared = _prepare_transcriptions(jobs)
+    if not prepared:
+        return {}
+    by_id = {job.id: job for job in jobs}
+    _prepare_scores(prepared, [(job_id, by_id[job_id].args[0]) for job_id in prepared])
+    return _share_batch_time(prepared, t0)
+
+
+def discard_job_blob(job: Job, connection: Any, result: Any = None) -> None:
+    """RQ success callback: drop the job's spooled audio once it has been processed."""
+    key = (job.meta or {}).get("blob")
+    if key:
+        spool.discard(key)
+
+
+def discard_failed_job_blob(job: Job, connection: Any, *exc_info: Any) -> None:
+    """RQ failure callback: keep the blob while retries are left, else drop it."""
+    if not job.retries_left:
+        discard_job_blob(job, connection)
+
+
+def pipeline_failed(job: Job, connection: Any, *exc_info: Any) -> None:
+    """RQ failure callback for every pipeline stage: report the failure, then clean up the blob."""
+    exc = exc_info[1] if len(exc_info) > 1 else None
+    stage = _publisher(job)
+    if job.retries_left:
+        stage("retrying", retries_left=job.retries_left)
+    else:
+        stage("failed", error=f"{type(exc).__name__}: {exc}" if exc else None)
+        checkpoints.clear(_pipeline_id(job))
+    discard_failed_job_blob(job, connection, *exc_info)
+
+
+def render_report_pdf(analysis_id: int, session_id: int) -> dict[str, Any]:
+    """
+    Background job: render the report PDF for one Analysis into the shared PDF cache.
+    Returns the cache key and size; the API serves the stored artifact.
+    """
+    from .pdf_cache import cache
+    from .routers import report_pdf
+
+    key = cache.key(analysis_id, report_pdf.TEMPLATE_HASH)
+    if cache.get(key) is None:
+        with DBSession(app_db.engine) as s:
+            row = s.get(Analysis, analysis_id)
+            if not row:
+                raise RuntimeError("Analysis not found")
+            html = report_pdf.render_report_html(row, session_id)
+        cache.put(key, _run_async(report_pdf.html_to_pdf(html)))
+    return {"analysis_id": analysis_id, "key": key, "url": f"/report/{session_id}/pdf"}
+
+
+def enqueue_report_pdf(analysis_id: int, session_id: int) -> Job:
+    """
+    Enqueue a PDF render on the PDF queue. The job id is derived from the
+    analysis, so bursts of requests for the same report share one job.
+    """
+    from .queues import pdf_q, redis
+    from .routers.report_pdf import TEMPLATE_HASH
+
+    job_id = f"pdf-{analysis_id}-{TEMPLATE_HASH}"
+    try:
+        job = Job.fetch(job_id, connection=redis)
+        if job.get_status() in ("queued", "started", "deferred", "scheduled"):
+            return job
+    except Exception:
+        pass
+    return pdf_q.enqueue(
+        render_report_pdf,
+        analysis_id,
+        session_id,
+        job_id=job_id,
+        description=f"pdf session:{session_id} analysis:{analysis_id}",
+        result_ttl=3600,
+    )
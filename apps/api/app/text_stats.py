@@ -0,0 +1,132 @@
+# apps/api/app/text_stats.py
+from __future__ import annotations
+
+import re
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+
+# One tokenizer for everything: whitespace runs, word runs, or punctuation runs.
+_TOKEN_RE = re.compile(r"(\s+)|(\w+)|[^\w\s]+")
+# Clause punctuation ends a phrase ("you. know" is not the filler "you know");
+# hyphens/apostrophes do not ("trade-offs" matches "trade offs").
+_PHRASE_BREAK = frozenset(".,;:!?")
+
+
+def tokenize_phrase(phrase: str) -> tuple[str, ...]:
+    """Normalize a filler / key point into the word tokens the scanner matches on."""
+    return tuple(m.group(2) for m in _TOKEN_RE.finditer(phrase.lower()) if m.group(2))
+
+
+class PhraseAutomaton:
+    """
+    Aho-Corasick automaton over word tokens. Matches any number of phrases in a
+    single left-to-right pass, so scan cost does not grow with lexicon size.
+    """
+
+    def __init__(self, phrases: list[tuple[str, ...]]) -> None:
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[list[int]] = [[]]
+        for pid, toks in enumerate(phrases):
+            if not toks:
+                continue
+            node = 0
+            for tok in toks:
+                nxt = self.goto[node].get(tok)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][tok] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append(pid)
+
+        # BFS to build failure links and merge outputs along them
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for tok, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and tok not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(tok, 0) if node else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def step(self, state: int, tok: str) -> int:
+        while state and tok not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(tok, 0)
+
+
+@dataclass
+class TextStats:
+    word_count: int
+    filler_counts: dict[str, int]
+    kp_hits: list[bool]
+
+    def fillers(self) -> dict:
+        """Same shape as scoring.filler_stats()."""
+        return {"counts": dict(self.filler_counts), "total": int(sum(self.filler_counts.values()))}
+
+
+class TextScanner:
+    """
+    Streaming single-pass scanner: word count, filler counts and key-point hits
+    together. ``feed`` can be called repeatedly (e.g. per transcript segment);
+    segment boundaries count as whitespace and phrases may span them.
+    """
+
+    def __init__(self, fillers: tuple[str, ...], key_points: tuple[str, ...] = ()) -> None:
+        self.fillers = fillers
+        self.key_points = key_points
+        self.word_count = 0
+        self._state = 0
+        self._automaton = _automaton(fillers, key_points)
+        self._counts = [0] * (len(fillers) + len(key_points))
+
+    def feed(self, text: str) -> None:
+        ac = self._automaton
+        counts = self._counts
+        state = self._state
+        at_boundary = True
+        words = 0
+        for m in _TOKEN_RE.finditer(text.lower()):
+            if m.group(1):
+                at_boundary = True
+                continue
+            if at_boundary:
+                words += 1  # start of a whitespace-delimited word (str.split semantics)
+                at_boundary = False
+            tok = m.group(2)
+            if tok is None:
+                if _PHRASE_BREAK.intersection(m.group(0)):
+                    state = 0
+                continue
+            state = ac.step(state, tok)
+            for pid in ac.out[state]:
+                counts[pid] += 1
+        self._state = state
+        self.word_count += words
+
+    def stats(self) -> TextStats:
+        nf = len(self.fillers)
+        return TextStats(
+            word_count=self.word_count,
+            filler_counts=dict(zip(self.fillers, self._counts[:nf])),
+            kp_hits=[c > 0 for c in self._counts[nf:]],
+        )
+
+
+@lru_cache(maxsize=256)
+def _automaton(fillers: tuple[str, ...], key_points: tuple[str, ...]) -> PhraseAutomaton:
+    return PhraseAutomaton([tokenize_phrase(p) for p in (*fillers, *key_points)])
+
+
+def scan_text(text: str, fillers: tuple[str, ...], key_points: tuple[str, ...] = ()) -> TextStats:
+    """One pass over ``text`` for word count, filler counts and key-point hits."""
+    scanner = TextScanner(fillers, key_points)
+    scanner.feed(text)
+    return scanner.stats()
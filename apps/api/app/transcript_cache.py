@@ -0,0 +1,67 @@
+# apps/api/app/transcript_cache.py
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from .metrics import cache_lookup
+from .routers.transcribe import TRANSCRIBE_SIGNATURE
+
+log = logging.getLogger(__name__)
+
+# How long a transcript is remembered for its audio (retries, double submits, re-uploads)
+TRANSCRIPT_CACHE_TTL_S = int(os.getenv("TRANSCRIPT_CACHE_TTL_S", str(7 * 24 * 3600)))
+
+Transcription = tuple[str | None, float, str]
+
+
+class TranscriptCache:
+    """
+    Transcripts in Redis keyed by the audio's sha256 and the transcription
+    settings, so the same clip is only ever decoded once per model. Redis
+    trouble degrades to a miss; it never fails the pipeline.
+    """
+
+    def __init__(self, connection: Any = None, ttl_s: int = TRANSCRIPT_CACHE_TTL_S) -> None:
+        self.connection = connection
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+
+    def _conn(self) -> Any:
+        if self.connection is None:
+            from .queues import redis
+
+            return redis
+        return self.connection
+
+    @staticmethod
+    def key(sha256: str) -> str:
+        return f"ic:transcript:{TRANSCRIBE_SIGNATURE}:{sha256}"
+
+    def get(self, sha256: str) -> Transcription | None:
+        try:
+            raw = self._conn().get(self.key(sha256))
+        except RedisError:
+            log.warning("Transcript cache unavailable", exc_info=True)
+            raw = None
+        cache_lookup("transcript", raw is not None)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        language, duration, text = json.loads(raw)
+        return language, duration, text
+
+    def put(self, sha256: str, result: Transcription) -> None:
+        try:
+            self._conn().set(self.key(sha256), json.dumps(list(result)), ex=self.ttl_s)
+        except RedisError:
+            log.warning("Could not store transcript for %s", sha256, exc_info=True)
+
+
+cache = TranscriptCache()
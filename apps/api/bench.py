@@ -0,0 +1,268 @@
+# apps/api/bench.py
+"""
+Offline benchmarks for scoring and transcription, checked against latency budgets.
+
+    python bench.py                           # local models, budgets from bench_budgets.json
+    python bench.py --encoder hash            # scoring overhead only (no torch needed)
+    python bench.py --audio clip.webm --out results.json
+
+Synthetic transcripts (100 to 10k words, 5 to 50 key points) are scored with
+``filler_stats``, ``coverage_score`` and ``analyze``; every audio file given
+(or found in ``BENCH_AUDIO_DIR``) is transcribed to get Whisper's real-time
+factor. Exits with status 1 when a case is over its budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+import zlib
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+# Benchmarks never download anything: models must already be in the local cache
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+import numpy as np  # noqa: E402
+
+from app import scoring  # noqa: E402
+from app.model_registry import registry  # noqa: E402
+
+BUDGETS_FILE = Path(__file__).with_name("bench_budgets.json")
+AUDIO_DIR = Path(os.getenv("BENCH_AUDIO_DIR", str(Path(__file__).with_name("bench_audio"))))
+AUDIO_EXTS = {".wav", ".webm", ".mp3", ".m4a", ".ogg", ".flac"}
+
+WORD_COUNTS = (100, 1000, 10000)
+KEY_POINT_COUNTS = (5, 50)
+# Each case runs for at least this long (and at least MIN_RUNS times)
+MIN_TIME_S = 0.5
+MIN_RUNS = 5
+MAX_RUNS = 200
+
+_WORDS = (
+    "we the system service team latency users data request cache queue database "
+    "deploy release metric alert incident customer feature design review test "
+    "because then after before while so and but with from into over under "
+    "measured improved reduced found fixed shipped built tuned rolled traced"
+).split()
+_KP_WORDS = (
+    "root cause analysis impact debugging steps lesson learned tools used trade-offs "
+    "requirements scalability monitoring rollback ownership stakeholder communication "
+    "timeline risk mitigation testing strategy postmortem capacity planning"
+).split()
+_FILLERS = sorted(scoring.FILLERS)
+
+
+class HashEncoder:
+    """Bag-of-words hashing stand-in for Sentence-BERT (same output shape, no model)."""
+
+    dim = 384
+
+    def encode(self, sentences: list[str], convert_to_numpy: bool = True, **_: Any) -> np.ndarray:
+        out = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for i, s in enumerate(sentences):
+            for tok in re.findall(r"\w+", s.lower()):
+                out[i, zlib.crc32(tok.encode()) % self.dim] += 1.0
+        return out
+
+
+def synthetic_key_points(n: int, rng: random.Random) -> list[str]:
+    points: list[str] = []
+    while len(points) < n:
+        kp = " ".join(rng.sample(_KP_WORDS, rng.randint(1, 3)))
+        if kp not in points:
+            points.append(kp)
+    return points
+
+
+def synthetic_transcript(words: int, key_points: list[str], rng: random.Random) -> str:
+    """About 5% fillers and every other key point mentioned verbatim somewhere."""
+    out: list[str] = []
+    mentions = key_points[::2]
+    while len(out) < words:
+        r = rng.random()
+        if r < 0.05:
+            out.extend(rng.choice(_FILLERS).split())
+        elif r < 0.08 and mentions:
+            out.extend(mentions.pop().split())
+        else:
+            out.append(rng.choice(_WORDS))
+        if rng.random() < 0.08:
+            out[-1] += rng.choice(".,")
+    return " ".join(out[:words])
+
+
+def measure(fn: Callable[[], Any], min_time_s: float = MIN_TIME_S) -> dict[str, Any]:
+    """Latency percentiles over repeated calls, plus peak allocation of one traced call."""
+    fn()  # warm caches (tokenizer lexicons, model load)
+    times: list[float] = []
+    deadline = time.perf_counter() + min_time_s
+    while len(times) < MIN_RUNS or (time.perf_counter() < deadline and len(times) < MAX_RUNS):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    times.sort()
+    return {
+        "runs": len(times),
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "p95_ms": round(times[min(len(times) - 1, int(0.95 * len(times)))] * 1000, 3),
+        "min_ms": round(times[0] * 1000, 3),
+        "alloc_peak_kib": round(peak / 1024, 1),
+    }
+
+
+def scoring_cases(
+    word_counts: tuple[int, ...] = WORD_COUNTS,
+    kp_counts: tuple[int, ...] = KEY_POINT_COUNTS,
+    min_time_s: float = MIN_TIME_S,
+    seed: int = 0,
+) -> dict[str, dict[str, Any]]:
+    rng = random.Random(seed)
+    results: dict[str, dict[str, Any]] = {}
+    kp_sets = {n: synthetic_key_points(n, rng) for n in kp_counts}
+    # Stored embeddings, as the pipeline has them on the Question row
+    kp_embeddings = {n: scoring.encode_key_points(kps) for n, kps in kp_sets.items()}
+    for words in word_counts:
+        text = synthetic_transcript(words, kp_sets[max(kp_counts)], rng)
+        results[f"filler_stats/w{words}"] = measure(
+            partial(scoring.filler_stats, text, "SWE"), min_time_s
+        )
+        for n, kps in kp_sets.items():
+            emb = kp_embeddings[n]
+            results[f"coverage_score/w{words}/kp{n}"] = measure(
+                partial(scoring.coverage_score, text, kps, emb), min_time_s
+            )
+            duration_s = words / 150 * 60
+            results[f"analyze/w{words}/kp{n}"] = measure(
+                partial(scoring.analyze, text, "SWE", kps, duration_s, emb), min_time_s
+            )
+    return results
+
+
+def audio_files(paths: list[str] | None = None) -> list[Path]:
+    if paths:
+        return [Path(p) for p in paths]
+    if not AUDIO_DIR.is_dir():
+        return []
+    return sorted(p for p in AUDIO_DIR.iterdir() if p.suffix.lower() in AUDIO_EXTS)
+
+
+def whisper_cases(paths: list[Path]) -> dict[str, dict[str, Any]]:
+    """Real-time factor (transcription time / audio duration) per clip; decode excluded."""
+    from app.routers import transcribe as stt
+
+    registry.get("whisper")  # load outside the timed region
+    results: dict[str, dict[str, Any]] = {}
+    for path in paths:
+        audio = stt.decode_audio(str(path))
+        audio_s = len(audio) / stt.SAMPLE_RATE
+        t0 = time.perf_counter()
+        _, segments = stt.transcribe_segments(audio)
+        elapsed = time.perf_counter() - t0
+        results[f"whisper_rtf/{path.name}"] = {
+            "audio_s": round(audio_s, 2),
+            "elapsed_s": round(elapsed, 3),
+            "rtf": round(elapsed / audio_s, 4) if audio_s else None,
+            "segments": len(segments),
+        }
+    return results
+
+
+def check_budgets(cases: dict[str, dict[str, Any]], budgets: dict[str, Any]) -> list[str]:
+    """
+    Violations of ``budgets``: ``{"median_ms": {pattern: max}, "rtf": {pattern: max}}``,
+    where patterns are fnmatch globs over case names. The first matching pattern wins.
+    """
+    violations = []
+    for name, result in cases.items():
+        for metric, limits in budgets.items():
+            value = result.get(metric)
+            if value is None:
+                continue
+            limit = next((v for pat, v in limits.items() if fnmatch.fnmatchcase(name, pat)), None)
+            if limit is not None and value > limit:
+                violations.append(f"{name}: {metric} {value} > budget {limit}")
+    return violations
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    if args.encoder == "hash":
+        registry.register("sbert", HashEncoder, replace=True)
+    cases = scoring_cases(tuple(args.words), tuple(args.key_points), args.min_time, args.seed)
+    clips = audio_files(args.audio)
+    if clips and not args.skip_whisper:
+        cases.update(whisper_cases(clips))
+    budgets = json.loads(Path(args.budgets).read_text()) if args.budgets else {}
+    return {
+        "meta": {
+            "encoder": args.encoder,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.time(),
+        },
+        "cases": cases,
+        "violations": check_budgets(cases, budgets),
+    }
+
+
+def _print_table(report: dict[str, Any]) -> None:
+    for name, r in report["cases"].items():
+        if "rtf" in r:
+            print(f"{name:<40} rtf {r['rtf']!s:>8}  ({r['elapsed_s']} s for {r['audio_s']} s)")
+        else:
+            print(
+                f"{name:<40} median {r['median_ms']:>9.3f} ms  p95 {r['p95_ms']:>9.3f} ms"
+                f"  peak {r['alloc_peak_kib']:>9.1f} KiB"
+            )
+    for v in report["violations"]:
+        print(f"OVER BUDGET  {v}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    p.add_argument("--encoder", choices=["model", "hash"], default="model")
+    p.add_argument("--words", type=int, nargs="+", default=list(WORD_COUNTS))
+    p.add_argument("--key-points", type=int, nargs="+", default=list(KEY_POINT_COUNTS))
+    p.add_argument("--min-time", type=float, default=MIN_TIME_S, help="seconds per case")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument(
+        "--audio", nargs="*", help="clips for the Whisper RTF (default: BENCH_AUDIO_DIR)"
+    )
+    p.add_argument("--skip-whisper", action="store_true")
+    p.add_argument("--budgets", default=str(BUDGETS_FILE), help="JSON budgets file ('' for none)")
+    p.add_argument("--out", help="write the JSON report here ('-' for stdout)")
+    args = p.parse_args(argv)
+
+    report = run(args)
+    if args.out == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        _print_table(report)
+        if args.out:
+            Path(args.out).write_text(json.dumps(report, indent=2))
+    return 1 if report["violations"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+# apps/api/tests/conftest.py
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Keep rendered test PDFs out of the working tree (must be set before app imports)
+os.environ.setdefault("PDF_CACHE_DIR", tempfile.mkdtemp(prefix="ic_pdf_cache_"))
+os.environ.setdefault("SPOOL_DIR", tempfile.mkdtemp(prefix="ic_spool_"))
+
+from app.model_registry import registry  # noqa: E402
+
+
+class FakeEncoder:
+    """Deterministic bag-of-words stand-in for SentenceTransformer.encode."""
+
+    dim = 64
+
+    def __init__(self) -> None:
+        self.calls: list[int] = []
+
+    def encode(self, sentences, convert_to_numpy=True, **_):
+        self.calls.append(len(sentences))
+        out = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for i, s in enumerate(sentences):
+            for tok in re.findall(r"\w+", s.lower()):
+                out[i, zlib.crc32(tok.encode()) % self.dim] += 1.0
+        return out
+
+
+@pytest.fixture
+def fake_encoder(monkeypatch):
+    """Serve a FakeEncoder as the "sbert" model so scoring runs without torch."""
+    enc = FakeEncoder()
+    # Loaded-model slot only: the real loader stays registered and is restored with it
+    monkeypatch.setattr(registry._entries["sbert"], "model", enc)
+    return enc
+
+
+class FakeWhisper:
+    """Stand-in for faster_whisper.WhisperModel returning a fixed transcript."""
+
+    def __init__(self, text: str = "um I did a root cause analysis and measured the impact"):
+        self.text = text
+        self.calls = 0
+
+    def transcribe(self, audio, **_):
+        self.calls += 1
+        seg = SimpleNamespace(start=0.0, end=len(audio) / 16000, text=f" {self.text} ")
+        return iter([seg]), SimpleNamespace(language="en", duration=len(audio) / 16000)
+
+    def detect_language(self, audio, **_):
+        return "en", 1.0, [("en", 1.0)]
+
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    """Serve a FakeWhisper as the "whisper" model; decoding yields 30 s of silence."""
+    from app.routers import transcribe
+
+    model = FakeWhisper()
+    monkeypatch.setattr(registry._entries["whisper"], "model", model)
+    monkeypatch.setattr(
+        transcribe, "decode_audio", lambda source: np.zeros(30 * 16000, dtype=np.float32)
+    )
+    return model
+
+
+class FakeRedis:
+    """Just enough of redis.Redis (strings with NX/EX, lists, hashes, publish) for our keys."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+        self.lists: dict[str, list[bytes]] = {}
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+        self.expires: dict[str, int] = {}
+        self.published: list[tuple[str, str]] = []
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        if ex is not None:
+            self.expires[key] = ex
+        return True
+
+    def ttl(self, key):
+        return self.expires.get(key, -1) if key in self.data else -2
+
+    def lpush(self, key, *values):
+        self.lists.setdefault(key, [])[:0] = [str(v).encode() for v in reversed(values)]
+        return len(self.lists[key])
+
+    def ltrim(self, key, start, end):
+        self.lists[key] = self.lists.get(key, [])[start : None if end == -1 else end + 1]
+
+    def lrange(self, key, start, end):
+        return self.lists.get(key, [])[start : None if end == -1 else end + 1]
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field.encode()] = str(value).encode()
+        return 1
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def expire(self, key, seconds):
+        self.expires[key] = seconds
+        return True
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    def decr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) - 1).encode()
+        return int(self.data[key])
+
+    def delete(self, *keys):
+        return sum(
+            (self.data.pop(k, None) is not None) + (self.hashes.pop(k, None) is not None)
+            for k in keys
+        )
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    def pipeline(self):
+        return self
+
+    def watch(self, *keys):
+        pass
+
+    def multi(self):
+        pass
+
+    def execute(self):
+        return []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    """Keep every Redis key (caches, dedupe, progress, catalog, admission) off any real Redis."""
+    from app import admission, checkpoints, progress
+    from app.questions import catalog
+    from app.routers import jobs
+    from app.transcript_cache import cache
+
+    r = FakeRedis()
+    monkeypatch.setattr(cache, "connection", r)
+    monkeypatch.setattr(catalog, "connection", r)
+    monkeypatch.setattr(jobs, "redis", r)
+    monkeypatch.setattr(progress, "redis", r)
+    monkeypatch.setattr(admission, "redis", r)
+    monkeypatch.setattr(checkpoints, "redis", r)
+    return r
+
+
+class FakeJob:
+    """The parts of rq.job.Job the routers and tasks touch: id, args, meta, status."""
+
+    def __init__(self, id, func=None, args=(), meta=None, description=None, status="queued"):
+        self.id = id
+        self.func = func
+        self.args = args
+        self.meta = meta if meta is not None else {}
+        self.description = description
+        self.status = status
+        self.origin = None
+        self.kwargs: dict = {}
+
+    def get_id(self):
+        return self.id
+
+    def get_status(self):
+        return self.status
+
+    def save_meta(self):
+        pass
+
+
+class FakeQueue:
+    """Records enqueues as FakeJobs in the shared FakeRQ instead of pushing to Redis."""
+
+    def __init__(self, rq: FakeRQ, name: str) -> None:
+        self.rq = rq
+        self.name = name
+        self.count = 0
+
+    def enqueue(self, func, *args, job_id=None, meta=None, description=None, **kwargs):
+        job = FakeJob(job_id or f"{self.name}-{len(self.rq.enqueued)}", func, args, meta)
+        job.description, job.origin, job.kwargs = description, self.name, kwargs
+        self.rq.enqueued.append(job)
+        self.rq.jobs[job.id] = job
+        return job
+
+
+class FakeRQ:
+    """Every queue the app enqueues on, plus Job.fetch over what was enqueued."""
+
+    def __init__(self, monkeypatch) -> None:
+        self.monkeypatch = monkeypatch
+        self.enqueued: list[FakeJob] = []
+        self.jobs: dict[str, FakeJob] = {}
+
+    def job(self, id, func=None, args=(), **kwargs) -> FakeJob:
+        """A job as a worker would pick it up, fetchable by id."""
+        self.jobs[id] = FakeJob(id, func, args, **kwargs)
+        return self.jobs[id]
+
+    def fetch(self, job_id, connection=None):
+        from rq.exceptions import NoSuchJobError
+
+        if job_id not in self.jobs:
+            raise NoSuchJobError(job_id)
+        return self.jobs[job_id]
+
+    def run(self, job, func=None):
+        """Execute ``job`` the way a worker would, with it as the current job."""
+        from app import tasks
+
+        self.monkeypatch.setattr(tasks, "get_current_job", lambda: job)
+        return (func or job.func)(*job.args)
+
+
+@pytest.fixture
+def fake_rq(monkeypatch):
+    """Swap the RQ queues for FakeQueues; ``fake_rq.enqueued`` lists jobs in enqueue order."""
+    from rq.job import Job
+
+    from app import queues
+    from app.routers import jobs
+
+    rq = FakeRQ(monkeypatch)
+    hi, normal = FakeQueue(rq, queues.TRANSCRIBE_HI_QUEUE), FakeQueue(rq, queues.TRANSCRIBE_QUEUE)
+    for module in (jobs, queues):
+        monkeypatch.setattr(module, "transcribe_hi_q", hi)
+        monkeypatch.setattr(module, "transcribe_q", normal)
+    monkeypatch.setattr(queues, "score_q", FakeQueue(rq, queues.SCORE_QUEUE))
+    monkeypatch.setattr(queues, "persist_q", FakeQueue(rq, queues.PERSIST_QUEUE))
+    monkeypatch.setattr(queues, "pdf_q", FakeQueue(rq, queues.PDF_QUEUE))
+    monkeypatch.setattr(Job, "fetch", staticmethod(rq.fetch))
+    return rq
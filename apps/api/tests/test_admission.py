@@ -0,0 +1,77 @@
+# apps/api/tests/test_admission.py
+from __future__ import annotations
+
+import pytest
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app import admission
+
+
+class _Queue:
+    def __init__(self, count: int) -> None:
+        self.count = count
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    n = {"value": 2}
+    monkeypatch.setattr(admission.Worker, "count", lambda connection=None, queue=None: n["value"])
+    return n
+
+
+def test_recent_job_s_is_median_of_recorded_durations(fake_redis):
+    assert admission.recent_job_s() == admission.DEFAULT_JOB_S
+    for s in (4.0, 6.0, 500.0):
+        admission.record_job_duration(s)
+    assert admission.recent_job_s() == 6.0
+
+
+def test_queue_depth_cap_is_503(monkeypatch, fake_redis, workers):
+    monkeypatch.setattr(admission, "ENQUEUE_MAX_QUEUE_DEPTH", 10)
+    with pytest.raises(HTTPException) as exc:
+        admission.check_queue(_Queue(10))
+    assert exc.value.status_code == 503 and int(exc.value.headers["Retry-After"]) >= 1
+
+
+def test_drain_estimate_sets_retry_after(monkeypatch, fake_redis, workers):
+    monkeypatch.setattr(admission, "ENQUEUE_MAX_DRAIN_S", 60)
+    for _ in range(3):
+        admission.record_job_duration(10.0)
+
+    load = admission.check_queue(_Queue(12))  # 12 jobs * 10 s / 2 workers = 60 s
+    assert load.drain_s == 60
+
+    with pytest.raises(HTTPException) as exc:
+        admission.check_queue(_Queue(20))  # 100 s of work, 40 s over
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "40"
+
+    workers["value"] = 4
+    assert admission.check_queue(_Queue(20)).drain_s == 50
+
+
+def test_session_rate_limit_is_429(monkeypatch, fake_redis):
+    monkeypatch.setattr(admission, "ENQUEUE_SESSION_LIMIT", 2)
+    admission.check_session_rate(1)
+    admission.check_session_rate(1)
+    with pytest.raises(HTTPException) as exc:
+        admission.check_session_rate(1)
+    assert exc.value.status_code == 429
+    assert exc.value.headers["Retry-After"] == str(admission.ENQUEUE_SESSION_WINDOW_S)
+    admission.check_session_rate(2)  # other sessions are unaffected
+
+
+def test_redis_errors_admit(monkeypatch):
+    class _Down:
+        def __getattr__(self, name):
+            def fail(*a, **kw):
+                raise RedisConnectionError("down")
+
+            return fail
+
+    monkeypatch.setattr(admission, "redis", _Down())
+    monkeypatch.setattr(admission.Worker, "count", lambda connection=None, queue=None: 1)
+    assert admission.check_queue(_Queue(5)) is None
+    admission.check_session_rate(1)
+    admission.record_job_duration(1.0)
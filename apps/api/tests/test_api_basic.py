@@ -34,8 +34,9 @@ def temp_sqlite_engine():
 def client():
     # set up a clean SQLite DB and patch the global engine used by the app
     with temp_sqlite_engine() as engine:
-        # replace the app’s engine
+        # replace the app’s engines (sync for setup/tasks, async for the routes)
         app_db.engine = engine  # monkeypatch the module global
+        app_db.async_engine = app_db.make_async_engine(str(engine.url))
 
         # create tables
         SQLModel.metadata.create_all(engine)
@@ -90,6 +91,15 @@ def test_health(client: TestClient):
     assert r.json() == {"status": "ok"}
 
 
+def test_ready_without_warmup(client: TestClient):
+    r = client.get("/ready")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["status"] == "ready"
+    # importing the app must not load any model
+    assert not any(m["loaded"] for m in body["models"].values())
+
+
 def test_questions(client: TestClient):
     r = client.get("/questions/SWE")
     assert r.status_code == 200
@@ -99,6 +109,27 @@ def test_questions(client: TestClient):
     assert "key_points" in data[0]
 
 
+def test_analyze_text_batch(client: TestClient, fake_encoder):
+    items = [
+        {"transcript": "Um, the root cause analysis showed the impact.", "question_id": 1},
+        {"transcript": "We set requirements and monitoring.", "question_id": 2},
+        {"transcript": "No key points here.", "question_id": 99},
+    ]
+    r = client.post("/analyze_text/batch", json={"items": items})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["count"] == 3
+    results = body["results"]
+    assert "root cause analysis" in results[0]["coverage"]["matched"]
+    assert results[0]["filler"]["counts"]["um"] == 1
+    assert "monitoring" in results[1]["coverage"]["matched"]
+    assert results[2]["coverage"] == {"matched": [], "score": 0.0}
+
+    # per-item endpoint agrees with the batched one
+    single = client.post("/analyze_text", json=items[0]).json()
+    assert single["coverage"] == results[0]["coverage"]
+
+
 def test_create_session_and_report_json(client: TestClient):
     # create session
     r = client.post("/sessions", json={"role": "SWE", "question_id": 1})
@@ -137,6 +168,49 @@ def test_create_session_and_report_json(client: TestClient):
     assert body["matched"] == ["root cause analysis"]
 
 
+def test_report_follows_latest_analysis_pointer(client: TestClient):
+    from sqlalchemy import inspect
+    from sqlmodel import Session as DBSession
+
+    from app.models import Session as SessionModel
+
+    sid = client.post("/sessions", json={"role": "SWE", "question_id": 1}).json()["session_id"]
+    for text in ("one", "two"):
+        r = client.post(
+            "/sessions/save",
+            json={"session_id": sid, "transcript": text, "duration_s": 60.0, "metrics": {}},
+        )
+    latest_id = r.json()["analysis_id"]
+
+    with DBSession(app_db.engine) as db:
+        assert db.get(SessionModel, sid).latest_analysis_id == latest_id
+        # rows that bypass add_analysis don't move the pointer
+        db.add(Analysis(session_id=sid, transcript="direct insert", metrics={}))
+        db.commit()
+        # the pointer never moves back to an older row
+        sess = db.get(SessionModel, sid)
+        sess.latest_analysis_id = 10**9
+        app_db.add_analysis(db, Analysis(session_id=sid, transcript="late", metrics={}))
+        assert sess.latest_analysis_id == 10**9
+        db.rollback()
+
+    assert client.get(f"/report/{sid}").json()["transcript"] == "two"
+    indexes = {ix["name"] for ix in inspect(app_db.engine).get_indexes("analysis")}
+    assert "ix_analysis_session_created" in indexes
+
+
+def test_async_engine_urls():
+    assert app_db.async_url("postgresql://u:p@db/coach") == "postgresql+asyncpg://u:p@db/coach"
+    assert app_db.async_url("postgresql+psycopg2://db/coach") == "postgresql+asyncpg://db/coach"
+    assert app_db.async_url("sqlite:///./dev.db") == "sqlite+aiosqlite:///./dev.db"
+
+    opts = app_db._engine_options("postgresql://db/coach", is_async=True)
+    assert opts["pool_pre_ping"] and opts["pool_size"] == app_db.DB_POOL_SIZE
+    assert opts["connect_args"]["server_settings"]["statement_timeout"] == str(
+        app_db.DB_STATEMENT_TIMEOUT_MS
+    )
+
+
 def test_report_pdf_streams_pdf(client: TestClient):
     # create session + analysis
     r = client.post("/sessions", json={"role": "SWE", "question_id": 1})
@@ -165,3 +239,489 @@ def test_report_pdf_streams_pdf(client: TestClient):
     assert r.status_code == 200
     assert r.headers["content-type"] == "application/pdf"
     assert b"%PDF" in r.content
+
+
+def test_report_pdf_cached_with_etag(client: TestClient, monkeypatch):
+    r = client.post("/sessions", json={"role": "SWE", "question_id": 1})
+    session_id = r.json()["session_id"]
+
+    from sqlmodel import Session as DBSession
+
+    with DBSession(app_db.engine) as db:
+        db.add(Analysis(session_id=session_id, transcript="cache me", metrics={"overall": 0.5}))
+        db.commit()
+
+    renders = []
+
+    async def _counting_html_to_pdf(html: str) -> bytes:
+        renders.append(html)
+        return b"%PDF-1.4\n% cached\n"
+
+    monkeypatch.setattr(report_pdf_router, "html_to_pdf", _counting_html_to_pdf)
+
+    first = client.get(f"/report/{session_id}/pdf")
+    second = client.get(f"/report/{session_id}/pdf")
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content
+    assert len(renders) == 1  # second download served from the cache
+
+    etag = first.headers["etag"]
+    r = client.get(f"/report/{session_id}/pdf", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert len(renders) == 1
+
+
+def test_report_pdf_worker_mode(client: TestClient, fake_rq, monkeypatch):
+    from app import tasks
+
+    r = client.post("/sessions", json={"role": "SWE", "question_id": 1})
+    session_id = r.json()["session_id"]
+
+    from sqlmodel import Session as DBSession
+
+    with DBSession(app_db.engine) as db:
+        row = Analysis(session_id=session_id, transcript="worker pdf", metrics={"overall": 0.4})
+        db.add(row)
+        db.commit()
+        db.refresh(row)
+        analysis_id = row.id
+
+    monkeypatch.setattr(report_pdf_router, "PDF_RENDER_MODE", "worker")
+
+    r = client.get(f"/report/{session_id}/pdf")
+    assert r.status_code == 202
+    job_id = f"pdf-{analysis_id}-{report_pdf_router.TEMPLATE_HASH}"
+    assert r.json()["poll_url"] == f"/jobs/{job_id}"
+    [job] = fake_rq.enqueued
+    assert (job.origin, job.func) == ("ic-pdf", tasks.render_report_pdf)
+    assert job.args == (analysis_id, session_id)
+
+    # the worker task renders into the shared cache; the API then serves it
+    result = fake_rq.run(job)
+    assert result["url"] == f"/report/{session_id}/pdf"
+
+    r = client.get(f"/report/{session_id}/pdf")
+    assert r.status_code == 200 and b"%PDF" in r.content
+    r = client.post(f"/report/{session_id}/pdf/render")
+    assert r.status_code == 200 and r.json()["ready"] is True
+    assert len(fake_rq.enqueued) == 1
+
+
+def test_enqueue_spools_upload_and_passes_reference(client: TestClient, fake_rq, monkeypatch):
+    from app import spool
+    from app.routers import jobs as jobs_router
+
+    audio = b"\x1aE\xdf\xa3" + b"\x01" * 4096
+    r = client.post("/jobs/enqueue?session_id=1", files={"file": ("rec.webm", audio)})
+    assert r.status_code == 202
+    job = fake_rq.enqueued[-1]
+    assert r.json()["poll_url"] == f"/jobs/{job.id}"
+
+    # the first pipeline stage, on the interactive lane for a short recording
+    assert job.origin == "ic-transcribe-hi" and job.func is jobs_router.transcribe_stage
+    session_id, key, filename, sha = job.args
+    assert (session_id, filename) == (1, "rec.webm")
+    assert isinstance(key, str) and spool.read_blob(key, sha) == audio
+    assert job.meta["blob"] == key
+    spool.discard(key)
+
+    monkeypatch.setattr(jobs_router, "PRIORITY_MAX_UPLOAD_BYTES", 1024)
+    r = client.post("/jobs/enqueue?session_id=2", files={"file": ("long.webm", audio)})
+    job = fake_rq.enqueued[-1]
+    assert r.status_code == 202 and job.origin == "ic-transcribe"
+    assert job.meta["lane"] == "normal"
+    spool.discard(job.args[1])
+
+
+def test_enqueue_checks_declared_size_before_admission(client: TestClient, fake_rq):
+    from app.routers import jobs as jobs_router
+
+    audio = b"\x1aE\xdf\xa3" + b"\x01" * 64
+    files = {"file": ("rec.webm", audio)}
+
+    r = client.post(
+        "/jobs/enqueue?session_id=3",
+        files=files,
+        headers={"content-length": str(jobs_router.MAX_UPLOAD_BYTES + 1)},
+    )
+    assert r.status_code == 413
+    assert fake_rq.enqueued == []
+
+    r = client.post("/jobs/enqueue?session_id=3", files=files, headers={"content-length": "abc"})
+    assert r.status_code == 202
+
+
+def test_pipeline_uses_decoded_duration(client: TestClient, fake_encoder, fake_whisper):
+    import asyncio
+    import io
+
+    from fastapi import UploadFile
+    from sqlmodel import Session as DBSession
+
+    from app import spool, tasks
+    from app.models import Session as SessionModel
+
+    r = client.post("/sessions", json={"role": "SWE", "question_id": 1})
+    session_id = r.json()["session_id"]
+    blob = asyncio.run(
+        spool.spool_upload(UploadFile(file=io.BytesIO(b"fake-webm"), filename="a.webm"), 1024)
+    )
+
+    metrics = tasks.run_full_pipeline(session_id, blob.key, "a.webm", blob.sha256)
+
+    # 11 words over 30 s of decoded audio => 22 WPM (not the old 60 s fallback)
+    assert metrics["duration_s"] == 30.0 and metrics["wpm"] == 22
+    assert metrics["language"] == "en"
+    assert "root cause analysis" in metrics["coverage"]["matched"]
+    with DBSession(app_db.engine) as db:
+        assert db.get(SessionModel, session_id).duration_s == 30.0
+    spool.discard(blob.key)
+
+
+def test_transcribe_upload_reports_queue_wait(client: TestClient, fake_whisper):
+    r = client.post("/transcribe/", files={"file": ("a.webm", b"audio bytes")})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["transcript"] == fake_whisper.text
+    assert float(r.headers["X-Queue-Wait-Ms"]) == body["queue_wait_ms"] >= 0
+    assert client.get("/transcribe/pool").json()["calls"] >= 1
+
+
+def test_transcribe_stream_websocket(client: TestClient, fake_whisper):
+    import numpy as np
+
+    pcm = np.zeros(16000 * 3, dtype="<i2").tobytes()
+    with client.websocket_connect("/transcribe/stream") as ws:
+        for i in range(0, len(pcm), 6400):
+            ws.send_bytes(pcm[i : i + 6400])
+        ws.send_text("stop")
+        msgs = [ws.receive_json()]
+        while msgs[-1]["type"] == "segment":
+            msgs.append(ws.receive_json())
+
+    final = msgs[-1]
+    assert final["type"] == "final"
+    assert final["transcript"] == fake_whisper.text
+    assert final["duration"] == 3.0
+    assert [m["text"] for m in msgs[:-1]] == [fake_whisper.text]
+
+
+def test_transcribe_stream_scores_incrementally(client: TestClient, fake_whisper, fake_encoder):
+    import numpy as np
+
+    pcm = np.zeros(16000 * 2, dtype="<i2").tobytes()
+    with client.websocket_connect("/transcribe/stream?role=SWE&question_id=1") as ws:
+        ws.send_bytes(pcm)
+        ws.send_text("stop")
+        msgs = [ws.receive_json()]
+        while msgs[-1]["type"] != "final":
+            msgs.append(ws.receive_json())
+
+    analysis = msgs[-1]["analysis"]
+    assert analysis["filler"]["total"] == 1  # "um"
+    assert {"root cause analysis", "impact"} <= set(analysis["coverage"]["matched"])
+
+
+def test_pipeline_batch_prepares_each_job(client: TestClient, fake_encoder, fake_rq, monkeypatch):
+    from sqlmodel import Session as DBSession
+    from sqlmodel import select
+
+    from app import tasks
+
+    sid = client.post("/sessions", json={"role": "SWE", "question_id": 1}).json()["session_id"]
+    texts = ["um root cause analysis and the impact", "I used tools and learned a lesson"]
+    monkeypatch.setattr(tasks.stt, "decode_audio", lambda source: source.getvalue())
+    monkeypatch.setattr(
+        tasks.stt, "transcribe_many", lambda audios: [("en", 30.0, a.decode()) for a in audios]
+    )
+    jobs = [
+        fake_rq.job(f"job-{i}", tasks.run_full_pipeline, (sid, text.encode(), "a.webm", None))
+        for i, text in enumerate(texts)
+    ]
+
+    fake_encoder.calls.clear()
+    prepared = tasks.prepare_pipeline_batch(jobs)
+    assert list(prepared) == ["job-0", "job-1"]
+    assert fake_encoder.calls == [2]  # both transcripts scored in one encode
+
+    for job in jobs:
+        job.prepared = prepared[job.id]  # handed over the way BatchWorker does
+    results = [fake_rq.run(job) for job in jobs]
+    assert fake_encoder.calls == [2]  # the jobs used the batch's scores
+    assert "root cause analysis" in results[0]["coverage"]["matched"]
+    assert results[0]["filler"]["total"] == 1 and results[1]["filler"]["total"] == 0
+    with DBSession(app_db.engine) as db:
+        rows = db.exec(select(Analysis).where(Analysis.session_id == sid)).all()
+    assert [r.transcript for r in rows] == texts
+
+
+def test_enqueue_is_idempotent_per_session_and_audio(client: TestClient, fake_rq):
+    audio = b"\x1aE\xdf\xa3" + b"\x02" * 4096
+
+    first = client.post("/jobs/enqueue?session_id=7", files={"file": ("a.webm", audio)}).json()
+    again = client.post("/jobs/enqueue?session_id=7", files={"file": ("b.webm", audio)}).json()
+    other = client.post("/jobs/enqueue?session_id=8", files={"file": ("a.webm", audio)}).json()
+
+    assert len(fake_rq.enqueued) == 2
+    assert again["job_id"] == first["job_id"] and again["deduplicated"] is True
+    assert other["job_id"] != first["job_id"] and other["deduplicated"] is False
+
+
+def test_enqueue_dedupe_waits_on_inflight_and_replaces_failed(
+    client: TestClient, fake_rq, fake_redis, monkeypatch
+):
+    import hashlib
+
+    from app.routers import jobs as jobs_router
+
+    monkeypatch.setattr(jobs_router, "DEDUPE_INFLIGHT_WAIT_S", 0.0)
+    audio = b"\x1aE\xdf\xa3" + b"\x03" * 4096
+    key = jobs_router._dedupe_key(9, hashlib.sha256(audio).hexdigest())
+
+    # an identical submit has reserved its id but not enqueued yet: share it, enqueue nothing
+    fake_redis.set(key, "reserved:inflight")
+    r = client.post("/jobs/enqueue?session_id=9", files={"file": ("a.webm", audio)}).json()
+    assert (r["job_id"], r["deduplicated"]) == ("inflight", True)
+    assert fake_rq.enqueued == []
+
+    # a confirmed owner that failed for good is taken over
+    fake_redis.set(key, "done")
+    fake_rq.job("done", status="failed")
+    r = client.post("/jobs/enqueue?session_id=9", files={"file": ("a.webm", audio)}).json()
+    assert r["deduplicated"] is False and r["job_id"] == fake_rq.enqueued[-1].id
+    assert fake_redis.get(key) == r["job_id"].encode()  # confirmed once enqueued
+
+
+def test_enqueue_admission_runs_before_spooling(client: TestClient, fake_rq, monkeypatch):
+    from app import admission, spool
+    from app.routers import jobs as jobs_router
+
+    spooled = []
+    spool_upload = spool.spool_upload
+
+    async def counting_spool_upload(file, max_bytes):
+        spooled.append(file.filename)
+        return await spool_upload(file, max_bytes)
+
+    monkeypatch.setattr(spool, "spool_upload", counting_spool_upload)
+    monkeypatch.setattr(admission, "ENQUEUE_SESSION_LIMIT", 2)
+    monkeypatch.setattr(admission, "ENQUEUE_MAX_QUEUE_DEPTH", 10)
+    monkeypatch.setattr(admission.Worker, "count", lambda connection=None, queue=None: 1)
+
+    def post(session_id, fill):
+        audio = b"\x1aE\xdf\xa3" + fill * 4096
+        return client.post(f"/jobs/enqueue?session_id={session_id}", files={"file": ("a", audio)})
+
+    jobs_router.transcribe_hi_q.count = 10
+    r = post(4, b"\x04")
+    assert r.status_code == 503 and "Retry-After" in r.headers and spooled == []
+    jobs_router.transcribe_hi_q.count = 0
+
+    # a deduplicated resubmit gives its rate slot back; new audio past the limit is 429
+    assert post(5, b"\x05").json()["deduplicated"] is False
+    assert post(5, b"\x05").json()["deduplicated"] is True
+    assert post(5, b"\x06").status_code == 202
+    assert post(5, b"\x07").status_code == 429 and len(spooled) == 3
+    assert len(fake_rq.enqueued) == 2
+
+
+def test_pipeline_reuses_cached_transcript(client: TestClient, fake_encoder, fake_whisper):
+    from app import tasks
+
+    sid = client.post("/sessions", json={"role": "SWE", "question_id": 1}).json()["session_id"]
+
+    first = tasks.run_full_pipeline(sid, b"same clip", "a.webm")
+    second = tasks.run_full_pipeline(sid, b"same clip", "a.webm")
+
+    assert fake_whisper.calls == 1
+    assert "transcribe" in first.pop("timings")
+    assert "transcribe" not in second.pop("timings")
+    assert first == second
+
+
+def test_job_events_stream(client: TestClient, fake_redis, monkeypatch):
+    import json
+
+    from app import progress
+    from app.routers import jobs as jobs_router
+
+    async def snapshot(job_id):
+        raw = fake_redis.get(progress.state_key(job_id))
+        return json.loads(raw) if raw else None
+
+    async def _start():
+        return None
+
+    monkeypatch.setattr(progress.hub, "snapshot", snapshot)
+    monkeypatch.setattr(progress.hub, "_start", _start)
+    monkeypatch.setattr(jobs_router, "_rq_snapshot", lambda job_id: None)
+
+    progress.publish("job-42", "saved", analysis_id=9)
+    r = client.get("/jobs/job-42/events")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    event, data = r.text.strip().split("\n")
+    assert event == "event: saved"
+    assert json.loads(data.removeprefix("data: "))["analysis_id"] == 9
+
+    assert client.get("/jobs/nope/events").status_code == 404
+
+    # a terminal event the hub never delivered (missed while resubscribing) still ends it
+    monkeypatch.setattr(jobs_router, "SSE_KEEPALIVE_S", 0.01)
+    reads = []
+
+    async def snapshot_then_saved(job_id):
+        reads.append(job_id)
+        if len(reads) == 3:  # after the stream's first two reads
+            progress.publish(job_id, "saved", analysis_id=10)
+        return await snapshot(job_id)
+
+    monkeypatch.setattr(progress.hub, "snapshot", snapshot_then_saved)
+    progress.publish("job-43", "scoring")
+    r = client.get("/jobs/job-43/events")
+    stages = [line for line in r.text.split("\n") if line.startswith("event: ")]
+    assert stages == ["event: scoring", "event: saved"]
+
+
+def test_metrics_endpoint_and_stage_timings(client: TestClient, fake_encoder, fake_whisper):
+    from sqlmodel import Session as DBSession
+    from sqlmodel import select
+
+    from app import tasks
+
+    sid = client.post("/sessions", json={"role": "SWE", "question_id": 1}).json()["session_id"]
+    result = tasks.run_full_pipeline(sid, b"timed clip", "a.webm")
+
+    timings = result["timings"]
+    assert {"decode", "transcribe", "embed", "score", "db_write", "total"} <= timings.keys()
+    assert timings["total"] >= timings["transcribe"]
+    # the stored row carries the finished breakdown, not the one from before the write
+    with DBSession(app_db.engine) as db:
+        row = db.exec(select(Analysis).where(Analysis.session_id == sid)).one()
+    assert row.metrics["timings"] == timings
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    body = r.text
+    assert 'ic_stage_seconds_count{stage="transcribe"}' in body
+    assert 'ic_stage_seconds_count{stage="embed"}' in body
+    assert 'ic_cache_requests_total{cache="transcript",result="miss"}' in body
+
+
+def test_queue_age_is_oldest_waiting_job_not_head(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+    from types import SimpleNamespace
+
+    from app import metrics
+
+    now = datetime.now(timezone.utc)
+    # an interactive-lane job enqueued at the front sits ahead of an older one
+    waiting = {
+        "front": SimpleNamespace(enqueued_at=now - timedelta(seconds=5)),
+        "older": SimpleNamespace(enqueued_at=(now - timedelta(seconds=90)).replace(tzinfo=None)),
+    }
+
+    class _Queue:
+        def __init__(self, name, connection=None):
+            self.name, self.count = name, len(waiting)
+
+        def get_job_ids(self, offset=0, length=-1):
+            return list(waiting)[offset : offset + length]
+
+    monkeypatch.setattr(metrics, "Queue", _Queue)
+    monkeypatch.setattr(
+        metrics.Job, "fetch_many", staticmethod(lambda ids, connection: [waiting[i] for i in ids])
+    )
+    depth, age = metrics.QueueCollector().collect()
+    assert {s.value for s in depth.samples} == {2}
+    assert all(89 <= s.value < 100 for s in age.samples)
+
+
+def test_pipeline_runs_as_chained_stage_jobs(
+    client: TestClient, fake_encoder, fake_whisper, fake_redis, fake_rq
+):
+    import json
+
+    from app import progress, tasks
+
+    sid = client.post("/sessions", json={"role": "SWE", "question_id": 1}).json()["session_id"]
+    root = fake_rq.job(
+        "p1",
+        tasks.transcribe_stage,
+        (sid, b"chained clip", "a.webm"),
+        meta={"stage": "transcribe", "lane": "hi"},
+        description="session",
+    )
+    assert fake_rq.run(root) == {"language": "en", "duration_s": 30.0}
+    score_job = fake_rq.enqueued[-1]
+    assert (score_job.origin, score_job.func, score_job.id) == (
+        "ic-score",
+        tasks.score_stage,
+        "p1-score",
+    )
+    assert score_job.meta == {"pipeline": "p1", "stage": "score", "lane": "hi"}
+    assert score_job.kwargs["at_front"] is True and root.meta["next"] == "p1-score"
+
+    fake_encoder.calls.clear()
+    prepared = tasks.prepare_score_batch([score_job])
+    assert list(prepared) == ["p1-score"]
+    score_job.prepared = prepared["p1-score"]
+    fake_rq.run(score_job)
+    assert fake_encoder.calls == [1]  # scored once, in the batch
+    persist_job = fake_rq.enqueued[-1]
+    assert (persist_job.origin, persist_job.id) == ("ic-persist", "p1-persist")
+
+    metrics = fake_rq.run(persist_job)
+    assert metrics["duration_s"] == 30.0 and "root cause analysis" in metrics["coverage"]["matched"]
+    assert {"transcribe", "db_write", "total"} <= metrics["timings"].keys()
+    # every stage reports progress under the id the client polls
+    saved = json.loads(fake_redis.get(progress.state_key("p1")))
+    assert saved["stage"] == "saved" and saved["session_id"] == sid
+    assert fake_redis.get(progress.state_key("p1-persist")) is None
+
+
+def test_pipeline_retry_resumes_from_checkpoints(
+    client: TestClient, fake_encoder, fake_whisper, fake_redis, fake_rq, monkeypatch
+):
+    from sqlalchemy.exc import OperationalError
+    from sqlmodel import Session as DBSession
+    from sqlmodel import select
+
+    from app import checkpoints, tasks
+
+    sid = client.post("/sessions", json={"role": "SWE", "question_id": 1}).json()["session_id"]
+    job = fake_rq.job("r1")
+    monkeypatch.setattr(tasks, "get_current_job", lambda: job)
+    monkeypatch.setattr(tasks.transcripts, "get", lambda sha: None)  # only checkpoints help
+
+    add_analysis = app_db.add_analysis
+
+    def flaky(s, row):
+        monkeypatch.setattr(app_db, "add_analysis", add_analysis)
+        raise OperationalError("INSERT", {}, Exception("server closed the connection"))
+
+    monkeypatch.setattr(app_db, "add_analysis", flaky)
+    fake_encoder.calls.clear()
+    with pytest.raises(OperationalError):
+        tasks.run_full_pipeline(sid, b"retried clip", "a.webm")
+    assert checkpoints.load("r1").keys() == {"transcription", "metrics"}
+    encodes = len(fake_encoder.calls)
+
+    # the retry only redoes the DB write: no second transcription or scoring pass
+    metrics = tasks.run_full_pipeline(sid, b"retried clip", "a.webm")
+    assert fake_whisper.calls == 1 and len(fake_encoder.calls) == encodes
+    assert "root cause analysis" in metrics["coverage"]["matched"]
+    assert checkpoints.load("r1") == {}
+
+    # a persist retry after its commit went through does not save the row twice
+    with DBSession(app_db.engine) as db:
+        rows = db.exec(select(Analysis).where(Analysis.session_id == sid)).all()
+    assert len(rows) == 1
+    checkpoints.save("r2", "analysis_id", rows[0].id)
+    job.id = "r2"
+    transcription = ("en", 30.0, rows[0].transcript)
+    assert tasks.persist_stage(sid, transcription, metrics, {}) == metrics
+    with DBSession(app_db.engine) as db:
+        assert len(db.exec(select(Analysis).where(Analysis.session_id == sid)).all()) == 1
+    assert checkpoints.load("r2") == {}
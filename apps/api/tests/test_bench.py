@@ -0,0 +1,29 @@
+# apps/api/tests/test_bench.py
+import random
+
+import bench
+from app.scoring import filler_stats
+
+
+def test_synthetic_transcript_shape():
+    rng = random.Random(1)
+    kps = bench.synthetic_key_points(10, rng)
+    text = bench.synthetic_transcript(500, kps, rng)
+    assert len(set(kps)) == 10
+    assert len(text.split()) == 500
+    assert filler_stats(text)["total"] > 0
+    assert kps[0] in text
+
+
+def test_scoring_cases_and_budgets(fake_encoder):
+    cases = bench.scoring_cases((100,), (5,), min_time_s=0.0)
+    assert set(cases) == {"filler_stats/w100", "coverage_score/w100/kp5", "analyze/w100/kp5"}
+    assert all(c["runs"] >= bench.MIN_RUNS and c["median_ms"] > 0 for c in cases.values())
+
+    assert bench.check_budgets(cases, {"median_ms": {"*": 60_000}}) == []
+    over = bench.check_budgets(cases, {"median_ms": {"filler_stats/*": 0, "*": 60_000}})
+    assert len(over) == 1 and over[0].startswith("filler_stats/w100: median_ms")
+    # first matching pattern wins
+    over = bench.check_budgets(cases, {"median_ms": {"analyze/*": 60_000, "*": 0}})
+    assert len(over) == 2 and not any(v.startswith("analyze/") for v in over)
+    assert bench.check_budgets({"whisper_rtf/a.wav": {"rtf": 1.5}}, {"rtf": {"*": 1.0}})
@@ -0,0 +1,111 @@
+# apps/api/tests/test_browser_pool.py
+import asyncio
+
+import pytest
+
+from app.browser_pool import BrowserPool, _Generation
+
+
+class FakePage:
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.closed = False
+        self.crashed = False
+
+    async def version(self):
+        if self.crashed:
+            raise ConnectionError("browser gone")
+        return "HeadlessChrome/fake"
+
+    async def newPage(self):
+        return FakePage()
+
+    async def close(self):
+        self.closed = True
+
+
+def _pool(**kw) -> tuple[BrowserPool, list[FakeBrowser]]:
+    pool = BrowserPool(**kw)
+    launched: list[FakeBrowser] = []
+
+    async def _launch():
+        launched.append(FakeBrowser())
+        pool._stats["launches"] += 1
+        return _Generation(launched[-1])
+
+    pool._launch = _launch  # type: ignore[method-assign]
+    return pool, launched
+
+
+def test_reuses_browser_and_recycles_after_max_renders():
+    pool, launched = _pool(size=2, max_renders=3)
+
+    async def run():
+        for _ in range(5):
+            async with pool.page():
+                pass
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert len(launched) == 2
+    assert launched[0].closed and not launched[1].closed
+    assert pool.stats()["renders"] == 5 and pool.stats()["recycles"] == 1
+
+
+def test_replaces_crashed_browser():
+    pool, launched = _pool(size=1)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            async with pool.page():
+                launched[0].crashed = True
+                raise RuntimeError("render failed")
+        async with pool.page():
+            pass
+
+    asyncio.run(run())
+    assert len(launched) == 2
+    assert pool.stats()["failures"] == 1
+
+
+def test_bounds_concurrency():
+    pool, _ = _pool(size=2)
+    peak = 0
+
+    async def render():
+        nonlocal peak
+        async with pool.page():
+            peak = max(peak, pool.stats()["active"])
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(render() for _ in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_close_waits_for_retired_browsers():
+    pool, launched = _pool(size=1, max_renders=1)
+
+    class SlowBrowser(FakeBrowser):
+        async def close(self):
+            await asyncio.sleep(0.05)
+            self.closed = True
+
+    async def run():
+        await pool.start()
+        pool._gen.browser = launched[0] = SlowBrowser()
+        async with pool.page():
+            pass
+        async with pool.page():  # recycles the first browser in the background
+            pass
+        assert pool._closing and not launched[0].closed
+        await pool.close()
+
+    asyncio.run(run())
+    assert launched[0].closed and not pool._closing
@@ -0,0 +1,70 @@
+# apps/api/tests/test_inference_pool.py
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.inference_pool import InferencePool
+
+
+def test_runs_off_the_loop_and_sheds_load():
+    pool = InferencePool("test", concurrency=1, queue_size=1, queue_timeout_s=5)
+    release = threading.Event()
+
+    def blocking(x):
+        release.wait(5)
+        return x * 2
+
+    async def scenario():
+        first = asyncio.create_task(pool.run(blocking, 1))
+        await asyncio.sleep(0.05)
+        # the loop keeps serving other work while the call blocks its thread
+        ticks = 0
+        for _ in range(5):
+            await asyncio.sleep(0.001)
+            ticks += 1
+        second = asyncio.create_task(pool.run(blocking, 2))
+        await asyncio.sleep(0.05)
+        assert pool.stats()["running"] == 1 and pool.stats()["waiting"] == 1
+
+        with pytest.raises(HTTPException) as exc:
+            await pool.run(blocking, 3)
+        release.set()
+        return ticks, exc.value, await first, await second
+
+    try:
+        ticks, rejected, first, second = asyncio.run(scenario())
+    finally:
+        pool.close()
+    assert ticks == 5
+    assert rejected.status_code == 429 and int(rejected.headers["Retry-After"]) >= 1
+    assert first == (2, pytest.approx(0, abs=0.05))
+    assert second[0] == 4 and second[1] > 0.01  # waited for the first call to finish
+    assert pool.stats()["rejected_full"] == 1
+
+
+def test_queue_timeout_is_503_and_slot_outlives_cancellation():
+    pool = InferencePool("test", concurrency=1, queue_size=4, queue_timeout_s=0.05)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.create_task(pool.run(release.wait, 5))
+        await asyncio.sleep(0.02)
+        first.cancel()  # client went away; the thread is still busy
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as exc:
+            await pool.run(lambda: None)
+        release.set()
+        await asyncio.sleep(0.05)
+        result, _ = await pool.run(lambda: "free again")
+        return exc.value, result
+
+    try:
+        rejected, result = asyncio.run(scenario())
+    finally:
+        pool.close()
+    assert rejected.status_code == 503 and "Retry-After" in rejected.headers
+    assert result == "free again"
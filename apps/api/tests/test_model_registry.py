@@ -0,0 +1,82 @@
+# apps/api/tests/test_model_registry.py
+
+import pytest
+
+from app.model_registry import ModelRegistry
+
+
+def test_loads_on_first_use_only():
+    calls = []
+    reg = ModelRegistry()
+    reg.register("m", lambda: calls.append(1) or object())
+
+    assert not reg.is_loaded("m")
+    first = reg.get("m")
+    assert reg.get("m") is first
+    assert calls == [1]
+    assert reg.status()["models"]["m"]["loaded"] is True
+
+
+def test_register_replace_swaps_loader():
+    reg = ModelRegistry()
+    reg.register("m", lambda: "real")
+    reg.register("m", lambda: "ignored")
+    assert reg.get("m") == "real"
+
+    reg.register("m", lambda: "stand-in", replace=True)
+    assert reg.get("m") == "stand-in"
+
+
+def test_unload_idle_models():
+    reg = ModelRegistry(idle_unload_s=10)
+    reg.register("m", object)
+    reg.get("m")
+
+    assert reg.unload_idle() == []  # just used
+    entry_used = reg._entries["m"].last_used
+    assert reg.unload_idle(now=entry_used + 11) == ["m"]
+    assert not reg.is_loaded("m")
+    reg.get("m")  # reloads transparently
+    assert reg.status()["models"]["m"]["loads"] == 2
+
+
+def test_warmup_failure_marks_not_ready():
+    reg = ModelRegistry()
+
+    def _boom():
+        raise RuntimeError("no weights")
+
+    reg.register("bad", _boom)
+    assert reg.ready
+    with pytest.raises(RuntimeError):
+        reg.warmup(["bad"])
+    assert not reg.ready
+    assert "no weights" in reg.status()["error"]
+
+
+def test_begin_warmup_is_not_ready_until_warmup_finishes():
+    reg = ModelRegistry()
+    reg.register("m", object)
+    reg.begin_warmup()
+    assert not reg.ready and reg.status()["warmup"] == "warming"
+    reg.warmup(["m"])
+    assert reg.ready
+
+
+def test_get_never_returns_none_when_unloaded_concurrently():
+    from app.model_registry import _Entry
+
+    class _UnloadedAfterFirstRead(_Entry):
+        """An idle unload landing right after get() has seen the model."""
+
+        def __getattribute__(self, name):
+            value = super().__getattribute__(name)
+            if name == "model" and value is not None:
+                object.__setattr__(self, "model", None)
+            return value
+
+    reg = ModelRegistry()
+    reg.register("m", object)
+    model = reg.get("m")
+    reg._entries["m"] = _UnloadedAfterFirstRead(loader=object, model=model)
+    assert reg.get("m") is model
@@ -0,0 +1,57 @@
+# apps/api/tests/test_pdf_cache.py
+import asyncio
+import os
+
+from app.pdf_cache import PdfCache
+
+
+def test_single_flight_renders_once(tmp_path):
+    cache = PdfCache(str(tmp_path), max_bytes=1 << 20)
+    calls = 0
+
+    async def render():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return b"%PDF"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_render("k", render) for _ in range(5)))
+
+    assert asyncio.run(run()) == [b"%PDF"] * 5
+    assert calls == 1
+    assert cache.get("k") == b"%PDF"
+
+
+def test_cancelled_leader_does_not_fail_waiters(tmp_path):
+    cache = PdfCache(str(tmp_path), max_bytes=1 << 20)
+
+    async def render():
+        await asyncio.sleep(0.02)
+        return b"%PDF"
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_render("k", render))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_render("k", render))
+        await asyncio.sleep(0.005)
+        leader.cancel()
+        return await waiter, leader
+
+    data, leader = asyncio.run(run())
+    assert data == b"%PDF"
+    assert leader.cancelled()
+    assert cache.get("k") == b"%PDF"
+
+
+def test_lru_eviction_keeps_recent(tmp_path):
+    cache = PdfCache(str(tmp_path), max_bytes=1 << 20)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, b"x" * 10)
+        os.utime(cache.path(key), (i, i))  # deterministic ages: a oldest
+    # touch "a" so it becomes most recent, then overflow a smaller budget
+    cache.get("a")
+    cache.max_bytes = 25
+    cache.put("d", b"x" * 10)
+    assert cache.get("b") is None and cache.get("c") is None
+    assert cache.get("a") is not None and cache.get("d") is not None
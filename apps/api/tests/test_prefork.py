@@ -0,0 +1,52 @@
+# apps/api/tests/test_prefork.py
+from __future__ import annotations
+
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+
+from app.prefork import Supervisor, parse_pools, pool_for_slot
+
+
+def _wait_for(cond, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_supervisor_restarts_crashed_child_and_drains(tmp_path: Path):
+    def target(slot: int) -> None:
+        (tmp_path / f"{slot}-{os.getpid()}").touch()
+        time.sleep(60)
+
+    sup = Supervisor(2, target)
+    runner = threading.Thread(target=sup.run, daemon=True)
+    runner.start()
+    assert _wait_for(lambda: len(list(tmp_path.iterdir())) == 2)
+
+    victim = next(iter(sup.children))
+    slot = sup.children[victim][0]
+    os.kill(victim, signal.SIGKILL)
+    assert _wait_for(lambda: len(list(tmp_path.glob(f"{slot}-*"))) == 2)
+    assert sup.restarts == 1
+
+    sup.stop()
+    runner.join(timeout=10)
+    assert not runner.is_alive()
+    assert sup.children == {}
+
+
+def test_pools_assign_queues_per_slot():
+    pools = parse_pools("ic-transcribe-hi, ic-transcribe=2; ic-score,ic-persist;")
+    assert pools == [(["ic-transcribe-hi", "ic-transcribe"], 2), (["ic-score", "ic-persist"], 1)]
+    assert [pool_for_slot(pools, slot)[-1] for slot in range(3)] == [
+        "ic-transcribe",
+        "ic-transcribe",
+        "ic-persist",
+    ]
+    assert parse_pools("") == []
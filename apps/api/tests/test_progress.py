@@ -0,0 +1,80 @@
+# apps/api/tests/test_progress.py
+from __future__ import annotations
+
+import asyncio
+import json
+
+from app import progress
+from app.progress import ProgressHub
+
+
+def test_publish_records_and_broadcasts(fake_redis):
+    progress.publish("job-1", "saved", analysis_id=5)
+
+    ((channel, payload),) = fake_redis.published
+    assert channel == progress.PROGRESS_CHANNEL
+    assert json.loads(payload)["analysis_id"] == 5
+    assert json.loads(fake_redis.get(progress.state_key("job-1")))["stage"] == "saved"
+
+
+def test_hub_fans_out_one_subscription_by_job(monkeypatch):
+    hub = ProgressHub()
+    starts = []
+
+    async def _start():
+        starts.append(1)
+
+    monkeypatch.setattr(hub, "_start", _start)
+
+    async def scenario():
+        async with hub.subscribe("a") as qa1, hub.subscribe("a") as qa2, hub.subscribe("b") as qb:
+            assert hub.listeners() == 3
+            hub._dispatch(json.dumps({"job_id": "a", "stage": "scoring"}))
+            hub._dispatch(b"not json")
+            assert (await qa1.get())["stage"] == "scoring"
+            assert (await qa2.get())["stage"] == "scoring"
+            assert qb.empty()
+        assert hub.listeners() == 0
+
+    asyncio.run(scenario())
+    assert len(starts) == 3  # every subscriber shares the hub's single reader
+
+
+def test_start_waits_for_the_subscription_to_be_confirmed(monkeypatch):
+    hub = ProgressHub()
+    confirm = None
+
+    class _PubSub:
+        async def subscribe(self, channel):
+            pass
+
+        async def listen(self):
+            await confirm.wait()
+            yield {"type": "subscribe", "data": 1}
+            while True:
+                await asyncio.sleep(0.001)
+                yield {"type": "message", "data": json.dumps({"job_id": "a", "stage": "saved"})}
+
+        async def aclose(self):
+            pass
+
+    class _Redis:
+        def pubsub(self):
+            return _PubSub()
+
+    monkeypatch.setattr(hub, "_client", _Redis)
+
+    async def scenario():
+        nonlocal confirm
+        confirm = asyncio.Event()
+        listening = hub.subscribe("a")
+        entered = asyncio.create_task(listening.__aenter__())
+        await asyncio.sleep(0.01)
+        assert not entered.done()  # SUBSCRIBE not confirmed yet
+        confirm.set()
+        q = await entered
+        assert (await q.get())["stage"] == "saved"
+        await listening.__aexit__(None, None, None)
+        await hub.close()
+
+    asyncio.run(scenario())
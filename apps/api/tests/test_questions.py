@@ -0,0 +1,108 @@
+# apps/api/tests/test_questions.py
+from __future__ import annotations
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlmodel import Session as DBSession, SQLModel, create_engine
+
+import app.db as app_db
+from app.models import Question
+from app.questions import VERSION_KEY, QuestionCatalog
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'q.db'}")
+    SQLModel.metadata.create_all(engine)
+    with DBSession(engine) as s:
+        s.add_all(
+            [
+                Question(id=1, role="SWE", text="Bug?", key_points=["impact", "tools used"]),
+                Question(id=2, role="pm", text="Roadmap?", key_points=["trade-offs"]),
+            ]
+        )
+        s.commit()
+    monkeypatch.setattr(app_db, "engine", engine)
+    return engine
+
+
+def test_snapshot_indexes_by_id_and_role(engine, fake_redis):
+    cat = QuestionCatalog(connection=fake_redis, check_s=60)
+    snap = cat.snapshot()
+    assert snap.by_id[1].key_points == ("impact", "tools used")
+    assert [q.id for q in snap.by_role["PM"]] == [2]
+    with pytest.raises(TypeError):
+        snap.by_id[3] = snap.by_id[1]  # type: ignore[index]
+    assert cat.snapshot() is snap and cat.loads == 1
+
+
+def test_version_bump_reloads(engine, fake_redis):
+    cat = QuestionCatalog(connection=fake_redis, check_s=0)
+    cat.snapshot()
+    cat.snapshot()
+    assert cat.loads == 1  # version unchanged: no reload
+
+    with DBSession(engine) as s:
+        s.add(Question(id=3, role="SWE", text="Design?", key_points=["scalability"]))
+        s.commit()
+    fake_redis.incr(VERSION_KEY)  # another process changed the table
+    assert 3 in cat.snapshot().by_id and cat.loads == 2
+
+
+def test_snapshot_survives_invalidate_right_after_refresh(engine, fake_redis):
+    import asyncio
+    import threading
+
+    cat = QuestionCatalog(connection=fake_redis, check_s=0)
+
+    class _InvalidatedOnRelease:
+        """The catalog lock, with another thread's invalidate() landing as it is released."""
+
+        lock = threading.Lock()
+
+        def __enter__(self):
+            self.lock.acquire()
+
+        def __exit__(self, *exc):
+            cat._snap = None
+            self.lock.release()
+
+    cat._lock = _InvalidatedOnRelease()
+    assert 1 in cat.snapshot().by_id
+    assert 1 in asyncio.run(cat.asnapshot()).by_id
+
+
+def test_embeddings_backfilled_once(engine, fake_redis, fake_encoder):
+    cat = QuestionCatalog(connection=fake_redis, check_s=60)
+    assert cat.get(1).kp_embeddings is None
+
+    q = cat.get(1, embedded=True)
+    assert q.kp_embeddings.shape == (2, fake_encoder.dim)
+    assert not q.kp_embeddings.flags.writeable
+    assert fake_redis.get(VERSION_KEY) == b"1"
+    fake_encoder.calls.clear()
+    assert cat.get(2, embedded=True).kp_embeddings is not None
+    assert fake_encoder.calls == []  # every question was backfilled in the same pass
+
+
+def test_init_db_seeds_without_encoding(tmp_path, monkeypatch, fake_redis, fake_encoder):
+    monkeypatch.setattr(app_db, "engine", create_engine(f"sqlite:///{tmp_path / 'seed.db'}"))
+    app_db.init_db()
+    assert fake_encoder.calls == []
+
+    cat = QuestionCatalog(connection=fake_redis, check_s=60)
+    [first, *_] = cat.snapshot().by_role["SWE"]
+    assert first.kp_embeddings is None
+    assert cat.get(first.id, embedded=True).kp_embeddings is not None
+    assert fake_encoder.calls
+
+
+def test_redis_outage_falls_back_to_reloading(engine):
+    class DownRedis:
+        def get(self, key):
+            raise RedisConnectionError("down")
+
+    cat = QuestionCatalog(connection=DownRedis(), check_s=0)
+    assert cat.snapshot().by_id[1].text == "Bug?"
+    cat.snapshot()
+    assert cat.loads == 2
@@ -1,6 +1,16 @@
 # apps/api/tests/test_scoring_fast.py
 
-from app.scoring import words_per_minute, filler_stats
+from app.scoring import (
+    ROLE_FILLERS,
+    IncrementalAnalyzer,
+    analyze,
+    coverage_batch,
+    coverage_score,
+    filler_stats,
+    text_stats,
+    words_per_minute,
+)
+from app.text_stats import TextScanner
 
 
 def test_wpm_zero_duration():
@@ -28,3 +38,79 @@ def test_filler_word_boundaries():
     stats = filler_stats(text)
     # at least the explicit "Um" and "um" should count = 2
     assert stats["counts"]["um"] >= 2
+
+
+def test_coverage_batch_matches_per_item(fake_encoder):
+    kp_a = ["root cause analysis", "debugging steps", "impact"]
+    kp_b = ["requirements", "trade-offs", "scalability"]
+    transcripts = [
+        "I did a root cause analysis and measured the impact.",
+        "We gathered requirements and weighed trade-offs.",
+        "",
+        "Debugging steps were logging and bisecting.",
+    ]
+    kps = [kp_a, kp_b, kp_a, kp_a]
+
+    single = [coverage_score(t, k) for t, k in zip(transcripts, kps)]
+    fake_encoder.calls.clear()
+    batch = coverage_batch(transcripts, kps)
+
+    assert batch == single
+    # one encode for all transcripts, one per distinct key-point set
+    assert fake_encoder.calls == [3, 3, 3]
+
+
+def test_coverage_uses_stored_kp_embeddings(fake_encoder):
+    kp = ["impact", "tools used"]
+    stored = fake_encoder.encode(kp)
+    fake_encoder.calls.clear()
+    res = coverage_score("The impact was big.", kp, stored)
+    assert fake_encoder.calls == [1]  # transcript only
+    assert "impact" in res["matched"]
+
+
+def test_text_stats_single_pass():
+    text = "Um, the root-cause analysis — you know — showed the impact. You. Know."
+    stats = text_stats(text, "SWE", ["root cause analysis", "impact", "tools used"])
+    assert stats.word_count == len(text.split())
+    assert stats.kp_hits == [True, True, False]
+    assert stats.filler_counts["um"] == 1
+    # clause punctuation breaks a phrase: "You. Know." is not a filler
+    assert stats.filler_counts["you know"] == 1
+
+
+def test_text_scanner_streams_across_segments():
+    scanner = TextScanner(("you know",), ("lesson learned",))
+    for seg in ["and, you", "know, the lesson", "learned was"]:
+        scanner.feed(seg)
+    stats = scanner.stats()
+    assert stats.filler_counts == {"you know": 1}
+    assert stats.kp_hits == [True]
+    assert stats.word_count == 7
+
+
+def test_role_filler_lexicon(monkeypatch):
+    monkeypatch.setitem(ROLE_FILLERS, "PM", {"so yeah", "um"})
+    stats = filler_stats("So yeah, um, like I said", role="PM")
+    assert stats["counts"] == {"so yeah": 1, "um": 1}
+    assert filler_stats("like", role="SWE")["counts"]["like"] == 1
+
+
+def test_incremental_analyzer_matches_full_pass(fake_encoder):
+    kps = ["root cause analysis", "impact", "monitoring"]
+    segments = ["um so I did a root", "cause analysis, you know,", "and measured the impact"]
+    inc = IncrementalAnalyzer("SWE", kps)
+
+    live = inc.update(segments[0], end_s=3.0)
+    assert live["filler"]["total"] == 1 and live["wpm"] == 120
+    fake_encoder.calls.clear()
+    for i, seg in enumerate(segments[1:], start=2):
+        inc.update(seg, end_s=3.0 * i)
+    assert fake_encoder.calls == [1, 1]  # only the new segment is encoded each time
+
+    final = inc.result()
+    full = analyze(" ".join(segments), "SWE", kps, 9.0)
+    assert final["filler"] == full["filler"]
+    assert final["wpm"] == full["wpm"]
+    assert {"root cause analysis", "impact"} <= set(final["coverage"]["matched"])
+    assert "monitoring" not in final["coverage"]["matched"]
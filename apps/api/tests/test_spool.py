@@ -0,0 +1,50 @@
+# apps/api/tests/test_spool.py
+import asyncio
+import hashlib
+import io
+import os
+import time
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app import spool
+
+
+def _upload(data: bytes, name: str = "a.webm") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=name)
+
+
+def test_spool_upload_hashes_and_stores():
+    data = b"RIFF" + b"\x00" * (3 * spool.CHUNK_SIZE + 17)
+    blob = asyncio.run(spool.spool_upload(_upload(data), max_bytes=len(data)))
+    assert blob.size == len(data)
+    assert blob.sha256 == hashlib.sha256(data).hexdigest()
+    assert blob.key.endswith(".webm")
+    assert spool.read_blob(blob.key, blob.sha256) == data
+    spool.discard(blob.key)
+    assert not spool.path_for(blob.key).exists()
+
+
+def test_spool_upload_enforces_limit_while_streaming():
+    before = set(spool.path_for("x").parent.glob("*"))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(spool.spool_upload(_upload(b"x" * (2 * spool.CHUNK_SIZE)), max_bytes=1024))
+    assert exc.value.status_code == 413
+    assert set(spool.path_for("x").parent.glob("*")) == before  # partial file removed
+
+
+def test_blob_keys_cannot_escape_spool():
+    with pytest.raises(ValueError):
+        spool.path_for("../etc/passwd")
+
+
+def test_asweep_removes_stale_blobs_at_most_once_per_interval(monkeypatch):
+    monkeypatch.setattr(spool, "_last_sweep", 0.0)
+    blob = asyncio.run(spool.spool_upload(_upload(b"old clip"), max_bytes=1024))
+    old = time.time() - 3600
+    os.utime(spool.path_for(blob.key), (old, old))
+
+    assert asyncio.run(spool.asweep(max_age_s=60)) >= 1
+    assert not spool.path_for(blob.key).exists()
+    assert asyncio.run(spool.asweep(max_age_s=60)) == 0  # not due again yet
@@ -0,0 +1,213 @@
+# apps/api/tests/test_transcribe.py
+from __future__ import annotations
+
+import hashlib
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.routers import transcribe
+
+
+class FakeBatchedPipeline:
+    """Yields chunk segments out of order, as parallel decoding may."""
+
+    def __init__(self) -> None:
+        self.batch_sizes: list[int] = []
+
+    def transcribe(self, audio, batch_size=8, **_):
+        self.batch_sizes.append(batch_size)
+        segs = [
+            SimpleNamespace(start=30.0, end=58.5, text=" second chunk "),
+            SimpleNamespace(start=0.0, end=29.2, text=" first chunk "),
+            SimpleNamespace(start=60.0, end=75.0, text=" third chunk "),
+        ]
+        return iter(segs), SimpleNamespace(language="en", duration=len(audio) / 16000)
+
+
+def test_long_audio_uses_batched_chunks(fake_whisper, monkeypatch):
+    pipe = FakeBatchedPipeline()
+    monkeypatch.setattr(transcribe, "_batched_pipeline", lambda model: pipe)
+    monkeypatch.setattr(transcribe, "TRANSCRIBE_LONG_AUDIO_S", 60.0)
+
+    audio = np.zeros(90 * 16000, dtype=np.float32)
+    lang, segments = transcribe.transcribe_segments(audio)
+
+    assert lang == "en"
+    assert pipe.batch_sizes == [transcribe.TRANSCRIBE_BATCH_SIZE]
+    assert fake_whisper.calls == 0
+    assert [s["start"] for s in segments] == [0.0, 30.0, 60.0]
+    assert transcribe.join_segments(segments) == "first chunk second chunk third chunk"
+
+
+def test_short_audio_stays_sequential(fake_whisper, monkeypatch):
+    monkeypatch.setattr(transcribe, "_batched_pipeline", lambda model: 1 / 0)
+
+    lang, dur, text = transcribe.transcribe_bytes(b"not really audio")
+
+    assert (lang, dur) == ("en", 30.0)
+    assert text == fake_whisper.text
+    assert fake_whisper.calls == 1
+
+
+def _word_audio(ids):
+    """One second per word; the sample value encodes the word id."""
+    return np.concatenate([np.full(16000, i / 1000, dtype=np.float32) for i in ids])
+
+
+def _fake_window(windows):
+    def run(audio):
+        windows.append(len(audio) / 16000)
+        segs = [
+            {"start": float(k), "end": k + 1.0, "text": f"w{round(audio[k * 16000] * 1000)}"}
+            for k in range(len(audio) // 16000)
+        ]
+        return "en", segs
+
+    return run
+
+
+def test_pcm16_frames_may_split_a_sample():
+    from app.streaming import RollingTranscriber
+
+    rt = RollingTranscriber(_fake_window([]))
+    samples = np.array([1000, -2000, 3000, -4000, 5000], dtype="<i2")
+    raw = samples.tobytes()
+    for frame in (raw[:3], raw[3:4], raw[4:9], raw[9:]):  # odd-sized frames
+        rt.feed_pcm16(frame)
+
+    assert np.array_equal(rt._buf, samples.astype(np.float32) / 32768.0)
+
+
+def test_rolling_transcriber_finalizes_in_order():
+    from app.streaming import RollingTranscriber
+
+    windows: list[float] = []
+    rt = RollingTranscriber(_fake_window(windows), step_s=2, margin_s=1, max_window_s=25)
+    streamed = []
+    audio = _word_audio(range(1, 11))
+    for i in range(0, len(audio), 8000):  # half-second frames
+        rt.feed(audio[i : i + 8000])
+        if rt.ready():
+            streamed += rt.step_window()
+
+    assert streamed  # segments arrive before the recording stops
+    tail = rt.finish()
+    assert [s["text"] for s in streamed + tail] == [f"w{i}" for i in range(1, 11)]
+    assert [s["start"] for s in rt.segments] == [float(i) for i in range(10)]
+    # Each pass only re-reads the unfinalized tail, and stop leaves a few seconds at most
+    assert max(windows) <= 3
+    assert windows[-1] <= 2
+    assert rt.duration == 10.0
+
+
+def test_rolling_transcriber_cuts_one_unbroken_segment_at_max_window():
+    from app.streaming import RollingTranscriber
+
+    windows: list[float] = []
+
+    def monologue(audio):
+        # one segment that always runs to the live edge (no pause to cut at)
+        windows.append(len(audio) / 16000)
+        return "en", [{"start": 0.0, "end": len(audio) / 16000, "text": "and so on"}]
+
+    rt = RollingTranscriber(monologue, step_s=2, margin_s=1, max_window_s=6)
+    second = np.zeros(16000, dtype=np.float32)
+    for _ in range(60):
+        rt.feed(second)
+        if rt.ready():
+            rt.step_window()
+
+    assert max(windows) <= 6 + 2  # the window never grows past max_window + one step
+    assert len(rt.segments) >= 5 and rt.duration == 60.0
+
+
+def test_stream_refuses_sessions_over_the_limit(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.inference_pool import stream_sessions
+    from app.main import app
+
+    monkeypatch.setattr(stream_sessions, "active", stream_sessions.limit)
+    with TestClient(app).websocket_connect("/transcribe/stream") as ws:
+        assert ws.receive_json()["type"] == "error"
+        assert ws.receive()["code"] == 1013
+    assert stream_sessions.active == stream_sessions.limit
+
+
+class SlotPipeline:
+    """Reports which recording each 30 s slot came from (sample value = recording id)."""
+
+    def __init__(self) -> None:
+        self.languages: list[str | None] = []
+
+    def transcribe(self, audio, batch_size=8, clip_timestamps=None, language=None, **_):
+        self.languages.append(language)
+        segs = [
+            SimpleNamespace(
+                start=float(c["start"]),
+                end=float(c["end"]),
+                text=f" r{round(audio[c['start'] * 16000] * 10)} ",
+            )
+            for c in reversed(clip_timestamps)
+        ]
+        return iter(segs), SimpleNamespace(language=language)
+
+
+def _slot_model(fake_whisper, monkeypatch, languages):
+    """Batched decoding through SlotPipeline; recording id ``n`` speaks ``languages[n]``."""
+    pipe = SlotPipeline()
+    monkeypatch.setattr(transcribe, "_batched_pipeline", lambda model: pipe)
+    monkeypatch.setattr(
+        fake_whisper,
+        "detect_language",
+        lambda chunk: (languages[round(chunk[0] * 10)], 1.0, []),
+    )
+    # 20 s chunks of speech; silent stretches (value 0) have none
+    monkeypatch.setattr(
+        transcribe,
+        "_speech_chunks",
+        lambda audio: [audio[i : i + 320000] for i in range(0, len(audio), 320000) if audio[i]],
+    )
+    return pipe
+
+
+def test_transcribe_many_batches_recordings_without_mixing(fake_whisper, monkeypatch):
+    pipe = _slot_model(fake_whisper, monkeypatch, {1: "en", 2: "en"})
+    # recording 1 has two chunks, recording 2 has one, recording 3 none
+    audios = [np.full(n * 320000, v, dtype=np.float32) for n, v in ((2, 0.1), (1, 0.2), (1, 0.0))]
+
+    out = transcribe.transcribe_many(audios)
+
+    assert pipe.languages == ["en"]  # one batched call
+    assert [text for _, _, text in out] == ["r1 r1", "r2", ""]
+    assert [dur for _, dur, _ in out] == [40.0, 20.0, 20.0]
+    assert [lang for lang, _, _ in out] == ["en", "en", None]
+
+
+def test_batch_decodes_each_recording_in_its_own_language(fake_whisper, fake_rq, monkeypatch):
+    from app import tasks
+    from app.transcript_cache import cache
+
+    pipe = _slot_model(fake_whisper, monkeypatch, {1: "en", 2: "de", 3: "en"})
+    recordings = {b"one": (2, 0.1), b"two": (1, 0.2), b"three": (1, 0.3)}
+    monkeypatch.setattr(
+        transcribe,
+        "decode_audio",
+        lambda buf: np.full(recordings[buf.getvalue()][0] * 320000, recordings[buf.getvalue()][1]),
+    )
+    jobs = [
+        fake_rq.job(f"job-{i}", tasks.transcribe_stage, (1, audio, "a.webm", None))
+        for i, audio in enumerate(recordings)
+    ]
+
+    prepared = tasks.prepare_transcribe_batch(jobs)
+
+    assert sorted(pipe.languages) == ["de", "en"]  # one batched call per language
+    assert [prepared[job.id]["transcription"] for job in jobs] == [
+        ("en", 40.0, "r1 r1"),
+        ("de", 20.0, "r2"),
+        ("en", 20.0, "r3"),
+    ]
+    # what lands in the shared cache is what each recording gives on its own
+    assert cache.get(hashlib.sha256(b"two").hexdigest()) == ("de", 20.0, "r2")
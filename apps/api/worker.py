@@ -1,13 +1,107 @@
-from redis import Redis
-from rq import Queue, SimpleWorker
+import os
+import shutil
+import sys
+import tempfile
 
-LISTEN = ["ic-jobs"]
+from app.prefork import Supervisor, parse_pools, pool_for_slot
+
+CPUS = os.cpu_count() or 1
+# Children per group of queues (in priority order), so Whisper-heavy and light
+# children scale independently, e.g. "ic-transcribe-hi,ic-transcribe=2; ic-persist,ic-score=1".
+# Unset: WORKER_PROCESSES children that all listen to every queue.
+WORKER_POOLS = parse_pools(os.getenv("WORKER_POOLS", ""))
+# Job-executing children per container (each runs one job at a time)
+WORKER_PROCESSES = sum(n for _, n in WORKER_POOLS) or (
+    int(os.getenv("WORKER_PROCESSES", "0")) or max(1, CPUS // 2)
+)
+# Native threads per child (torch / BLAS / CTranslate2) so children don't oversubscribe cores
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", "0")) or max(1, CPUS // WORKER_PROCESSES)
+
+# Must be set before numpy / torch / the Whisper loader read them
+for _var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ.setdefault(_var, str(WORKER_THREADS))
+os.environ.setdefault("WHISPER_CPU_THREADS", str(WORKER_THREADS))
+
+# Prometheus: every child writes its samples here and the supervisor serves them
+# as one target. Must be set before prometheus_client is imported; wiped at
+# startup so counters from a previous run don't leak into this one.
+METRICS_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "ic-worker-metrics")
+)
+shutil.rmtree(METRICS_DIR, ignore_errors=True)
+os.makedirs(METRICS_DIR, exist_ok=True)
+# Port for the worker's /metrics (0 disables)
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9101"))
+
+from prometheus_client import start_http_server  # noqa: E402
+from redis import Redis  # noqa: E402
+from rq import Queue  # noqa: E402
+
+from app import db as app_db  # noqa: E402
+from app import metrics  # noqa: E402
+from app import tasks  # noqa: E402, F401  (registers the pipeline's models)
+from app.batch_worker import BatchWorker  # noqa: E402
+from app.model_registry import registry  # noqa: E402
+from app.queues import (  # noqa: E402
+    ALL_QUEUES,
+    JOBS_QUEUE,
+    REDIS_URL,
+    SCORE_QUEUE,
+    TRANSCRIBE_HI_QUEUE,
+    TRANSCRIBE_QUEUE,
+)
+
+LISTEN = ALL_QUEUES
+# Models the jobs on each queue use; a child only warms up what its queues need
+QUEUE_MODELS = {
+    TRANSCRIBE_HI_QUEUE: {"whisper"},
+    TRANSCRIBE_QUEUE: {"whisper"},
+    SCORE_QUEUE: {"sbert"},
+    JOBS_QUEUE: {"whisper", "sbert"},
+}
+# Loaded once in the supervisor and shared copy-on-write by every child.
+# Whisper is not listed: CTranslate2 starts native threads at load time and
+# those do not survive fork(), so each child loads its own copy instead.
+PRELOAD = [n.strip() for n in os.getenv("WORKER_PRELOAD", "sbert").split(",") if n.strip()]
+# Workers load both models up front so the first job does not pay for it
+WARMUP = [n.strip() for n in os.getenv("MODEL_WARMUP", "sbert,whisper").split(",") if n.strip()]
+
+
+def slot_queues(slot: int) -> list[str]:
+    return pool_for_slot(WORKER_POOLS, slot) if WORKER_POOLS else LISTEN
+
+
+def run_worker(slot: int = 0) -> None:
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(WORKER_THREADS)
+    # Never reuse DB / Redis sockets inherited from the supervisor
+    app_db.engine.dispose(close=False)
+    redis_conn = Redis.from_url(REDIS_URL)
+
+    listen = slot_queues(slot)
+    needed = set().union(*(QUEUE_MODELS.get(name, set()) for name in listen))
+    # No-op for models the supervisor already loaded
+    registry.warmup([name for name in WARMUP if name in needed])
+    queues = [Queue(name, connection=redis_conn) for name in listen]
+    # Jobs run in-process (no fork per job, which also avoids the macOS fork crash);
+    # analysis jobs that are ready together go through the models as one batch
+    worker = BatchWorker(queues, connection=redis_conn)
+    # The scheduler moves stage retries (delayed by their backoff interval) back onto
+    # their queue; RQ's scheduler lock keeps that to one worker at a time
+    worker.work(with_scheduler=True)
 
-# Connect to your local Redis (docker compose exposes 6379)
-redis_conn = Redis(host="redis", port=6379, db=0)
 
 if __name__ == "__main__":
-    queues = [Queue(name, connection=redis_conn) for name in LISTEN]
-    # Use SimpleWorker to avoid macOS fork crash
-    worker = SimpleWorker(queues, connection=redis_conn)
-    worker.work()
+    unknown = {name for names, _ in WORKER_POOLS for name in names} - set(ALL_QUEUES)
+    if unknown:
+        sys.exit(f"WORKER_POOLS names unknown queues: {', '.join(sorted(unknown))}")
+    if WORKER_METRICS_PORT:
+        # Stage timings and cache hits of every child (queue gauges come from the API)
+        start_http_server(WORKER_METRICS_PORT, registry=metrics.scrape_registry())
+    if WORKER_PROCESSES == 1 or sys.platform == "darwin":
+        run_worker()
+    else:
+        registry.warmup(PRELOAD)
+        supervisor = Supervisor(WORKER_PROCESSES, run_worker)
+        supervisor.install_signal_handlers()
+        supervisor.run()
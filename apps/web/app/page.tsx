@@ -154,6 +154,7 @@ export default function Dashboard() {
             <RecorderCard
               disabled={!sessionId || enqueueJob.isPending}
               onFile={handleFileReady}
+              questionId={question.id}
             />
 
             {!sessionId && (
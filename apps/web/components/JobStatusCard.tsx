@@ -2,16 +2,49 @@
 
 import React from "react";
 import { useQuery } from "@tanstack/react-query";
-import { api } from "@/lib/api";
-import type { JobStatus } from "@/lib/types";
+import { api, API_BASE } from "@/lib/api";
+import type { JobEvent, JobStatus } from "@/lib/types";
 
 interface JobStatusCardProps {
   jobId?: string;
   onFinished?: () => void;
 }
 
+// Pipeline stage (pushed over SSE) -> the status shown on the card
+const STAGE_STATUS: Record<JobEvent["stage"], JobStatus["status"]> = {
+  queued: "queued",
+  retrying: "queued",
+  transcribing: "started",
+  scoring: "started",
+  saved: "finished",
+  failed: "failed",
+};
+
 export default function JobStatusCard({ jobId, onFinished }: JobStatusCardProps) {
-  const { data: jobStatus, error } = useQuery({
+  const [event, setEvent] = React.useState<JobEvent | null>(null);
+  const [streamFailed, setStreamFailed] = React.useState(false);
+
+  // Progress is pushed by the API; polling is only the fallback when SSE is unavailable
+  React.useEffect(() => {
+    setEvent(null);
+    setStreamFailed(false);
+    if (!jobId) return;
+    const source = new EventSource(`${API_BASE}/jobs/${jobId}/events`);
+    const onEvent = (e: MessageEvent) => {
+      const data: JobEvent = JSON.parse(e.data);
+      setEvent(data);
+      if (data.stage === "saved" || data.stage === "failed") source.close();
+    };
+    for (const stage of Object.keys(STAGE_STATUS)) {
+      source.addEventListener(stage, onEvent);
+    }
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) setStreamFailed(true);
+    };
+    return () => source.close();
+  }, [jobId]);
+
+  const { data: polledStatus, error } = useQuery({
     queryKey: ["job", jobId],
     queryFn: async (): Promise<JobStatus | null> => {
       if (!jobId) return null;
@@ -19,9 +52,18 @@ export default function JobStatusCard({ jobId, onFinished }: JobStatusCardProps)
       return data;
     },
     refetchInterval: jobId ? 1200 : false,
-    enabled: !!jobId,
+    enabled: !!jobId && streamFailed,
   });
 
+  const jobStatus: JobStatus | null | undefined = event
+    ? {
+        id: event.job_id,
+        status: STAGE_STATUS[event.stage],
+        description: event.stage === "scoring" ? "Scoring your answer..." : undefined,
+        error: event.error ?? undefined,
+      }
+    : polledStatus;
+
   // Call onFinished when job completes (only once per job)
   const hasCalledOnFinished = React.useRef(false);
   React.useEffect(() => {
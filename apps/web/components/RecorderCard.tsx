@@ -1,18 +1,36 @@
 "use client";
 
 import { useState, useRef, useEffect } from "react";
+import { API_BASE } from "@/lib/api";
+import type { Analysis, StreamMessage } from "@/lib/types";
 
 interface RecorderCardProps {
   disabled?: boolean;
   onFile: (file: File) => void;
+  onTranscript?: (transcript: string) => void;
+  questionId?: number;
+  role?: string;
 }
 
-export default function RecorderCard({ disabled, onFile }: RecorderCardProps) {
+const STREAM_URL = `${API_BASE.replace(/^http/, "ws")}/transcribe/stream`;
+const STREAM_SAMPLE_RATE = 16000;
+
+export default function RecorderCard({
+  disabled,
+  onFile,
+  onTranscript,
+  questionId,
+  role = "SWE",
+}: RecorderCardProps) {
   const [recording, setRecording] = useState(false);
   const [mediaRecorder, setMediaRecorder] = useState<MediaRecorder | null>(null);
   const [mediaSupported, setMediaSupported] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [liveTranscript, setLiveTranscript] = useState("");
+  const [liveMetrics, setLiveMetrics] = useState<Analysis | null>(null);
   const chunks = useRef<Blob[]>([]);
+  const socket = useRef<WebSocket | null>(null);
+  const audioCtx = useRef<AudioContext | null>(null);
 
   useEffect(() => {
     // Check if MediaRecorder is supported
@@ -21,9 +39,63 @@ export default function RecorderCard({ disabled, onFile }: RecorderCardProps) {
     }
   }, []);
 
+  // Live transcript: stream 16 kHz PCM16 frames to the API while recording.
+  // Best effort only; the recorded file is still uploaded for full analysis.
+  const startStreaming = (stream: MediaStream) => {
+    try {
+      const params = new URLSearchParams({ role });
+      if (questionId !== undefined) params.set("question_id", String(questionId));
+      const ws = new WebSocket(`${STREAM_URL}?${params}`);
+      ws.binaryType = "arraybuffer";
+      ws.onmessage = (e) => {
+        const msg: StreamMessage = JSON.parse(e.data);
+        if (msg.type === "segment") {
+          setLiveTranscript((prev) => `${prev} ${msg.text}`.trim());
+        } else if (msg.type === "metrics") {
+          setLiveMetrics(msg);
+        } else if (msg.type === "final") {
+          setLiveTranscript(msg.transcript);
+          if (msg.analysis) setLiveMetrics(msg.analysis);
+          onTranscript?.(msg.transcript);
+          ws.close();
+        }
+      };
+      socket.current = ws;
+
+      const ctx = new AudioContext({ sampleRate: STREAM_SAMPLE_RATE });
+      const source = ctx.createMediaStreamSource(stream);
+      const processor = ctx.createScriptProcessor(4096, 1, 1);
+      processor.onaudioprocess = (e) => {
+        if (ws.readyState !== WebSocket.OPEN) return;
+        const input = e.inputBuffer.getChannelData(0);
+        const pcm = new Int16Array(input.length);
+        for (let i = 0; i < input.length; i++) {
+          pcm[i] = Math.max(-1, Math.min(1, input[i])) * 0x7fff;
+        }
+        ws.send(pcm.buffer);
+      };
+      source.connect(processor);
+      processor.connect(ctx.destination);
+      audioCtx.current = ctx;
+    } catch (err) {
+      console.warn("Live transcription unavailable:", err);
+    }
+  };
+
+  const stopStreaming = () => {
+    audioCtx.current?.close();
+    audioCtx.current = null;
+    if (socket.current?.readyState === WebSocket.OPEN) {
+      socket.current.send("stop");
+    }
+    socket.current = null;
+  };
+
   const startRecording = async () => {
     try {
       setError(null);
+      setLiveTranscript("");
+      setLiveMetrics(null);
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
       const recorder = new MediaRecorder(stream);
 
@@ -45,6 +117,7 @@ export default function RecorderCard({ disabled, onFile }: RecorderCardProps) {
       };
 
       recorder.start();
+      startStreaming(stream);
       setMediaRecorder(recorder);
       setRecording(true);
     } catch (err) {
@@ -63,6 +136,7 @@ export default function RecorderCard({ disabled, onFile }: RecorderCardProps) {
 
   const stopRecording = () => {
     if (mediaRecorder && recording) {
+      stopStreaming();
       mediaRecorder.stop();
       setRecording(false);
       setMediaRecorder(null);
@@ -121,6 +195,19 @@ export default function RecorderCard({ disabled, onFile }: RecorderCardProps) {
               Recording in progress...
             </div>
           )}
+
+          {liveTranscript && (
+            <div className="bg-gray-50 rounded-lg p-3">
+              <p className="text-xs text-gray-500 mb-1">Live transcript</p>
+              <p className="text-sm text-gray-700">{liveTranscript}</p>
+              {liveMetrics && (
+                <p className="text-xs text-gray-500 mt-2">
+                  {liveMetrics.wpm} WPM · {liveMetrics.filler.total} fillers · coverage{" "}
+                  {Math.round(liveMetrics.coverage.score * 100)}%
+                </p>
+              )}
+            </div>
+          )}
         </div>
       ) : (
         <div className="space-y-4">
@@ -1,13 +1,40 @@
 "use client";
 
-import { API_BASE } from "@/lib/api";
-import type { ReportJson } from "@/lib/types";
+import { useState } from "react";
+import { api, API_BASE } from "@/lib/api";
+import type { JobStatus, ReportJson } from "@/lib/types";
 
 interface ReportCardProps {
   report: ReportJson;
 }
 
 export default function ReportCard({ report }: ReportCardProps) {
+  const [preparingPdf, setPreparingPdf] = useState(false);
+
+  // PDFs are rendered by the worker: ask for one, wait for the job, then open it
+  const downloadPdf = async () => {
+    const pdfUrl = `${API_BASE}/report/${report.session_id}/pdf`;
+    setPreparingPdf(true);
+    try {
+      const res = await api.post<{ ready?: boolean; poll_url?: string }>(
+        `/report/${report.session_id}/pdf/render`
+      );
+      if (res.status === 202 && res.data.poll_url) {
+        for (let i = 0; i < 60; i++) {
+          await new Promise((r) => setTimeout(r, 1000));
+          const { data } = await api.get<JobStatus>(res.data.poll_url);
+          if (data.status === "finished") break;
+          if (data.status === "failed") throw new Error(data.error || "PDF render failed");
+        }
+      }
+      window.open(pdfUrl, "_blank", "noopener,noreferrer");
+    } catch (err) {
+      console.error("PDF download failed:", err);
+    } finally {
+      setPreparingPdf(false);
+    }
+  };
+
   const formatScore = (score: number) => {
     return Math.round(score * 100) / 100;
   };
@@ -22,14 +49,13 @@ export default function ReportCard({ report }: ReportCardProps) {
     <div className="bg-white rounded-2xl shadow-sm border p-6 space-y-6">
       <div className="flex items-center justify-between">
         <h2 className="text-lg font-semibold text-gray-900">Analysis Report</h2>
-        <a
-          href={`${API_BASE}/report/${report.session_id}/pdf`}
-          target="_blank"
-          rel="noopener noreferrer"
-          className="px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 font-medium transition-colors text-sm"
+        <button
+          onClick={downloadPdf}
+          disabled={preparingPdf}
+          className="px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 disabled:opacity-50 font-medium transition-colors text-sm"
         >
-          Download PDF
-        </a>
+          {preparingPdf ? "Preparing PDF..." : "Download PDF"}
+        </button>
       </div>
 
       {/* Overall Score - Prominent Display */}
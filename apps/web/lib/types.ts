@@ -30,3 +30,27 @@ export type Analysis = {
     result?: Analysis;
     error?: string;
   };
+
+  export type JobEvent = {
+    job_id: string;
+    stage: "queued" | "retrying" | "transcribing" | "scoring" | "saved" | "failed";
+    at?: number;
+    analysis_id?: number;
+    session_id?: number;
+    error?: string | null;
+  };
+
+  export type StreamSegment = { start: number; end: number; text: string };
+
+  export type StreamMessage =
+    | ({ type: "segment" } & StreamSegment)
+    | ({ type: "metrics" } & Analysis)
+    | {
+        type: "final";
+        language: string | null;
+        duration: number;
+        transcript: string;
+        segments: StreamSegment[];
+        analysis: Analysis | null;
+      }
+    | { type: "error"; detail: string };